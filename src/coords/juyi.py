@@ -2,3 +2,7 @@
 确定 = ("确定", 425, 351)
 战斗结束 = ("战斗结束", 883, 520)
 关闭 = ("关闭", 566, 452)
+
+# 聚义格子: 3行, 每行的列数; 战力数字相对格子中心的区域 (dx, dy, 宽, 高)
+聚义列数 = 7
+聚义战力区域 = (-45, 28, 90, 16)
@@ -0,0 +1,7 @@
+# 意外弹窗: (名称, 模板图片, 查找区域(x, y, 宽, 高), 处理坐标, 处理后: resume 继续 | abort 中止)
+# 模板图片放在 src/assets/popups 下(从游戏截图截, 见 utils/recovery.py), 截图坐标和其它 coords 一致, 没有模板的弹窗不检测
+断线重连 = ("断线重连", "popups/断线重连.png", (300, 180, 400, 240), ("重新连接", 470, 350), "abort")
+升级 = ("升级", "popups/升级.png", (300, 150, 400, 300), ("升级_确定", 470, 400), "resume")
+系统公告 = ("系统公告", "popups/系统公告.png", (150, 60, 700, 120), ("系统公告_关闭", 790, 90), "resume")
+
+弹窗列表 = [断线重连, 升级, 系统公告]
@@ -0,0 +1,11 @@
+# 界面: (名称, 模板图片, 查找区域(x, y, 宽, 高))
+# 像素探针从录制的截图生成(python utils/screen.py learn), 识别不了时才用模板匹配
+# 截图放在 src/assets/screens/<名称>/ 下, 模板放在 src/assets/screens/<名称>.png, 坐标和其它 coords 一致
+聚义界面 = ("聚义", "screens/聚义.png", (380, 40, 200, 60))
+战斗界面 = ("战斗", "screens/战斗.png", (0, 0, 200, 80))
+战斗结束界面 = ("战斗结束", "screens/战斗结束.png", (780, 480, 200, 80))
+集市界面 = ("集市", "screens/集市.png", (380, 40, 200, 60))
+组队副本界面 = ("组队副本", "screens/组队副本.png", (380, 40, 200, 60))
+奖励界面 = ("奖励", "screens/奖励.png", (300, 150, 400, 300))
+
+界面列表 = [聚义界面, 战斗界面, 战斗结束界面, 集市界面, 组队副本界面, 奖励界面]
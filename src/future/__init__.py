@@ -1,8 +1,21 @@
-from .bianqiang import Bianqiang
-from .fuben import Fuben
-from .zhanzheng import Zhanzheng
-from .other import Other
-from .test import Test
-from .zudui import ZuDui
+import importlib
+
+# 按需导入: 只加载账号任务用到的功能模块(以及对应的 coords 坐标表)
+_exports = {
+    "Bianqiang": ".bianqiang",
+    "Fuben": ".fuben",
+    "Zhanzheng": ".zhanzheng",
+    "Other": ".other",
+    "Test": ".test",
+    "ZuDui": ".zudui",
+}
 
 __all__ = ["Bianqiang", "Fuben", "Zhanzheng", "Other", "Test", "ZuDui"]
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,8 +1,7 @@
 from contextlib import contextmanager
 from coords.liehun import 一键猎魂, 一键合成
-import time as TM
 
-from .futureBase import Base
+from .futureBase import PASSTHROUGH, Base
 
 
 class Bianqiang(Base):
@@ -14,27 +13,39 @@ class Bianqiang(Base):
         time: 猎魂次数, 默认20次
         """
         self.logger.info(f"猎魂开始, 预计次数: {time}")
-        startTime = TM.time()
-        realTime = 0
+        startTime = self.clock.time()
+        journal = self._journal("liehun", time)
+        realTime = journal.resume()
+        # 银两不足时结束, 魂背包没满时不用合成
+        guard = self._resources(["银两"], ["魂背包"])
 
         with self._liehun():
-            times = (x for x in range(time))
+            times = (x for x in range(realTime, time))
 
             for i in times:
+                self._check_interrupts()
+                if guard.exhausted(realTime):
+                    guard.stop(time - realTime, 2)
+                    break
                 self.util.click(一键猎魂)
-                TM.sleep(2)
-                self.util.click(一键合成)
+                self.sleep(2)
+                if guard.needed("魂背包", realTime):
+                    self.util.click(一键合成)
                 realTime += 1
-                print(
-                    f"{self.qq} | 当前已猎魂: {realTime} 次 | 预期: {time}次", end="\r"
+                journal.record(realTime)
+                self._progress("猎魂", realTime, time)
+                self.util.echo(
+                    f"{self.qq} | 当前已猎魂: {realTime} 次 | 预期: {time}次"
                 )
-                TM.sleep(1)
+                self.sleep(1)
 
+        journal.finish() if realTime >= time or guard.stopped else journal.close()
+        guard.report("猎魂")
         self.logger.info(
-            f"猎魂结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}"
+            f"猎魂结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}"
         )
         print(
-            f"{self.qq} | 猎魂结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}".ljust(
+            f"{self.qq} | 猎魂结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}".ljust(
                 80
             )
         )
@@ -48,8 +59,11 @@ class Bianqiang(Base):
         try:
             self.logger.info("打开背包")
             yield
+        except PASSTHROUGH:
+            raise
         except Exception as e:
             self.logger.error(f"猎魂过程中出现错误: {str(e)}")
-
-        # 关闭背包
-        self.logger.info("关闭背包")
+        finally:
+            # 关闭背包
+            self.logger.info("关闭背包")
+            self._interrupt_summary()
@@ -1,7 +1,6 @@
 from contextlib import contextmanager
 from coords.zhengzhan import *
-import time as TM
-from .futureBase import Base
+from .futureBase import PASSTHROUGH, Base
 
 
 class Fuben(Base):
@@ -13,32 +12,42 @@ class Fuben(Base):
         time: 征战次数, 默认5次
         """
         self.logger.info(f"征战开始, 预计次数: {time}")
-        startTime = TM.time()
-        realTime = 0
+        startTime = self.clock.time()
+        journal = self._journal("zhengzhan", time)
+        realTime = journal.resume()
+        guard = self._resources(["体力"])
 
         printStr = f"{self.qq} | " if self.qq else ""
 
         with self._zhengzhan():
-            times = (x for x in range(time))
+            times = (x for x in range(realTime, time))
             self.util.click(攻击)
-            TM.sleep(2)
+            self.sleep(2)
 
             for i in times:
+                self._check_interrupts()
+                if guard.exhausted(realTime):
+                    guard.stop(time - realTime, 2)
+                    break
                 self.util.click(战斗结束)
-                TM.sleep(2.5)
+                self.sleep(2.5)
 
                 self.util.click(再战)
                 realTime += 1
-                print(
-                    f"{printStr}当前已征战: {realTime} 次 | 预计次数: {time}", end="\r"
+                journal.record(realTime)
+                self._progress("征战", realTime, time)
+                self.util.echo(
+                    f"{printStr}当前已征战: {realTime} 次 | 预计次数: {time}"
                 )
-                TM.sleep(1)
+                self.sleep(1)
 
+        journal.finish() if realTime >= time or guard.stopped else journal.close()
+        guard.report("征战")
         self.logger.info(
-            f"征战结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}"
+            f"征战结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}"
         )
         print(
-            f"{self.qq} | 征战结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}".ljust(
+            f"{self.qq} | 征战结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}".ljust(
                 80
             )
         )
@@ -52,8 +61,11 @@ class Fuben(Base):
         try:
             self.logger.info("打开征战")
             yield
+        except PASSTHROUGH:
+            raise
         except Exception as e:
             self.logger.error(f"征战过程中出现错误: {str(e)}")
-
-        # 关闭征战
-        self.logger.info("关闭征战")
+        finally:
+            # 关闭征战
+            self.logger.info("关闭征战")
+            self._interrupt_summary()
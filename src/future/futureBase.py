@@ -1,7 +1,35 @@
+from functools import wraps
 from multiprocessing.synchronize import Lock, Event
 from logging import Logger
+from typing import Optional
 
 from utils.util import Util
+from utils.journal import Journal
+from utils.resource import ResourceGuard
+from utils.trace import tracer
+from utils.idle import Preempted
+from utils.recovery import RoutineAborted
+from utils.supervisor import RoutineStopped
+
+# 功能的上下文管理器不能吞掉的异常, 要传给 Game.run(运行记录)和调用方
+PASSTHROUGH = (RoutineAborted, Preempted, RoutineStopped)
+
+
+def urgent(func):
+    """声明功能对时间要求高(比如集市要在整点前几秒完成)，点击不等待全局限速，窗口进程提高优先级"""
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        heartbeat = self.util.heartbeat
+        outer, self.util.urgent = self.util.urgent, True
+        heartbeat and heartbeat.set_urgent(True)
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.util.urgent = outer
+            heartbeat and heartbeat.set_urgent(outer)
+
+    return wrapper
 
 
 class Base:
@@ -23,3 +51,129 @@ class Base:
         self.qq = qq
         self.lock = lock
         self.event = event
+        self._iteration_start = None  # 本轮开始时间(追踪用)
+
+    @property
+    def clock(self):
+        """时钟(真实时间或模拟用的虚拟时间), 功能代码的计时都用它"""
+        return self.util.clock
+
+    def sleep(self, seconds: float, cat: str = "sleep"):
+        """等待(会记录到追踪时间线)
+
+        :param seconds: 秒数
+        :param cat: 追踪分类, 短等待 sleep, 长时间等待 wait
+        :raise Preempted: 作为空闲短任务运行时，超过截止时间
+        """
+        deadline = self.util.deadline
+        if deadline and self.clock.time() + seconds > deadline:
+            raise Preempted()
+
+        with tracer.span(f"{cat} {seconds}s", cat):
+            self.clock.sleep(seconds)
+
+    def idle(self, seconds: float):
+        """声明空闲: 窗口接下来至少 seconds 秒不用，可以插入短任务(见配置 "空闲任务")
+
+        :param seconds: 空闲时间(秒)
+        """
+
+        def wait(s):
+            self._waiting(s)
+            self.sleep(s, "wait")
+
+        runtime = self.util.idle_runtime
+        if runtime is None or runtime.active:
+            wait(seconds)
+            return
+        self._waiting(seconds)
+        runtime.fill(seconds, wait)
+
+    def _progress(self, routine: str, iteration: int, total: int):
+        """上报功能进度(心跳)
+
+        :param routine: 功能名称
+        :param iteration: 当前已执行次数
+        :param total: 预计次数
+        """
+        heartbeat = self.util.heartbeat
+        if heartbeat:
+            heartbeat.progress(routine, iteration, total)
+        if self.util.run:
+            self.util.run.progress(iteration, total)
+
+        # 追踪: 两次上报之间算一轮
+        now = tracer.now()
+        if self._iteration_start is not None:
+            tracer.complete(
+                f"{routine} #{iteration}", "iteration", self._iteration_start
+            )
+        self._iteration_start = now
+
+        # 控制接口: 在一轮结束时暂停或停止
+        if heartbeat:
+            heartbeat.checkpoint()
+
+    def _waiting(self, seconds: float):
+        """声明长时间等待(心跳顺延)
+
+        :param seconds: 预计等待时间(秒)
+        """
+        heartbeat = self.util.heartbeat
+        if heartbeat:
+            heartbeat.wait(seconds)
+
+    def _journal(self, routine: str, total: int) -> Journal:
+        """断点续跑日志
+
+        :param routine: 功能名称
+        :param total: 预计次数
+        """
+        journal = Journal(self.qq, routine, total, self.util.journal_directory)
+        if journal.resume():
+            self.logger.info(f"{routine} 从断点继续: 已完成 {journal.resume()} 次")
+        return journal
+
+    def current_state(self, frame=None) -> Optional[str]:
+        """当前界面(见 coords/screens.py), 用于跳过不需要的点击
+
+        :param frame: 截图, 默认实时截图
+        :return: 界面名称, 比如: 聚义、战斗结束, 未开启或识别不了返回 None
+        """
+        screens = self.util.screens
+        if screens is None or not screens.ready:
+            return None
+        return screens.classify(self.util.capture() if frame is None else frame)
+
+    def _check_interrupts(self) -> bool:
+        """检测并处理意外弹窗(在步骤之间调用)
+
+        :return bool: 是否处理过弹窗
+        :raise RoutineAborted: 弹窗要求中止当前功能
+        """
+        recovery = self.util.recovery
+        return recovery.check() if recovery else False
+
+    def _interrupt_summary(self):
+        """记录本账号各弹窗出现次数"""
+        recovery = self.util.recovery
+        if recovery and recovery.counts:
+            self.logger.info(f"意外弹窗统计: {recovery.summary()}")
+
+    def _resources(
+        self, consumes: list, preconditions: list = None
+    ) -> ResourceGuard:
+        """资源检测
+
+        :param consumes: 功能消耗的资源, 不足时提前结束
+        :param preconditions: 步骤的前置条件, 不满足时跳过该步骤
+        """
+        config = self.util.resource_config
+        return ResourceGuard(
+            self.util,
+            self.logger,
+            config,
+            consumes,
+            preconditions,
+            config.get("检测间隔", 5),
+        )
@@ -1,6 +1,5 @@
 from coords.other import *
-import time as TM
-from .futureBase import Base
+from .futureBase import Base, urgent
 
 
 class Other(Base):
@@ -12,24 +11,31 @@ class Other(Base):
         time: 次数, 默认 30次\n
         """
         self.logger.info(f"洗属性开始, 预计次数: {time}")
-        startTime = TM.time()
+        startTime = self.clock.time()
         realTime = 0
         times = (x for x in range(time))
+        guard = self._resources(["洗属性石"])
 
         printStr = f"{self.qq} | " if self.qq else ""
 
         for i in times:
+            self._check_interrupts()
+            if guard.exhausted(realTime):
+                guard.stop(time - realTime, 2)
+                break
             self.util.click(次数_洗属性)
-            TM.sleep(1)
+            self.sleep(1)
 
             self.util.click(确定_洗属性)
             realTime += 1
-            print(f"{printStr}当前已洗属性: {realTime} 次 | 预计次数: {time}", end="\r")
-            TM.sleep(1)
+            self._progress("洗属性", realTime, time)
+            self.util.echo(f"{printStr}当前已洗属性: {realTime} 次 | 预计次数: {time}")
+            self.sleep(1)
 
-        result = f"洗属性结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}"
+        result = f"洗属性结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}"
         self.logger.info(result)
         print(result)
+        guard.report("洗属性")
 
     def xiShuXing1(self, time=3000):
         """
@@ -39,27 +45,30 @@ class Other(Base):
         time: 次数, 默认 300次\n
         """
         self.logger.info(f"洗属性开始2, 预计次数: {time}")
-        startTime = TM.time()
+        startTime = self.clock.time()
         realTime = 0
         times = (x for x in range(time))
 
         printStr = f"{self.qq} | " if self.qq else ""
 
         for i in times:
+            self._check_interrupts()
             self.util.click(确定_洗属性)
             realTime += 1
-            print(f"{printStr}当前已洗属性: {realTime} 次 | 预计次数: {time}", end="\r")
-            TM.sleep(1)
+            self._progress("洗属性", realTime, time)
+            self.util.echo(f"{printStr}当前已洗属性: {realTime} 次 | 预计次数: {time}")
+            self.sleep(1)
 
-        result = f"洗属性2结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}"
+        result = f"洗属性2结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}"
         self.logger.info(result)
         print(result)
 
+    @urgent
     def jiShi(self, done=True):
         """
         集市
         """
-        start_time = TM.time()
+        start_time = self.clock.time()
 
         集市 = self.config.get("集市")
         城市 = 集市.get("城市")
@@ -74,19 +83,19 @@ class Other(Base):
         self.logger.info(f"在{city[城市]}用第{商队}商队进行跑商第{商品顺序}个")
 
         self.util.click((f"{city[城市]}", 200 + 103 * (城市 - 1), 100))
-        TM.sleep(0.2)
+        self.sleep(0.2)
         self.util.click((f"商品{商品顺序}", 470, 230 + 40 * (商品顺序 - 1)))
-        TM.sleep(0.15)
+        self.sleep(0.15)
         self.util.click((f"商队{商队}", 270 + 190 * (商队 - 1), 170))
-        TM.sleep(0.1)
+        self.sleep(0.1)
         self.util.click((f"货品数量最大", 688, 265))
 
         if done:
-            TM.sleep(0.1)
+            self.sleep(0.1)
             self.util.click((f"开始跑商", 500, 415))
 
         print(
-            f"{self.qq}在{city[城市]}用第{商队}商队进行跑商第{商品顺序}个, 耗时:{round(TM.time() - start_time, 2)}s"
+            f"{self.qq}在{city[城市]}用第{商队}商队进行跑商第{商品顺序}个, 耗时:{round(self.clock.time() - start_time, 2)}s"
         )
 
     def jingJiChang(self, time=12):
@@ -95,18 +104,20 @@ class Other(Base):
         :param time: 攻打次数
         """
         for ii in range(time):
+            self._check_interrupts()
             self.util.click(立即开战)
-            TM.sleep(6.5)
+            self.sleep(6.5)
 
             self.util.click(战斗结束)
-            TM.sleep(0.2)
+            self.sleep(0.2)
             self.util.click(战斗结束)
-            TM.sleep(3)
+            self.sleep(3)
 
             self.util.click(关闭)
-            TM.sleep(1)
+            self.sleep(1)
 
-            print(f"{self.qq} | 已攻打: {ii+1} 次, 预计要攻打: {time}次", end="\r")
+            self._progress("竞技场", ii + 1, time)
+            self.util.echo(f"{self.qq} | 已攻打: {ii+1} 次, 预计要攻打: {time}次")
 
     def shengChenGang_chouJiang(self, time=20):
         """生辰纲抽奖
@@ -115,13 +126,15 @@ class Other(Base):
         """
 
         self.util.click(开启十次_确定)
-        TM.sleep(0.3)
+        self.sleep(0.3)
 
         for ii in range(time):
+            self._check_interrupts()
             self.util.click(开启十次)
-            TM.sleep(2.9)
+            self.sleep(2.9)
 
             self.util.click(开启十次_确定)
-            TM.sleep(0.3)
+            self.sleep(0.3)
 
-            print(f"{self.qq} | 已抽奖: {ii+1} 次, | 预计要抽奖: {time}次", end="\r")
+            self._progress("生辰纲抽奖", ii + 1, time)
+            self.util.echo(f"{self.qq} | 已抽奖: {ii+1} 次, | 预计要抽奖: {time}次")
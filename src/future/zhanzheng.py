@@ -1,7 +1,6 @@
 from contextlib import contextmanager
 from coords.juyi import *
-import time as TM
-from .futureBase import Base
+from .futureBase import PASSTHROUGH, Base
 
 
 class Zhanzheng(Base):
@@ -10,12 +9,10 @@ class Zhanzheng(Base):
         聚义
 
         参数:
-        sleep_time: 等待时间
+        sleep_time: 等待时间, 开启目标分配时按实测每轮耗时错开
         """
-        TM.sleep(sleep_time)
-
-        startTime = TM.time()
-        realTime = 0
+        # 多个账号分到不同的格子(见 utils/allocator.py), 创建分配时已经占了格子, 不打时要让出
+        targets = self.util.targets
 
         option = self.config.get("聚义", {})
         position = option.get("position", [])
@@ -26,13 +23,37 @@ class Zhanzheng(Base):
 
         if stop:
             self.logger.info("聚义已关闭, 跳过")
+            targets and targets.release(self.qq)
             return
 
         if len(position) != 2:
             self.logger.error("聚义坐标配置错误, 请检查配置文件")
+            targets and targets.release(self.qq)
             return
 
+        # 配置检查之后再错开等待
+        slot = targets.allocate(self.qq) if targets else None
+        if slot:
+            sleep_time = targets.stagger(self.qq)
+        try:
+            self.sleep(sleep_time, "wait")
+        except BaseException:
+            # 错开等待时被打断(空闲时间用完、停止), 格子让给别人
+            targets and targets.release(self.qq)
+            raise
+
+        startTime = self.clock.time()
+        realTime = 0
+
         position = ("聚义攻打位置", *self._calculate_juyi_position(position))
+        if targets:
+            if slot is None:
+                self.logger.info("聚义格子已全部打满, 跳过")
+                return
+            position = self._juyi_target(slot)
+        auto = option.get("自动选目标", False)
+        journal = self._journal("juyi", count)
+        realTime = journal.resume()
 
         printStr = f'{self.qq} | {tuple(option.get("position")) } | ' if self.qq else ""
         print(
@@ -40,33 +61,52 @@ class Zhanzheng(Base):
         )
 
         with self._juyi():
-            times = (x for x in range(count))
+            times = (x for x in range(realTime, count))
+            cycle_start = None
 
             for i in times:
-                self.util.click(position)
-                TM.sleep(1.5)
+                if targets and cycle_start is not None:
+                    targets.record_cycle(self.qq, self.clock.time() - cycle_start)
+                cycle_start = self.clock.time()
+                self._check_interrupts()
+                # 每轮识别一次棋盘，打最合适的目标，识别失败则打配置的位置
+                target = self._scan_juyi(option) if auto else None
+                self.util.click(target or position)
+                self.sleep(1.5)
                 self.util.click(掠夺)
-                TM.sleep(1)
+                self.sleep(1)
                 self.util.click(确定)
-                TM.sleep(1.5)
-                self.util.click(战斗结束)
+                self.sleep(1.5)
+                self._check_interrupts()
+                # 已经回到聚义界面(没有进入战斗)时不用点战斗结束
+                if self.current_state() != "聚义":
+                    self.util.click(战斗结束)
                 realTime += 1
-                print(
-                    f"{printStr} 当前已聚义: {realTime} 次 | 预计次数: {count}".ljust(
-                        80
-                    ),
-                    end="\r",
+                journal.record(realTime)
+                if targets:
+                    moved = targets.attacked(self.qq, self.clock.time())
+                    if moved is None:
+                        self.logger.info("聚义格子已全部打满, 提前结束")
+                        break
+                    if moved != slot:
+                        slot, position = moved, self._juyi_target(moved)
+                        self.sleep(targets.realign(self.qq, self.clock.time()), "wait")
+                self._progress("聚义", realTime, count)
+                self.util.echo(
+                    f"{printStr} 当前已聚义: {realTime} 次 | 预计次数: {count}".ljust(80)
                 )
-                TM.sleep(3.5)
+                self.idle(3.5)
 
-                self.util.click(关闭)
-                TM.sleep(3.5)
+                if self.current_state() != "聚义":
+                    self.util.click(关闭)
+                self.idle(3.5)
 
+        journal.finish() if realTime >= count else journal.close()
         self.logger.info(
-            f"{self.qq} | 聚义结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}"
+            f"{self.qq} | 聚义结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}"
         )
         print(
-            f"{self.qq} | 聚义结束, 耗时: {round(TM.time() - startTime, 2)}s, 实际次数: {realTime}".ljust(
+            f"{self.qq} | 聚义结束, 耗时: {round(self.clock.time() - startTime, 2)}s, 实际次数: {realTime}".ljust(
                 80
             )
         )
@@ -80,11 +120,57 @@ class Zhanzheng(Base):
         try:
             self.logger.info("打开聚义")
             yield
+        except PASSTHROUGH:
+            raise
         except Exception as e:
             self.logger.error(f"聚义过程中出现错误: {str(e)}")
+        finally:
+            # 关闭聚义
+            self.logger.info("关闭聚义")
+            targets = self.util.targets
+            targets and targets.release(self.qq)
+            self._interrupt_summary()
+
+    def _scan_juyi(self, option: dict):
+        """识别聚义棋盘，返回最合适的攻打目标
+
+        :param option: 聚义配置, 排序: "最低" 打战力最低的, "最高" 打战力最高的
+        :return: 坐标, 比如: ("聚义(2, 3) 战力:1200", 335, 295), 识别不到返回 None
+        """
+        from utils.vision import get_digit_reader
+
+        reader = get_digit_reader()
+        if not reader.ready:
+            return None
+
+        frame = self.util.capture()
+        slots = [(x, y) for x in range(1, 4) for y in range(1, 聚义列数 + 1)]
+        centers = [self._calculate_juyi_position(slot) for slot in slots]
+        dx, dy, w, h = 聚义战力区域
+        values = reader.read_many(
+            frame, [(cx + dx, cy + dy, w, h) for cx, cy in centers]
+        )
+
+        candidates = [
+            (value, slot, center)
+            for value, slot, center in zip(values, slots, centers)
+            if value is not None
+        ]
+        if not candidates:
+            self.logger.warning("聚义识别不到目标, 使用配置的位置")
+            return None
 
-        # 关闭聚义
-        self.logger.info("关闭聚义")
+        candidates.sort(key=lambda c: c[0], reverse=option.get("排序") == "最高")
+        value, slot, (x, y) = candidates[0]
+        self.logger.info(f"聚义识别到 {len(candidates)} 个目标, 选择: {slot} 战力:{value}")
+        return (f"聚义{slot} 战力:{value}", x, y)
+
+    def _juyi_target(self, slot):
+        """分配到的格子的坐标
+
+        :param slot: [行, 列]
+        """
+        return (f"聚义{tuple(slot)}", *self._calculate_juyi_position(slot))
 
     def _calculate_juyi_position(self, arr):
         """计算聚义位置"""
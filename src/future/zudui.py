@@ -1,4 +1,3 @@
-import time as TM
 from datetime import datetime
 
 from coords.zudui import *
@@ -23,58 +22,66 @@ class ZuDui(Base):
         else:
             副本 = 神降罗汉山
 
-        for i in range(1, times + 1):
+        journal = self._journal("shenKun", times)
+
+        for i in range(journal.resume() + 1, times + 1):
+            self._check_interrupts()
             if role == "master":
                 self.util.click(副本)
-                TM.sleep(0.5)
+                self.sleep(0.5)
                 self.util.click(创建组队副本)
-                TM.sleep(0.5)
+                self.sleep(0.5)
                 self.util.click(难度)
-                TM.sleep(0.3)
+                self.sleep(0.3)
                 self.util.click(("困难", 463, 383))
-                TM.sleep(0.5)
+                self.sleep(0.5)
                 self.util.click(私有组队)
-                TM.sleep(0.5)
+                self.sleep(0.5)
                 self.util.click(创建)
-                TM.sleep(0.5)
+                self.sleep(0.5)
                 self.util.click(人满自动开)
-                TM.sleep(0.2)
+                self.sleep(0.2)
                 self.util.click(("空白位置", 650, 377))
                 print(
-                    f"master[{self.qq}]创建组队完毕, {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}, 预计等待7分钟20秒"
+                    f"master[{self.qq}]创建组队完毕, {datetime.fromtimestamp(self.clock.time()).strftime('%Y-%m-%d %H:%M:%S')}, 预计等待7分钟20秒"
                 )
             else:
-                TM.sleep(4)
+                self.sleep(4)
 
-                self.lock.acquire()  # 进行抢锁，抢到的线程才执行
-                self.util.click(加入指定队伍)
-                TM.sleep(0.5)
+                # 进行抢锁，抢到的线程才执行; 出错(包括 Preempted)时也要释放, 不然其它账号一直等
+                with self.lock:
+                    self.util.click(加入指定队伍)
+                    self.sleep(0.5)
 
-                self.util.type_content(输入队伍ID_输入框, 队伍ID)
-                TM.sleep(0.5)
+                    self.util.type_content(输入队伍ID_输入框, 队伍ID)
+                    self.sleep(0.5)
 
-                self.util.click(加入队伍)
-                TM.sleep(0.3)
-                self.lock.release()  # 释放锁，其它线程可以执行了
+                    self.util.click(加入队伍)
+                    self.sleep(0.3)
 
             self.logger.info(f"{副本[0]}当前已开: {i}次, 预计次数: {times}次")
-            print(f"{副本[0]}当前已开: {i}次, 预计次数: {times}次", end="\r")
+            self.util.echo(f"{副本[0]}当前已开: {i}次, 预计次数: {times}次")
 
             # 用于解决: 组队的人点击过快
             loop = i // 5
-            TM.sleep(7 * 60 + 10 + loop * 20)
+            self._progress(副本[0], i, times)
+            self.idle(7 * 60 + 10 + loop * 20)
 
+            self._check_interrupts()
             self.util.click(通关成功_确定)
-            TM.sleep(0.3)
+            self.sleep(0.3)
             self.util.click(通关成功_确定)
-            TM.sleep(0.3)
+            self.sleep(0.3)
 
             self.util.click(副本通关奖励)
-            TM.sleep(0.5)
+            self.sleep(0.5)
             self.util.click(副本通关奖励)
-            TM.sleep(0.5)
+            self.sleep(0.5)
 
             self.util.click(消耗罗汉珠_确定)
-            TM.sleep(0.5)
+            self.sleep(0.5)
             self.util.click(消耗罗汉珠_确定)
-            TM.sleep(0.5)
+            self.sleep(0.5)
+            journal.record(i)
+
+        journal.finish()
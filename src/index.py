@@ -1,20 +1,49 @@
-from utils import Game, Hwnd
-from pywinauto import Application
+# 工作进程(spawn)会重新导入本文件，这里只导入必需的模块
+# pywinauto、pygetwindow、集群、任务计划、性能分析等在用到的函数里再导入，减少每个进程的内存
+from utils import Game, Supervisor
+from utils.trace import tracer, reset_traces, merge_traces
+from utils.logs import setup_logging
+import argparse
 import os
 import multiprocessing  # 导入线程包
+import socket
 import time
+from typing import TYPE_CHECKING
 
-# 进程列表
-processList = []
+if TYPE_CHECKING:
+    from utils import Scheduler
+    from utils.profiling import ProfileOptions
+
+# 进程监控
+supervisor: Supervisor = None
+# 状态面板(配置 监控.状态面板)
+panel = None
+# 性能分析选项(命令行 --profile / --line-profile / --tracemalloc), 只在主进程设置
+profile_options: "ProfileOptions" = None
 
 
 class TaskOption:
-    def __init__(self, game: Game, order_num: int, lock, event, setup_time: int = 0):
+    def __init__(
+        self,
+        game: Game,
+        order_num: int,
+        lock,
+        event,
+        setup_time: int = 0,
+        scheduler: "Scheduler" = None,
+    ):
         self.game = game
         self.order_num = order_num
         self.setup_time = setup_time
         self.global_lock = lock
         self.global_event = event
+        self.scheduler = scheduler
+        self.heartbeat = None  # 心跳(supervisor分配)
+        self.governor = None  # 全局点击限速(supervisor分配)
+        self.targets = None  # 聚义目标分配
+        self.inbox = None  # 控制接口发来的功能和配置(supervisor分配)
+        self.config_patch = {}  # 控制接口推送过的配置, 进程重启后重新应用
+        self.gate = None  # 启动放行点, 全部账号挂载完成后一起开始(supervisor分配)
 
 
 def do_task(option: TaskOption):
@@ -28,13 +57,28 @@ def do_task(option: TaskOption):
     :param option.setup_time: 启动耗时，单位秒
     :param option.global_lock: 全局进程锁
     :param option.global_event: 全局进程事件
+    :param option.scheduler: 任务计划, 有计划时按计划执行
+    :param option.heartbeat: 心跳
+    :param option.gate: 启动放行点
     :return None:
     """
     time_start = time.time()
-    app = Application(backend="uia").connect(handle=option.game.hwnd)
-    option.game.count_position(app, True, option.global_lock, option.global_event)
+    option.game.heartbeat = option.heartbeat
+    option.game.governor = option.governor
+    option.game.targets = option.targets
+    if option.config_patch:
+        option.game.apply_config(option.config_patch)
+    if not tracer.enabled:
+        tracer.configure(option.game.config.get("追踪"))
+    tracer.name_thread(option.game.qq or str(option.game.hwnd))
+    # 已有位置(缓存或主进程算好的)时不连接 uia, 工作进程不用加载 pywinauto
+    option.game.count_position(None, True, option.global_lock, option.global_event)
     setup_time2 = time.time() - time_start
     game = option.game
+    # 挂载完成, 等其它账号一起开始
+    if option.heartbeat:
+        startup = game.config.get("启动", {})
+        option.heartbeat.ready(option.gate, startup.get("等待超时", 120))
 
     print(
         " | ".join(
@@ -45,9 +89,14 @@ def do_task(option: TaskOption):
         )
     )
 
+    # 按 配置里的 "任务" 列表排好的计划执行, 有计划时没有任务的账号什么都不做
+    if option.scheduler and option.scheduler.chores:
+        option.scheduler.run(game)
+        return
+
     # game.Bianqiang.liehun(200)
     # game.Fuben.zhengzhan(21)
-    game.Zhanzheng.juyi(option.order_num)
+    game.run("Zhanzheng.juyi", option.order_num)
 
     # game.Other.xiShuXing100(150)
     # game.Other.xiShuXing1()
@@ -71,12 +120,9 @@ def do_task(option: TaskOption):
     # game.count_position(123)
 
 
-def more_task(lock, event):
-    print(
-        f"cpu核心数: {os.cpu_count()} | 只要游戏尺寸发生变化，就必须手动将 base.json 里面的 cache 设置为false"
-    )
-    global processList
-    games = [
+def get_games():
+    """本机的游戏实例"""
+    return [
         Game(133098, "2548918215"),
         Game(264118, "2468659059"),
         Game(329718, "3305194332"),
@@ -87,53 +133,279 @@ def more_task(lock, event):
         # Game(395482, "555"),
     ]
 
-    # 只计算第一个实例的位置，其它实例共用位置
-    time_start = time.time()
-    app1 = Application(backend="uia").connect(handle=games[0].hwnd)
-    games[0].count_position(app1)
-    setup_time = time.time() - time_start
 
-    current_index = 0
+def get_target():
+    """任务函数, 开启性能分析时包一层"""
+    if profile_options and profile_options.enabled:
+        from utils.profiling import ProfiledTarget
+
+        return ProfiledTarget(do_task, profile_options)
+    return do_task
+
+
+def clear_profiles():
+    """开启性能分析时清空上一次运行的分析结果"""
+    if profile_options and profile_options.enabled:
+        from utils.profiling import reset_profiles
+
+        reset_profiles(profile_options.directory)
+
+
+def find_windows() -> list:
+    """按配置的后端查找全部游戏窗口(flash 所在的子窗口)"""
+    from utils.backend import get_backend
+
+    backend = get_backend(Game().config.get("后端"))
+    # 后端不支持查找窗口时返回 None, 当作没有找到
+    return backend.find_windows("MainWindow", "Chrome Legacy Window") or []
+
+
+def get_governor(config: dict):
+    """全局点击限速(配置 "限速" 开启时)"""
+    throttle = config.get("限速", {})
+    if not throttle.get("开启", False):
+        return None
+    from utils.governor import Governor
+
+    return Governor.from_config(throttle)
 
+
+def get_targets(games: list):
+    """聚义目标分配(配置 战争.聚义.分配 开启时), 各账号打不同的格子"""
+    option = games[0].config.get("战争", {}).get("聚义", {})
+    if not option.get("分配", {}).get("开启", False):
+        return None
+    from utils.allocator import TargetAllocator
+
+    ledger = games[0].config.get("记录", {})
+    path = ledger.get("文件", "logs/ledger.db")
+    return TargetAllocator.from_config(
+        [game.qq for game in games], option, path if os.path.exists(path) else None
+    )
+
+
+def get_affinity(games: list):
+    """cpu 亲和性和优先级管理(配置 "亲和性" 开启时)"""
+    config = games[0].config.get("亲和性", {})
+    if not config.get("开启", False):
+        return None
+    from utils.affinity import AffinityManager
+    from utils.backend import get_backend
+
+    backend = get_backend(games[0].config.get("后端"))
+    accounts = {}
     for game in games:
-        # 使用第一个实例的位置
-        if current_index != 0:
-            game.coordDiff = games[0].coordDiff
-
-        try:
-            # 创建进程
-            p = multiprocessing.Process(
-                target=do_task,
-                args=(TaskOption(game, current_index, lock, event, setup_time),),
-            )
-            processList.append(p)
-            # 设置为守护进程，主进程结束，子进程也结束
-            p.daemon = True
-            # 启动进程
-            p.start()
-        except Exception as e:
-            print(f"index.py | {game.qq} | 任务错误:", e)
-        current_index += 1
+        pid = backend.window_pid(game.hwnd)
+        if pid:
+            accounts[game.qq] = pid
+    return AffinityManager(accounts, config.get("保留核心", 1))
+
+
+def more_task(lock, event):
+    print(
+        f"cpu核心数: {os.cpu_count()} | 只要游戏尺寸发生变化，就必须手动将 base.json 里面的 cache 设置为false"
+    )
+    global supervisor
+    games = get_games()
+    reset_traces()
+    clear_profiles()
+
+    # 并行发现、连接、校准全部窗口
+    from utils.bringup import BringUp
+
+    startup = games[0].config.get("启动", {})
+    bringup = BringUp.from_config(games, startup).run()
+    setup_time = bringup.elapsed
+    # 没找到窗口的账号不启动(不会分到别的窗口的偏移)
+    games = bringup.usable()
+    if not games:
+        print("未找到窗口")
+        return
+
+    # 按各账号的任务列表排计划
+    from utils import Scheduler
+
+    monitor = games[0].config.get("监控", {})
+    scheduler = Scheduler.from_games(games, monitor.get("每进程窗口数", 2))
+    scheduler.build()
+
+    # 开启状态面板时进度只写共享内存, 工作进程不输出
+    panel_config = monitor.get("状态面板", {})
+    control = games[0].config.get("控制", {})
+    console = monitor.get("终端输出", True) and not panel_config.get("开启", False)
+    options = []
+    targets = get_targets(games)
+    for current_index, game in enumerate(games):
+        game.console = console
+        option = TaskOption(game, current_index, lock, event, setup_time, scheduler)
+        option.targets = targets
+        options.append(option)
+
+    # 每个进程托管多个窗口，由 supervisor 负责心跳巡检和重启
+    supervisor = Supervisor(
+        get_target(),
+        options,
+        per_worker=monitor.get("每进程窗口数", 2),
+        stall_timeout=monitor.get("心跳超时", 600),
+        max_restarts=monitor.get("最大重启次数", 3),
+        governor=get_governor(games[0].config),
+        affinity=get_affinity(games),
+        control=control.get("开启", False),
+        barrier=startup.get("同时开始", True),
+    )
+    # 有计划时按计划的分组启动进程(包括没有任务的账号, 不然放行点会一直等它们)
+    qqs = [game.qq for game in games]
+    shards = [
+        [qqs.index(qq) for qq in accounts] for accounts in scheduler.workers if accounts
+    ]
+    supervisor.start(shards if scheduler.chores else None)
+
+    # 等全部账号挂载完成后放行, 输出各阶段启动耗时
+    waiting = supervisor.release(startup.get("等待超时", 120))
+    released = time.time()
+    if waiting:
+        print(f"启动 | 等待超时, 未就绪: {', '.join(waiting)}")
+    bringup.collect(supervisor.board, [option.game.qq for option in options])
+    bringup.report(released)
+
+    # 控制接口: 不重启就能执行新功能、暂停、停止、推送配置
+    if control.get("开启", False):
+        from utils.control import ControlServer
+
+        ControlServer.from_config(supervisor, control).serve()
+
+    global panel
+    if panel_config.get("开启", False):
+        from utils.panel import StatusPanel
+
+        panel = StatusPanel.from_supervisor(supervisor, panel_config).start()
+
+
+def plan_task():
+    """只打印排好的任务计划，不执行(dry-run)"""
+    from utils import Scheduler
+
+    games = get_games()
+    monitor = games[0].config.get("监控", {})
+    scheduler = Scheduler.from_games(games, monitor.get("每进程窗口数", 2))
+    scheduler.build()
+    scheduler.dry_run()
 
 
 def single_task(lock, event):
     # 1.查找窗口
     game = Game()
-    hwnd = Hwnd.find_hwndByTitle_p_child("MainWindow", "Chrome Legacy Window")
-    if hwnd is None:
+    hwnds = find_windows()
+    if not hwnds:
         print("未找到窗口")
         return
+    hwnd = hwnds[0]
     print(f"{hwnd} | 找到窗口")
     game.set_hwnd(hwnd)
 
     # 2.执行操作
-    do_task(TaskOption(game, 0, lock, event))
+    clear_profiles()
+    get_target()(TaskOption(game, 0, lock, event))
+
+
+def broadcast_task(lock, event):
+    """广播模式: 一个线程把 base.json 的 广播.任务 同时跑在全部窗口上"""
+    from utils.broadcast import Broadcast
+
+    games = get_games()
+    games[0].count_position(None, True, lock, event)
+    for game in games[1:]:
+        game.coordDiff = games[0].coordDiff
+        game.count_position(None, True, lock, event)
+
+    config = games[0].config.get("广播", {})
+    broadcast = Broadcast(games, config.get("同步间隔", 1))
+    for task in config.get("任务", []):
+        broadcast.run(task["routine"], *task.get("args", []))
+
+
+def tabs_task(lock, event):
+    """多标签: 全部账号是同一个客户端窗口里的标签(标签标题是 qq 号), 每个账号一个线程轮流使用窗口"""
+    import threading
+    from utils.tabs import TabHost, UiaTabTree
+
+    games = get_games()
+    host = TabHost.from_config(
+        UiaTabTree(games[0].connect()), games[0].config.get("多标签", {})
+    )
+    for game in games:
+        game.tab = host.tab(game.qq)
+
+    clear_profiles()
+    threads = [
+        threading.Thread(
+            target=get_target(), args=(TaskOption(game, i, lock, event),), name=game.qq
+        )
+        for i, game in enumerate(games)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(host.report())
+
+
+def coordinator_task():
+    """多机协同: 协调者，按 base.json 的 集群.任务计划 分配任务"""
+    from utils import Coordinator
+
+    cluster = Game().config.get("集群", {})
+    coordinator = Coordinator(
+        cluster.get("任务计划", []), "0.0.0.0", cluster.get("端口", 9527)
+    )
+    coordinator.serve()
+    # agent 注册有先后, 等一会还没有 agent 拥有的账号放弃, 不然一直等下去
+    if not coordinator.wait(cluster.get("注册等待", 60)):
+        unowned = coordinator.unowned()
+        if unowned:
+            print(f"coordinator | 没有 agent 注册这些账号, 跳过它们的任务: {unowned}")
+            coordinator.abandon(unowned)
+        if not coordinator.wait(cluster.get("等待超时", 3600)):
+            print(f"coordinator | 等待超时, 没有 agent 的账号: {coordinator.unowned()}")
+    coordinator.report()
+    coordinator.stop()
+
+
+def agent_task(lock, event):
+    """多机协同: 执行者，注册本机窗口并执行分配到的任务"""
+    from utils import Agent
+
+    discovered = set(find_windows())
+    games = {}
+    for game in get_games():
+        if game.hwnd not in discovered:
+            print(f"{game.qq} | 未找到窗口({game.hwnd}), 不注册")
+            continue
+        game.count_position(None, True, lock, event)
+        games[game.qq] = game
+
+    def runner(qq, routine, args):
+        games[qq].run(routine, *args)
+
+    cluster = Game().config.get("集群", {})
+    agent = Agent(
+        socket.gethostname(),
+        [{"qq": game.qq, "hwnd": game.hwnd} for game in games.values()],
+        runner,
+        capacity=len(games),
+    )
+    agent.run((cluster.get("地址", "127.0.0.1"), cluster.get("端口", 9527)))
 
 
 # 是否还有进程在处理任务
 def check_process() -> bool:
-    global processList
-    """类似js的every方法"""
+    """巡检工作进程，重启挂掉或卡死的进程
+
+    :return bool: 是否还有进程在处理任务
+    """
+    if supervisor is None:
+        return False
+    return supervisor.check()
 
 
 # 后续思路， 通过 handle 得到多个 app ，然后处理
@@ -145,21 +417,91 @@ def main(mode="single"):
 
     if mode == "single":
         single_task(global_lock, global_event)
+    elif mode == "broadcast":
+        # 广播: 同一个功能同时跑在全部窗口
+        broadcast_task(global_lock, global_event)
+    elif mode == "tabs":
+        # 多标签: 多个账号共用一个客户端窗口
+        tabs_task(global_lock, global_event)
+    elif mode == "plan":
+        # 只打印任务计划
+        plan_task()
+    elif mode == "coordinator":
+        # 多机协同: 协调者
+        coordinator_task()
+    elif mode == "agent":
+        # 多机协同: 执行者
+        agent_task(global_lock, global_event)
     else:
         # 多窗口
         more_task(global_lock, global_event)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="水浒Q传 多窗口脚本")
+    parser.add_argument(
+        "--mode",
+        default="more",
+        choices=["single", "more", "plan", "broadcast", "tabs", "coordinator", "agent"],
+        help="运行模式, 默认 more(多窗口)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="cProfile 分析每个账号线程"
+    )
+    parser.add_argument(
+        "--line-profile",
+        action="store_true",
+        help="line-profiler 逐行分析热点函数(需安装 line-profiler)",
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="tracemalloc 记录内存分配"
+    )
+    parser.add_argument(
+        "--profile-dir", default="logs/profile", help="性能分析结果目录"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    # 只有主进程写日志文件(切分、压缩、点击汇总), 工作进程的日志发给主进程
+    setup_logging("logs/game.log", Game().config.get("日志"))
+    from utils.profiling import ProfileOptions, merge_profiles
+
+    profile_options = ProfileOptions(
+        args.profile, args.line_profile, args.tracemalloc, args.profile_dir
+    )
     try:
         # main()
-        main("more")
+        main(args.mode)
+        last_report = time.time()
         while True:
             time.sleep(5)
-            check_process()
+            if not check_process():
+                panel and panel.stop()
+                supervisor and supervisor.report()
+                print("全部任务已结束")
+                break
+
+            report_interval = supervisor.options[0].game.config.get("监控", {})
+            # 状态面板会覆盖报告, 开启时只在结束时报告
+            if panel is None and time.time() - last_report > report_interval.get(
+                "报告间隔", 60
+            ):
+                supervisor.report()
+                last_report = time.time()
 
             # print("暂时没有获取的进程")
             # time.sleep(60)
 
     except KeyboardInterrupt:
+        panel and panel.stop()
         print("\n程序已手动退出")
+    finally:
+        # 先让工作进程写完追踪、运行记录、性能分析结果和日志(控制模式下进程不会自己结束)
+        supervisor and supervisor.stop()
+        # 合并各进程的追踪文件(开启 追踪 时)
+        merge_traces()
+        # 汇总各进程的性能分析结果
+        if profile_options.enabled:
+            merge_profiles(profile_options.directory)
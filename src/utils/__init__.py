@@ -1,5 +1,34 @@
-from .game import Game
-from .hwnd import Hwnd
-from .util import Util
+import importlib
 
-__all__ = ["Game", "Hwnd", "Util"]
+# 按需导入: 工作进程只加载用到的模块(比如不需要 pygetwindow、psutil、socket 服务)
+_exports = {
+    "Game": ".game",
+    "Hwnd": ".hwnd",
+    "Util": ".util",
+    "Supervisor": ".supervisor",
+    "Heartbeat": ".supervisor",
+    "Coordinator": ".cluster",
+    "Agent": ".cluster",
+    "Scheduler": ".scheduler",
+    "Chore": ".scheduler",
+}
+
+__all__ = [
+    "Game",
+    "Hwnd",
+    "Util",
+    "Supervisor",
+    "Heartbeat",
+    "Coordinator",
+    "Agent",
+    "Scheduler",
+    "Chore",
+]
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
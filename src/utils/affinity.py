@@ -0,0 +1,224 @@
+"""
+cpu 亲和性和优先级: 每个账号的客户端和 CefSharp 渲染进程绑定到各自的核心, 我们自己的工作进程放在保留核心上
+账号空闲(长时间等待、已完成)时降低优先级, 时间要求高的步骤(urgent)提高优先级
+linux 上没有权限时 nice 只能调大, 降下去的进程升不回来: 第一次升不回来时报告, 之后不再降低优先级
+只依赖 psutil, 可以用普通进程在 linux 上测试(在 src 下: python -m utils.affinity)
+"""
+import sys
+from typing import Dict, List
+
+import psutil
+
+IDLE = "idle"
+NORMAL = "normal"
+CRITICAL = "critical"
+
+if sys.platform == "win32":
+    PRIORITIES = {
+        IDLE: psutil.BELOW_NORMAL_PRIORITY_CLASS,
+        NORMAL: psutil.NORMAL_PRIORITY_CLASS,
+        CRITICAL: psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+    }
+else:
+    # nice 值, 提高优先级(负数)需要权限, 没有权限时退回 0
+    PRIORITIES = {IDLE: 10, NORMAL: 0, CRITICAL: -5}
+
+# 多个状态同时存在时取优先级高的
+_ORDER = [IDLE, NORMAL, CRITICAL]
+
+RENDERER = "CefSharp.BrowserSubprocess.exe"
+
+
+def client_pid(pid: int) -> int:
+    """窗口所属进程可能是渲染进程，往上找到客户端进程"""
+    try:
+        proc = psutil.Process(pid)
+        while proc.name() == RENDERER and proc.parent() is not None:
+            proc = proc.parent()
+        return proc.pid
+    except psutil.Error:
+        return pid
+
+
+def split_cores(cores: List[int], groups: int, reserved: int = 1) -> tuple:
+    """把核心分成 保留核心 + 每组一份(不重叠), 核心不够时各组轮流共用
+
+    :param cores: 可用核心
+    :param groups: 组数(账号数)
+    :param reserved: 留给工作进程的核心数
+    :return: (保留核心, [每组的核心])
+    """
+    reserved = min(reserved, max(0, len(cores) - 1))
+    own, rest = cores[:reserved], cores[reserved:]
+    if groups <= 0:
+        return own, []
+    if len(rest) >= groups:
+        size = len(rest) // groups
+        return own, [rest[i * size : (i + 1) * size] for i in range(groups)]
+    return own, [[rest[i % len(rest)]] for i in range(groups)]
+
+
+class AffinityManager:
+    """按账号管理客户端和渲染进程的核心与优先级"""
+
+    def __init__(self, accounts: Dict[str, int], reserved: int = 1):
+        """
+        :param accounts: qq -> 客户端进程号(窗口所属进程)
+        :param reserved: 留给工作进程的核心数
+        """
+        self.accounts = {qq: client_pid(pid) for qq, pid in accounts.items()}
+        self.reserved = reserved
+        self.states: Dict[str, str] = {}
+        self.cores, self.own_cores = {}, []
+        self._applied: Dict[int, str] = {}  # pid -> 已设置的状态
+        self.denied: Dict[int, str] = {}  # pid -> 没有权限设置的状态
+        self.lower = True  # 是否降低空闲账号的优先级(没有权限升回来时关闭)
+
+    @staticmethod
+    def processes(pid: int) -> List[psutil.Process]:
+        """客户端进程及其全部子进程(渲染进程会重启，每次重新查)"""
+        try:
+            root = psutil.Process(pid)
+            return [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    def pin(self, workers: List[int] = ()):
+        """绑定核心: 每个客户端一份不重叠的核心, 工作进程放到保留核心
+
+        :param workers: 工作进程号
+        """
+        try:
+            available = sorted(psutil.Process().cpu_affinity())
+        except (AttributeError, psutil.Error):
+            print("affinity | 当前系统不支持设置 cpu 亲和性")
+            return
+
+        # 同一个客户端进程的账号共用一份核心
+        roots = sorted(set(self.accounts.values()))
+        self.own_cores, groups = split_cores(available, len(roots), self.reserved)
+        by_root = dict(zip(roots, groups))
+        self.cores = {qq: by_root[pid] for qq, pid in self.accounts.items()}
+
+        for pid, cores in by_root.items():
+            self._set_affinity(self.processes(pid), cores)
+        self.place(workers)
+
+    def place(self, workers: List[int]):
+        """工作进程放到保留核心(重启的进程也要调用)
+
+        :param workers: 工作进程号
+        """
+        if not self.own_cores:
+            return
+        processes = []
+        for pid in workers:
+            try:
+                processes.append(psutil.Process(pid))
+            except psutil.Error:
+                pass
+        self._set_affinity(processes, self.own_cores)
+
+    @staticmethod
+    def _set_affinity(processes: List[psutil.Process], cores: List[int]):
+        for proc in processes:
+            try:
+                proc.cpu_affinity(cores)
+            except psutil.Error as e:
+                print(f"affinity | pid:{proc.pid} | 设置核心失败: {e}")
+
+    def update(self, states: Dict[str, str]) -> Dict[int, str]:
+        """按账号状态设置优先级，状态没变的进程不重复设置
+
+        :param states: qq -> idle | normal | critical
+        :return: 本次修改的 进程号 -> 状态
+        """
+        self.states.update(states)
+        wanted: Dict[int, str] = {}
+        for qq, pid in self.accounts.items():
+            state = self.states.get(qq, NORMAL)
+            if state == IDLE and not self.lower:
+                state = NORMAL
+            old = wanted.get(pid, IDLE)
+            wanted[pid] = max(old, state, key=_ORDER.index)
+
+        changed = {}
+        for root, state in wanted.items():
+            for proc in self.processes(root):
+                if self._applied.get(proc.pid) == state:
+                    continue
+                if self._set_priority(proc, state):
+                    self._applied[proc.pid] = state
+                    changed[proc.pid] = state
+        return changed
+
+    def _set_priority(self, proc: psutil.Process, state: str) -> bool:
+        try:
+            proc.nice(PRIORITIES[state])
+            self.denied.pop(proc.pid, None)
+            return True
+        except psutil.AccessDenied:
+            if state == CRITICAL:
+                try:
+                    proc.nice(PRIORITIES[NORMAL])
+                    return True
+                except psutil.AccessDenied:
+                    state = NORMAL
+                except psutil.Error:
+                    return False
+            self._deny(proc, state)
+        except psutil.Error:
+            pass
+        return False
+
+    def _deny(self, proc: psutil.Process, state: str):
+        """没有权限提高优先级: 每个进程报告一次, 不再降低其它账号的优先级"""
+        if state != IDLE:
+            self.lower = False
+        if self.denied.get(proc.pid) == state:
+            return
+        self.denied[proc.pid] = state
+        try:
+            current = proc.nice()
+        except psutil.Error:
+            current = "?"
+        print(f"affinity | pid:{proc.pid} | 没有权限设置优先级({state}), 保持: {current}")
+
+    def report(self) -> str:
+        lines = [f"affinity | 工作进程核心: {self.own_cores or '-'}"]
+        for qq, pid in self.accounts.items():
+            lines.append(
+                f"  {qq} | pid:{pid} | 核心: {self.cores.get(qq, '-')} | {self.states.get(qq, NORMAL)}"
+            )
+        if self.denied:
+            pids = ", ".join(f"{pid}({state})" for pid, state in self.denied.items())
+            lines.append(f"  没有权限设置优先级: {pids}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # 用 sleep 进程模拟 3 个客户端(各带 2 个子进程)
+    import subprocess
+    import time
+
+    child = "import time; time.sleep(30)"
+    client = (
+        "import subprocess, sys, time;"
+        f"[subprocess.Popen([sys.executable, '-c', {child!r}]) for _ in range(2)];"
+        "time.sleep(30)"
+    )
+    clients = [subprocess.Popen([sys.executable, "-c", client]) for _ in range(3)]
+    time.sleep(1)
+    manager = AffinityManager({f"qq{i}": c.pid for i, c in enumerate(clients)})
+    manager.pin([psutil.Process().pid])
+    manager.update({"qq0": IDLE, "qq1": NORMAL, "qq2": CRITICAL})
+    print(manager.report())
+    for qq, pid in manager.accounts.items():
+        for proc in manager.processes(pid):
+            print(
+                f"  {qq} | pid:{proc.pid} | nice: {proc.nice()} | 核心: {proc.cpu_affinity()}"
+            )
+    for c in clients:
+        for child in psutil.Process(c.pid).children(recursive=True):
+            child.kill()
+        c.kill()
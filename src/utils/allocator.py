@@ -0,0 +1,307 @@
+"""
+聚义目标分配: 多个账号同时聚义时每个账号分到不同的格子, 不再全部打配置里的同一个位置(互相冲突、浪费一轮)
+    格子打满(每格次数)或发现打不了时换一个格子
+    开始时间按实测的每轮耗时错开(同一个格子的账号错开 1/人数 轮), 不再是固定的 order_num 秒
+    换到别人在打的格子时, 等到和对方错开半轮(按人数)再打
+状态放在共享内存里, 主进程创建后传给各工作进程(和 governor 一样)
+
+模拟(在 src 下, 虚拟时间跑真实的 Zhanzheng.juyi, 比较 不分配 和 分配 的冲突次数):
+    python -m utils.allocator
+"""
+import ctypes
+import multiprocessing
+import sqlite3
+from multiprocessing.sharedctypes import RawArray
+from typing import List, Optional
+
+
+class Cell(ctypes.Structure):
+    """一个聚义格子"""
+
+    _fields_ = [
+        ("holders", ctypes.c_int),  # 当前分到该格子的账号数
+        ("attacks", ctypes.c_long),  # 累计攻打次数
+        ("exhausted", ctypes.c_int),  # 已打满/打不了, 不再分配
+        ("last", ctypes.c_double),  # 最后一次攻打的时间
+    ]
+
+
+class Account(ctypes.Structure):
+    """一个账号的分配状态"""
+
+    _fields_ = [
+        ("cell", ctypes.c_int),  # 当前格子序号, -1 表示没有
+        ("cycle", ctypes.c_double),  # 每轮耗时(秒, 指数平均)
+        ("cycles", ctypes.c_long),  # 已记录的轮数
+        ("moves", ctypes.c_long),  # 换格子次数
+    ]
+
+
+class TargetAllocator:
+    """跨进程的聚义格子分配"""
+
+    def __init__(
+        self,
+        qqs: List[str],
+        rows: int = 3,
+        cols: int = 7,
+        capacity: int = 0,
+        preferred: list = None,
+        cycle: float = 11,
+    ):
+        """
+        :param qqs: 参与的账号(顺序即错开顺序)
+        :param rows: 行数
+        :param cols: 每行列数
+        :param capacity: 每个格子最多打多少次(全部账号合计), 0 不限
+        :param preferred: 优先分配的格子, 比如配置里的 position [2, 2], 其它格子按离它的距离排序
+        :param cycle: 还没有实测数据时的每轮耗时(秒)
+        """
+        self.qqs = list(qqs)
+        self.rows, self.cols = rows, cols
+        self.capacity = capacity
+        self.default_cycle = cycle
+
+        slots = [(r, c) for r in range(1, rows + 1) for c in range(1, cols + 1)]
+        if preferred:
+            pr, pc = preferred
+            slots.sort(key=lambda s: (abs(s[0] - pr) + abs(s[1] - pc), s))
+        # 分配顺序(格子序号)
+        self.order = [(r - 1) * cols + (c - 1) for r, c in slots]
+
+        self.cells = RawArray(Cell, rows * cols)
+        self.accounts = RawArray(Account, len(self.qqs))
+        self.lock = multiprocessing.Lock()
+        # 先全部分好, 错开时间要知道每个格子有几个账号
+        for account in self.accounts:
+            account.cell = -1
+            self._move(account)
+            account.moves = 0
+
+    @classmethod
+    def from_config(cls, qqs: List[str], option: dict, ledger: str = None):
+        """按配置里的 战争.聚义 创建
+
+        :param qqs: 参与的账号
+        :param option: 比如: {"position": [2, 2], "分配": {"开启": true, "每格次数": 0, "每轮耗时": 11}}
+        :param ledger: 运行记录数据库, 有记录时用历史的平均每轮耗时
+        """
+        from coords.juyi import 聚义列数
+
+        config = option.get("分配", {})
+        cycle = config.get("每轮耗时", 11)
+        if ledger:
+            cycle = measured_cycle(ledger) or cycle
+        return cls(
+            qqs,
+            3,
+            聚义列数,
+            config.get("每格次数", 0),
+            option.get("position"),
+            cycle,
+        )
+
+    def _index(self, qq: str) -> int:
+        return self.qqs.index(qq)
+
+    def _slot(self, cell: int) -> tuple:
+        return cell // self.cols + 1, cell % self.cols + 1
+
+    def _pick(self) -> int:
+        """没打满的格子里分到人数最少的(人数相同按优先顺序), 没有返回 -1"""
+        best = -1
+        for cell in self.order:
+            if self.cells[cell].exhausted:
+                continue
+            if best < 0 or self.cells[cell].holders < self.cells[best].holders:
+                best = cell
+        return best
+
+    def _move(self, account: Account) -> int:
+        """离开当前格子, 分配新格子(持有 lock 时调用)"""
+        if account.cell >= 0:
+            self.cells[account.cell].holders -= 1
+            account.moves += 1
+        account.cell = self._pick()
+        if account.cell >= 0:
+            self.cells[account.cell].holders += 1
+        return account.cell
+
+    def allocate(self, qq: str) -> Optional[tuple]:
+        """账号当前的格子(没有或已打满时分配新的)
+
+        :return: (行, 列), 全部格子都打满时返回 None
+        """
+        with self.lock:
+            account = self.accounts[self._index(qq)]
+            cell = account.cell
+            if cell < 0 or self.cells[cell].exhausted:
+                cell = self._move(account)
+        return self._slot(cell) if cell >= 0 else None
+
+    def attacked(self, qq: str, now: float) -> Optional[tuple]:
+        """攻打了一次, 格子打满时换格子
+
+        :param now: 攻打的时间
+        :return: 下一轮打的格子, 全部打满时返回 None
+        """
+        with self.lock:
+            account = self.accounts[self._index(qq)]
+            if account.cell >= 0:
+                cell = self.cells[account.cell]
+                cell.attacks += 1
+                cell.last = now
+                if self.capacity and cell.attacks >= self.capacity:
+                    cell.exhausted = 1
+        return self.allocate(qq)
+
+    def realign(self, qq: str, now: float) -> float:
+        """换格子后需要多等的秒数: 和格子里其它账号的攻打时间错开 1/人数 轮
+
+        :param now: 当前时间(刚打完上一个格子)
+        """
+        with self.lock:
+            account = self.accounts[self._index(qq)]
+            if account.cell < 0:
+                return 0.0
+            cell = self.cells[account.cell]
+            if cell.holders < 2 or cell.last == 0:
+                return 0.0
+            cycle = self.cycle()
+            return (cell.last - now + cycle / cell.holders) % cycle
+
+    def exhausted(self, qq: str) -> Optional[tuple]:
+        """当前格子打不了(没有目标、次数用完), 换一个
+
+        :return: 新的格子, 全部打满时返回 None
+        """
+        with self.lock:
+            account = self.accounts[self._index(qq)]
+            if account.cell >= 0:
+                self.cells[account.cell].exhausted = 1
+        return self.allocate(qq)
+
+    def release(self, qq: str):
+        """账号结束聚义, 格子让给别人"""
+        with self.lock:
+            account = self.accounts[self._index(qq)]
+            if account.cell >= 0:
+                self.cells[account.cell].holders -= 1
+                account.cell = -1
+
+    def record_cycle(self, qq: str, seconds: float):
+        """记录一轮的耗时(指数平均)"""
+        with self.lock:
+            account = self.accounts[self._index(qq)]
+            if account.cycles == 0:
+                account.cycle = seconds
+            else:
+                account.cycle = account.cycle * 0.8 + seconds * 0.2
+            account.cycles += 1
+
+    def cycle(self) -> float:
+        """全部账号的平均每轮耗时, 还没有数据时用默认值"""
+        measured = [a.cycle for a in self.accounts if a.cycles]
+        return sum(measured) / len(measured) if measured else self.default_cycle
+
+    def stagger(self, qq: str) -> float:
+        """开始前等待的秒数: 同一个格子的账号按每轮耗时均匀错开, 不同格子之间再错开一点分散点击"""
+        index = self._index(qq)
+        cell = self.accounts[index].cell
+        if cell < 0:
+            return index * self.cycle() / max(1, len(self.qqs))
+        sharing = [i for i, a in enumerate(self.accounts) if a.cell == cell]
+        rank = sharing.index(index) if index in sharing else 0
+        spread = self.order.index(cell) / len(self.order)
+        return (rank + spread) * self.cycle() / max(1, len(sharing))
+
+    def report(self) -> str:
+        used = [
+            f"{self._slot(i)}:{cell.attacks}{'(满)' if cell.exhausted else ''}"
+            for i, cell in enumerate(self.cells)
+            if cell.attacks or cell.exhausted
+        ]
+        moves = sum(a.moves for a in self.accounts)
+        return " | ".join(
+            [
+                f"聚义分配: {len(self.qqs)} 个账号",
+                f"每轮: {round(self.cycle(), 1)}s",
+                f"换格子: {moves} 次",
+                f"格子: {' '.join(used) or '-'}",
+            ]
+        )
+
+
+def measured_cycle(path: str, routine: str = "Zhanzheng.juyi") -> Optional[float]:
+    """运行记录里的平均每轮耗时(见 utils/ledger.py)"""
+    from .ledger import cycle_times
+
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        rows = [r for r in cycle_times(conn) if r["routine"] == routine and r["cycle"]]
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    if not rows:
+        return None
+    return sum(r["cycle"] for r in rows) / len(rows)
+
+
+def _collisions(attacks: dict, battle: float) -> int:
+    """不同账号在 battle 秒内攻打同一个格子的次数
+
+    :param attacks: qq -> [(时间, 格子)]
+    """
+    attacks = sorted((t, name, qq) for qq, times in attacks.items() for t, name in times)
+    count = 0
+    last = {}  # 格子 -> (时间, qq)
+    for t, name, qq in attacks:
+        previous = last.get(name)
+        if previous and previous[1] != qq and t - previous[0] < battle:
+            count += 1
+        last[name] = (t, qq)
+    return count
+
+
+def _simulate(accounts: int, allocate: bool, capacity: int = 0):
+    """虚拟时间跑 Zhanzheng.juyi, 记录每次攻打的格子和时间"""
+    from .simulate import simulate
+
+    qqs = [f"sim{i}" for i in range(accounts)]
+    option = {"position": [2, 2], "time": 30, "分配": {"每格次数": capacity}}
+    targets = TargetAllocator.from_config(qqs, option) if allocate else None
+    attacks = {}
+
+    def mount(qq, util):
+        util.targets = targets
+        attacks[qq] = []
+        click = util.click
+
+        def record(coord):
+            if coord[0].startswith("聚义"):
+                attacks[qq].append((util.clock.time(), coord[0]))
+            click(coord)
+
+        util.click = record
+
+    result = simulate(
+        "Zhanzheng.juyi",
+        [{"聚义": option}] * accounts,
+        lambda index: [index],  # 和 do_task 一样传 order_num
+        mount=mount,
+    )
+    return result, targets, attacks
+
+
+if __name__ == "__main__":
+    for allocate in (False, True):
+        result, targets, attacks = _simulate(30, allocate, capacity=60)
+        print(result.report().split("\n")[0])
+        name = "分配格子" if allocate else "同一位置"
+        print(f"  {name} | 4秒内同格冲突: {_collisions(attacks, 4)} 次")
+        if targets:
+            print(f"  {targets.report()}")
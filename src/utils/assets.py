@@ -0,0 +1,279 @@
+"""
+模板资源包: 把 src/assets 下的 png 模板解码后打包成一个文件, 各进程用 mmap 直接映射成 numpy 数组
+不用重复解码, 多个进程共用同一份物理内存(系统页缓存)
+
+文件格式:
+    头部 16 字节: b"QSAP" | 版本(u32) | 索引位置(u64)
+    数据: 每个模板的原始像素, 按 64 字节对齐
+    索引: json, {"popups/升级.png": {"offset": 64, "shape": [h, w, 3], "dtype": "uint8", "crc32": 123,
+                  "source": {"size": 2048, "mtime": 1700000000000000000, "crc32": 456}}}
+    source 是打包时 png 文件的大小、修改时间(ns)、crc32, png 改过后 vision.load_template 改为读 png
+
+文件名带版本号(assets.<毫秒时间戳>.pack), 读取最新的一个
+    windows 上被工作进程 mmap 的文件不能替换或删除, 重新打包写新文件, 旧文件在下次打包时删除(删不掉的跳过)
+
+用法:
+    python utils/assets.py build    打包
+    python utils/assets.py verify   校验
+    python utils/assets.py bench    对比 png 解码和 mmap 的加载耗时、内存
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+MAGIC = b"QSAP"
+VERSION = 2
+HEADER = struct.Struct("<4sIQ")
+ALIGN = 64
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+PACK_PREFIX, PACK_SUFFIX = "assets.", ".pack"
+
+
+def _png_files(assets_dir: str):
+    """资源目录下所有 png 的相对路径(用 / 分隔)"""
+    for root, _, files in os.walk(assets_dir):
+        for name in sorted(files):
+            if name.lower().endswith(".png"):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, assets_dir).replace(os.sep, "/"), path
+
+
+def _decode(path: str) -> np.ndarray:
+    import cv2
+
+    # cv2.imread 不支持中文路径
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"图片解码失败: {path}")
+    return image
+
+
+def _version(name: str) -> int:
+    """资源包文件名里的版本号, 不是资源包返回 -1"""
+    version = name[len(PACK_PREFIX) : -len(PACK_SUFFIX)]
+    if name.startswith(PACK_PREFIX) and name.endswith(PACK_SUFFIX) and version.isdigit():
+        return int(version)
+    return -1
+
+
+def _packs(assets_dir: str) -> list:
+    """资源目录下的资源包, 按版本从旧到新"""
+    names = [name for name in os.listdir(assets_dir) if _version(name) >= 0]
+    return [os.path.join(assets_dir, name) for name in sorted(names, key=_version)]
+
+
+def latest_pack(assets_dir: str = ASSETS_DIR):
+    """最新的资源包, 没有打包时返回 None"""
+    packs = _packs(assets_dir)
+    return packs[-1] if packs else None
+
+
+def _source(path: str) -> dict:
+    """png 文件的大小、修改时间、crc32"""
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        crc = zlib.crc32(f.read())
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "crc32": crc}
+
+
+def build(assets_dir: str = ASSETS_DIR, output: str = None) -> dict:
+    """打包模板, 写成新版本的资源包, 删除能删除的旧资源包
+
+    :param assets_dir: 资源目录
+    :param output: 资源包文件, 默认 assets_dir/assets.<毫秒时间戳>.pack
+    :return: 索引
+    """
+    old = _packs(assets_dir)
+    if output is None:
+        newest = max((_version(os.path.basename(p)) for p in old), default=-1)
+        version = max(int(time.time() * 1000), newest + 1)
+        output = os.path.join(assets_dir, f"{PACK_PREFIX}{version}{PACK_SUFFIX}")
+    index = {}
+    tmp = output + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0))
+        for name, path in _png_files(assets_dir):
+            image = np.ascontiguousarray(_decode(path))
+            f.write(b"\0" * (-f.tell() % ALIGN))
+            data = image.tobytes()
+            index[name] = {
+                "offset": f.tell(),
+                "shape": list(image.shape),
+                "dtype": str(image.dtype),
+                "crc32": zlib.crc32(data),
+                "source": _source(path),
+            }
+            f.write(data)
+
+        index_offset = f.tell()
+        f.write(json.dumps(index, ensure_ascii=False).encode("utf-8"))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, index_offset))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # 写完校验一遍再替换，避免留下损坏的资源包
+    pack = AssetPack(tmp)
+    try:
+        pack.verify()
+    finally:
+        pack.close()
+    os.replace(tmp, output)
+    print(
+        f"资源包已生成: {output} | 模板数: {len(index)} | 大小: {os.path.getsize(output)} 字节"
+    )
+    for path in old:
+        if path == output:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            # windows: 还有进程在用, 下次打包再删
+            print(f"旧资源包正在使用, 暂不删除: {path}")
+    return index
+
+
+class AssetPack:
+    """只读资源包，get 返回直接指向 mmap 的 numpy 数组(不复制)"""
+
+    def __init__(self, path: str):
+        """
+        :param path: 资源包文件
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"资源包格式不正确: {path}")
+        if not HEADER.size <= index_offset <= len(self._mmap):
+            raise ValueError(f"资源包索引位置不正确: {path}")
+        self.index = json.loads(self._mmap[index_offset:].decode("utf-8"))
+
+        for name, item in self.index.items():
+            end = item["offset"] + self._nbytes(item)
+            if end > index_offset:
+                raise ValueError(f"资源包数据越界: {name}")
+
+    @staticmethod
+    def _nbytes(item: dict) -> int:
+        return int(np.prod(item["shape"])) * np.dtype(item["dtype"]).itemsize
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def get(self, name: str):
+        """模板数组(只读)
+
+        :param name: 相对 assets 的路径, 比如: popups/升级.png
+        :return: numpy 数组, 不存在返回 None
+        """
+        item = self.index.get(name)
+        if item is None:
+            return None
+        array = np.frombuffer(
+            self._mmap,
+            dtype=item["dtype"],
+            count=int(np.prod(item["shape"])),
+            offset=item["offset"],
+        )
+        return array.reshape(item["shape"])
+
+    def fresh(self, name: str, path: str) -> bool:
+        """模板图片和打包时是否一样(修改时间变了但内容没变也算一样)
+
+        :param name: 相对 assets 的路径
+        :param path: png 文件, 不存在时算一样(只有资源包里有)
+        """
+        source = self.index[name]["source"]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        if stat.st_size != source["size"]:
+            return False
+        if stat.st_mtime_ns == source["mtime"]:
+            return True
+        return _source(path)["crc32"] == source["crc32"]
+
+    def verify(self):
+        """校验每个模板的 crc32"""
+        for name, item in self.index.items():
+            start = item["offset"]
+            data = self._mmap[start : start + self._nbytes(item)]
+            if zlib.crc32(data) != item["crc32"]:
+                raise ValueError(f"资源包校验失败: {name}")
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+_pack = None
+
+
+def get_pack():
+    """默认资源包(同一进程共用), 没有打包时返回 None"""
+    global _pack
+    path = latest_pack() if _pack is None else None
+    if path:
+        try:
+            _pack = AssetPack(path)
+        except ValueError as e:
+            print(f"资源包不可用, 改为读取 png: {e}")
+            _pack = False
+    return _pack or None
+
+
+def bench(assets_dir: str = ASSETS_DIR, pack_path: str = None):
+    """对比逐个解码 png 和 mmap 资源包的加载耗时、内存"""
+    import psutil
+
+    pack_path = pack_path or latest_pack(assets_dir)
+
+    process = psutil.Process()
+
+    def uss():
+        return process.memory_full_info().uss / 1024 / 1024
+
+    before = uss()
+    start = time.perf_counter()
+    decoded = [_decode(path) for _, path in _png_files(assets_dir)]
+    png_time = time.perf_counter() - start
+    png_memory = uss() - before
+
+    before = uss()
+    start = time.perf_counter()
+    pack = AssetPack(pack_path)
+    views = [pack.get(name) for name in pack.index]
+    # 访问一遍，让页面真正映射进来
+    checksum = sum(int(v.sum()) for v in views)
+    pack_time = time.perf_counter() - start
+    pack_memory = uss() - before
+
+    print(f"模板数: {len(decoded)} / {len(views)} | checksum: {checksum}")
+    print(
+        f"png 解码: {round(png_time * 1000, 2)}ms | 私有内存(USS): +{round(png_memory, 2)}MB"
+    )
+    print(
+        f"mmap 资源包: {round(pack_time * 1000, 2)}ms | 私有内存(USS): +{round(pack_memory, 2)}MB"
+    )
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command == "build":
+        build()
+    elif command == "verify":
+        AssetPack(latest_pack()).verify()
+        print("资源包校验通过")
+    elif command == "bench":
+        bench()
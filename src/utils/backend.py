@@ -0,0 +1,520 @@
+"""
+输入、截图、窗口查找的后端
+    win32: SendMessage 后台点击, PrintWindow 截图(windows)
+    x11: XSendEvent / XTest 点击, XShm 截图(linux + Xvfb, 客户端跑在 wine 里)
+
+Util、Hwnd 只调用这里的接口, 换平台不用改功能代码
+x11 可以用普通的 X 测试窗口验证(在 src 下, 需要 DISPLAY, 比如 Xvfb :99):
+    python -m utils.backend demo
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, List, Optional
+
+# numpy 只在截图时导入(不做图像识别的工作进程不加载)
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class Backend(ABC):
+    """后端接口: 输入和截图必须实现, 剪贴板、查找窗口、窗口进程可选(不支持时返回空值)"""
+
+    name = ""
+
+    @abstractmethod
+    def press(self, hwnd: int, x: int, y: int):
+        """鼠标左键按下(窗口客户区坐标)"""
+
+    @abstractmethod
+    def release(self, hwnd: int, x: int, y: int):
+        """鼠标左键抬起"""
+
+    @abstractmethod
+    def key(self, hwnd: int, char: str, down: bool):
+        """按键按下/抬起(按字符对应的键)"""
+
+    @abstractmethod
+    def send_char(self, hwnd: int, char: str):
+        """输入一个字符"""
+
+    @abstractmethod
+    def capture(self, hwnd: int) -> "np.ndarray":
+        """窗口客户区截图, BGR"""
+
+    def clipboard_text(self) -> str:
+        """剪贴板文本"""
+        return ""
+
+    def find_windows(
+        self, parent_title: str, child_title: str = None
+    ) -> Optional[List[int]]:
+        """按标题查找窗口
+
+        :param parent_title: 顶层窗口标题
+        :param child_title: 子窗口标题, 找不到子窗口时返回顶层窗口
+        :return: 不支持查找窗口时返回 None(和找不到窗口的空列表区分)
+        """
+        return None
+
+    def window_pid(self, hwnd: int) -> Optional[int]:
+        """窗口所属进程号, 不支持或窗口不存在时返回 None"""
+        return None
+
+
+class Win32Backend(Backend):
+    """windows: SendMessage 后台消息, PrintWindow 截图"""
+
+    name = "win32"
+
+    def __init__(self):
+        import win32api
+        import win32con
+        import win32gui
+        import win32ui
+
+        self.api, self.con, self.gui, self.ui = win32api, win32con, win32gui, win32ui
+
+    def press(self, hwnd, x, y):
+        position = self.api.MAKELONG(x, y)
+        self.api.SendMessage(hwnd, self.con.WM_LBUTTONDOWN, 0, position)
+
+    def release(self, hwnd, x, y):
+        position = self.api.MAKELONG(x, y)
+        self.api.SendMessage(hwnd, self.con.WM_LBUTTONUP, 0, position)
+
+    def key(self, hwnd, char, down):
+        vk_code = self.api.VkKeyScan(char) & 0xFF  # 只取低8位（虚拟键码）
+        message = self.con.WM_KEYDOWN if down else self.con.WM_KEYUP
+        self.api.SendMessage(hwnd, message, vk_code, 0)
+
+    def send_char(self, hwnd, char):
+        self.api.SendMessage(hwnd, self.con.WM_CHAR, ord(char), 0)
+
+    def capture(self, hwnd):
+        gui, ui = self.gui, self.ui
+        left, top, right, bottom = gui.GetClientRect(hwnd)
+        width, height = right - left, bottom - top
+
+        hwnd_dc = gui.GetWindowDC(hwnd)
+        mfc_dc = ui.CreateDCFromHandle(hwnd_dc)
+        save_dc = mfc_dc.CreateCompatibleDC()
+        bitmap = ui.CreateBitmap()
+        try:
+            bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
+            save_dc.SelectObject(bitmap)
+            # PW_CLIENTONLY | PW_RENDERFULLCONTENT, 浏览器内核窗口需要后者
+            ctypes.windll.user32.PrintWindow(hwnd, save_dc.GetSafeHdc(), 3)
+            bits = bitmap.GetBitmapBits(True)
+            import numpy as np
+
+            frame = np.frombuffer(bits, dtype=np.uint8).reshape(height, width, 4)
+            return frame[:, :, :3]
+        finally:
+            gui.DeleteObject(bitmap.GetHandle())
+            save_dc.DeleteDC()
+            mfc_dc.DeleteDC()
+            gui.ReleaseDC(hwnd, hwnd_dc)
+
+    def clipboard_text(self):
+        import win32clipboard
+
+        text = ""
+        for _ in range(5):
+            try:
+                win32clipboard.OpenClipboard()
+                try:
+                    text = win32clipboard.GetClipboardData(self.con.CF_UNICODETEXT)
+                except Exception:
+                    text = ""
+                win32clipboard.CloseClipboard()
+                break
+            except Exception:
+                time.sleep(0.1)
+        return str(text).strip()
+
+    def find_windows(self, parent_title, child_title=None):
+        from .hwnd import Hwnd
+
+        if child_title:
+            return Hwnd.find_all_hwndByTitle_p_child(parent_title, child_title)
+        result = []
+
+        def enum_parent(hwnd, _):
+            if self.gui.GetWindowText(hwnd) == parent_title:
+                result.append(hwnd)
+            return True
+
+        self.gui.EnumWindows(enum_parent, None)
+        return result
+
+    def window_pid(self, hwnd):
+        import win32process
+
+        return win32process.GetWindowThreadProcessId(hwnd)[1]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # 只用到前面这些字段
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+class XShmCapture:
+    """MIT-SHM 截图: X server 直接写到共享内存，不经过 socket 传像素，每个窗口尺寸一块共享内存"""
+
+    IPC_PRIVATE, IPC_CREAT, IPC_RMID = 0, 0o1000, 0
+    ZPixmap = 2
+
+    def __init__(self, display_name: str = None):
+        names = [ctypes.util.find_library(lib) for lib in ("X11", "Xext")]
+        if not all(names):
+            raise OSError("未找到 libX11/libXext")
+        x11, xext = ctypes.CDLL(names[0]), ctypes.CDLL(names[1])
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+            ctypes.c_uint,
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.POINTER(_XShmSegmentInfo),
+            ctypes.c_uint,
+            ctypes.c_uint,
+        ]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_ulong,
+            ctypes.POINTER(_XImage),
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_ulong,
+        ]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+        self.x11, self.xext, self.libc = x11, xext, libc
+
+        name = display_name.encode() if display_name else None
+        self.display = x11.XOpenDisplay(name)
+        if not self.display:
+            raise OSError(f"无法连接 X display: {display_name or os.environ.get('DISPLAY')}")
+        if not xext.XShmQueryExtension(self.display):
+            raise OSError("X server 不支持 MIT-SHM")
+        screen = x11.XDefaultScreen(self.display)
+        self.visual = x11.XDefaultVisual(self.display, screen)
+        self.depth = x11.XDefaultDepth(self.display, screen)
+        self.images = {}  # (宽, 高) -> (XImage, 共享内存信息)
+
+    def _image(self, width: int, height: int):
+        key = (width, height)
+        if key in self.images:
+            return self.images[key]
+
+        info = _XShmSegmentInfo()
+        image = self.xext.XShmCreateImage(
+            self.display, self.visual, self.depth, self.ZPixmap, None, info, width, height
+        )
+        size = image.contents.bytes_per_line * height
+        info.shmid = self.libc.shmget(self.IPC_PRIVATE, size, self.IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget 失败")
+        info.shmaddr = self.libc.shmat(info.shmid, None, 0)
+        image.contents.data = info.shmaddr
+        info.readOnly = 0
+        self.xext.XShmAttach(self.display, info)
+        self.x11.XSync(self.display, 0)
+        # 两边都连上后标记删除, 进程退出时系统自动回收
+        self.libc.shmctl(info.shmid, self.IPC_RMID, None)
+
+        self.images[key] = (image, info)
+        return self.images[key]
+
+    def capture(self, window: int, width: int, height: int) -> "np.ndarray":
+        import numpy as np
+
+        image, info = self._image(width, height)
+        if not self.xext.XShmGetImage(self.display, window, image, 0, 0, 0xFFFFFFFF):
+            raise OSError(f"XShmGetImage 失败: {window}")
+        stride = image.contents.bytes_per_line
+        buffer = (ctypes.c_ubyte * (stride * height)).from_address(info.shmaddr)
+        frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, stride // 4, 4)
+        # 32位 ZPixmap(小端) 就是 BGRX, 复制出来，共享内存下次会被覆盖
+        return frame[:, :width, :3].copy()
+
+    def close(self):
+        for image, info in self.images.values():
+            self.xext.XShmDetach(self.display, info)
+            self.libc.shmdt(info.shmaddr)
+        self.images.clear()
+
+
+class X11Backend(Backend):
+    """linux(Xvfb + wine): XSendEvent 或 XTest 输入, XShm 截图(不支持时用 get_image)"""
+
+    name = "x11"
+
+    def __init__(self, display_name: str = None, xtest: bool = False, shm=True):
+        """
+        :param display_name: X display, 比如 ":99", 默认 DISPLAY 环境变量
+        :param xtest: 用 XTest 模拟真实输入(会移动指针, 窗口需要在最上层)
+                      默认 XSendEvent 发给指定窗口(相当于 SendMessage)
+        :param shm: 截图优先用 MIT-SHM
+        """
+        from Xlib import X, XK, display
+        from Xlib.protocol import event
+
+        self.X, self.XK, self.event = X, XK, event
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self.xtest = xtest
+        # python-xlib 的连接不是线程安全的, 多个账号线程共用要加锁
+        self.lock = threading.RLock()
+
+        self.shm = None
+        if shm:
+            try:
+                self.shm = XShmCapture(display_name)
+            except OSError as e:
+                print(f"x11 | 不使用 XShm 截图: {e}")
+
+    def _window(self, hwnd: int):
+        return self.display.create_resource_object("window", hwnd)
+
+    def _button(self, hwnd: int, x: int, y: int, down: bool):
+        X = self.X
+        with self.lock:
+            window = self._window(hwnd)
+            position = self.root.translate_coords(window, x, y)
+            if self.xtest:
+                from Xlib.ext import xtest
+
+                xtest.fake_input(
+                    self.display, X.MotionNotify, x=position.x, y=position.y
+                )
+                xtest.fake_input(self.display, X.ButtonPress if down else X.ButtonRelease, 1)
+            else:
+                cls = self.event.ButtonPress if down else self.event.ButtonRelease
+                event = cls(
+                    time=X.CurrentTime,
+                    root=self.root,
+                    window=window,
+                    same_screen=1,
+                    child=X.NONE,
+                    root_x=position.x,
+                    root_y=position.y,
+                    event_x=x,
+                    event_y=y,
+                    state=0 if down else X.Button1Mask,
+                    detail=1,
+                )
+                mask = X.ButtonPressMask if down else X.ButtonReleaseMask
+                window.send_event(event, event_mask=mask, propagate=True)
+            self.display.flush()
+
+    def press(self, hwnd, x, y):
+        self._button(hwnd, x, y, True)
+
+    def release(self, hwnd, x, y):
+        self._button(hwnd, x, y, False)
+
+    def key(self, hwnd, char, down):
+        X = self.X
+        with self.lock:
+            keysym = self.XK.string_to_keysym(char) or ord(char)
+            keycode = self.display.keysym_to_keycode(keysym)
+            if self.xtest:
+                from Xlib.ext import xtest
+
+                xtest.fake_input(self.display, X.KeyPress if down else X.KeyRelease, keycode)
+            else:
+                window = self._window(hwnd)
+                cls = self.event.KeyPress if down else self.event.KeyRelease
+                event = cls(
+                    time=X.CurrentTime,
+                    root=self.root,
+                    window=window,
+                    same_screen=1,
+                    child=X.NONE,
+                    root_x=0,
+                    root_y=0,
+                    event_x=0,
+                    event_y=0,
+                    state=0,
+                    detail=keycode,
+                )
+                mask = X.KeyPressMask if down else X.KeyReleaseMask
+                window.send_event(event, event_mask=mask, propagate=True)
+            self.display.flush()
+
+    def send_char(self, hwnd, char):
+        self.key(hwnd, char, True)
+        self.key(hwnd, char, False)
+
+    def capture(self, hwnd):
+        with self.lock:
+            window = self._window(hwnd)
+            geometry = window.get_geometry()
+            width, height = geometry.width, geometry.height
+            if self.shm:
+                return self.shm.capture(hwnd, width, height)
+            image = window.get_image(0, 0, width, height, self.X.ZPixmap, 0xFFFFFFFF)
+        import numpy as np
+
+        frame = np.frombuffer(image.data, dtype=np.uint8).reshape(height, width, 4)
+        return frame[:, :, :3].copy()
+
+    def _title(self, window) -> str:
+        try:
+            name = window.get_full_text_property(
+                self.display.get_atom("_NET_WM_NAME")
+            ) or window.get_wm_name()
+            return name or ""
+        except Exception:
+            return ""
+
+    def _walk(self, window):
+        try:
+            children = window.query_tree().children
+        except Exception:
+            return
+        for child in children:
+            yield child
+            yield from self._walk(child)
+
+    def find_windows(self, parent_title, child_title=None):
+        # wine 的子窗口一般不是单独的 X 窗口, 找不到子窗口时用顶层窗口
+        result = []
+        with self.lock:
+            for window in self._walk(self.root):
+                if self._title(window) != parent_title:
+                    continue
+                children = [
+                    c.id
+                    for c in self._walk(window)
+                    if child_title and self._title(c) == child_title
+                ]
+                result.extend(children or [window.id])
+        return result
+
+    def window_pid(self, hwnd):
+        with self.lock:
+            prop = self._window(hwnd).get_full_property(
+                self.display.get_atom("_NET_WM_PID"), self.X.AnyPropertyType
+            )
+        return int(prop.value[0]) if prop else None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend(config: dict = None) -> Backend:
+    """当前进程的后端(第一次调用时按配置创建)
+
+    :param config: 配置里的 "后端", 比如: {"类型": "x11", "显示": ":99", "XTest": false}
+        类型: auto(windows 用 win32, 其它用 x11) | win32 | x11
+    """
+    global _backend
+    if _backend is None:
+        config = config or {}
+        with _backend_lock:
+            if _backend is None:
+                kind = config.get("类型", "auto")
+                if kind == "auto":
+                    kind = "win32" if sys.platform == "win32" else "x11"
+                if kind == "win32":
+                    _backend = Win32Backend()
+                else:
+                    _backend = X11Backend(
+                        config.get("显示"),
+                        config.get("XTest", False),
+                        config.get("共享内存截图", True),
+                    )
+    return _backend
+
+
+def _demo():
+    """在当前 DISPLAY 上建一个测试窗口, 用后端查找、点击、截图, 点击后窗口变色"""
+    from Xlib import X, display
+
+    title = "backend-demo"
+    client = display.Display()
+    screen = client.screen()
+    window = screen.root.create_window(
+        0, 0, 320, 240, 0, screen.root_depth,
+        background_pixel=0x0000FF,
+        event_mask=X.ButtonPressMask | X.ButtonReleaseMask | X.ExposureMask,
+    )
+    window.set_wm_name(title)
+    window.map()
+    client.sync()
+    time.sleep(0.5)
+
+    backend = get_backend({"类型": "x11"})
+    found = backend.find_windows(title)
+    print(f"查找窗口: {found}")
+    before = backend.capture(found[0])
+
+    backend.press(found[0], 100, 100)
+    backend.release(found[0], 100, 100)
+    clicks = []
+    deadline = time.time() + 2
+    while time.time() < deadline and len(clicks) < 2:
+        while client.pending_events():
+            e = client.next_event()
+            if e.type in (X.ButtonPress, X.ButtonRelease):
+                clicks.append((e.type, e.event_x, e.event_y))
+                window.change_attributes(background_pixel=0x00FF00)
+                window.clear_area()
+                client.sync()
+        time.sleep(0.05)
+    time.sleep(0.2)
+    after = backend.capture(found[0])
+
+    print(f"收到点击: {clicks}")
+    print(f"截图: {before.shape} | 点击前 BGR{tuple(before[10, 10])} | 点击后 BGR{tuple(after[10, 10])}")
+    print(f"截图方式: {'XShm' if backend.shm else 'get_image'}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "demo":
+        _demo()
@@ -0,0 +1,282 @@
+"""
+启动: 主进程并行发现、连接、校准全部窗口, 工作进程挂载后在放行点等待, 全部账号一起开始
+    原来只校准第一个窗口(串行), 其它窗口共用它的偏移, 各账号的开始时间差一个进程启动加挂载的时间
+    每个窗口各自校准(开启 cache 且有缓存时直接用缓存, 不连接 uia)
+
+启动耗时按阶段输出(秒):
+    发现: 查找窗口、取窗口进程
+    连接: pywinauto uia 连接窗口(用缓存时没有)
+    校准: 计算 flash 偏移(或读取缓存)
+    导入: 工作进程启动到开始运行(进程创建、导入模块)
+    挂载: 挂载功能模块到准备好
+    就绪: 从开始启动到准备好
+
+没找到窗口的账号不启动(usable 不返回它们); 窗口在但校准失败的账号用其它窗口的偏移
+
+配置 "启动": {"并行数": 8, "同时开始": true, "等待超时": 120}
+
+演示(在 src 下, 假窗口, 每个窗口连接 0.3 秒、校准 0.2 秒):
+    python -m utils.bringup
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .backend import get_backend
+from .trace import tracer
+
+PHASES = ["发现", "连接", "校准", "导入", "挂载"]
+
+
+@dataclass
+class Startup:
+    """一个账号的启动记录"""
+
+    qq: str
+    hwnd: int
+    pid: Optional[int] = None  # 窗口所属进程
+    found: bool = True  # 找到了窗口(没找到的不启动)
+    phases: Dict[str, float] = field(default_factory=dict)  # 阶段 -> 秒
+    ready: float = 0.0  # 准备好的时间
+    error: str = ""
+
+
+class BringUp:
+    """并行发现、连接、校准全部窗口"""
+
+    def __init__(self, games: list, threads: int = 8):
+        """
+        :param games: 游戏实例
+        :param threads: 同时连接、校准的窗口数
+        """
+        self.games = games
+        self.threads = max(1, threads)
+        self.startups = [Startup(game.qq, game.hwnd) for game in games]
+        self.started = 0.0
+        self.elapsed = 0.0  # 主进程启动阶段(发现、连接、校准)耗时
+
+    @classmethod
+    def from_config(cls, games: list, config: dict):
+        """按配置里的 "启动" 创建
+
+        :param config: 比如: {"并行数": 8, "同时开始": true, "等待超时": 120}
+        """
+        return cls(games, config.get("并行数", 8))
+
+    def _discover(self):
+        """查找窗口(全部账号一次), 检查每个账号的窗口还在"""
+        backend = get_backend(self.games[0].config.get("后端"))
+        start = time.time()
+        # 后端不支持查找窗口时(None)不检查
+        windows = backend.find_windows("MainWindow", "Chrome Legacy Window")
+        windows = None if windows is None else set(windows)
+        shared = time.time() - start
+
+        for startup in self.startups:
+            start = time.time()
+            if windows is not None and startup.hwnd not in windows:
+                startup.found, startup.error = False, "未找到窗口"
+            else:
+                try:
+                    startup.pid = backend.window_pid(startup.hwnd)
+                except Exception as e:
+                    # 窗口已经关闭(x11 上是 BadWindow)
+                    startup.found = False
+                    startup.error = f"未找到窗口: {type(e).__name__}: {e}"
+            startup.phases["发现"] = shared + time.time() - start
+
+    def _calibrate(self, game, startup: Startup):
+        """连接并计算偏移(在线程池里)"""
+        try:
+            # uia 需要在每个线程里初始化 COM
+            import pythoncom
+
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+
+        if startup.error:
+            return
+        tracer.name_thread(f"bringup-{game.qq}")
+        start = time.time()
+        offset = game.cached_offset()
+        if offset is None:
+            if get_backend(game.config.get("后端")).name != "win32":
+                startup.error = "当前后端无法计算窗口位置, 请在 config/cache.json 填写 coordDiff"
+                return
+            try:
+                app = game.connect()
+                startup.phases["连接"] = time.time() - start
+                start = time.time()
+                with tracer.span("measure_offset", "calibrate"):
+                    offset = game._measure_offset(app)
+            except Exception as e:
+                startup.error = f"{type(e).__name__}: {e}"
+                return
+            if offset is None:
+                startup.error = "未找到flash区域"
+                return
+        startup.phases["校准"] = time.time() - start
+        game.coordDiff = offset
+
+    def run(self) -> "BringUp":
+        """发现、并行连接和校准, 窗口在但校准失败的账号用第一个成功的偏移"""
+        self.started = time.time()
+        self._discover()
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            list(pool.map(self._calibrate, self.games, self.startups))
+        self.elapsed = time.time() - self.started
+
+        measured = [g.coordDiff for g in self.games if g.coordDiff != (0, 0)]
+        if measured:
+            if not self.games[0].cached_offset():
+                self.games[0].save_offset(measured[0])
+            for game, startup in zip(self.games, self.startups):
+                if game.coordDiff == (0, 0) and startup.found:
+                    game.coordDiff = measured[0]
+                    print(f"启动 | {game.qq} | {startup.error}, 使用其它窗口的偏移")
+        for startup in self.startups:
+            if not startup.found:
+                print(f"启动 | {startup.qq} | {startup.error}, 不启动")
+        return self
+
+    def usable(self) -> list:
+        """找到了窗口的账号(要启动的)"""
+        return [g for g, s in zip(self.games, self.startups) if s.found]
+
+    def collect(self, board, qqs: List[str] = None):
+        """从共享内存槽读取工作进程的启动时间(导入、挂载)
+
+        :param board: Supervisor.board
+        :param qqs: 每个槽对应的账号, 默认和 games 的顺序一样
+        """
+        startups = {startup.qq: startup for startup in self.startups}
+        for index, qq in enumerate(qqs or list(startups)):
+            startup, slot = startups[qq], board[index]
+            if slot.imported:
+                startup.phases["导入"] = slot.imported - slot.spawned
+            if slot.ready:
+                startup.phases["挂载"] = slot.ready - slot.imported
+                startup.ready = slot.ready
+
+    def report(self, released: float = None) -> str:
+        """各账号启动耗时
+
+        :param released: 放行时间
+        """
+        lines = [f"启动 | 账号: {len(self.startups)} | 并行数: {self.threads}"]
+        for startup in self.startups:
+            phases = " | ".join(
+                f"{name}: {round(startup.phases[name], 2)}s"
+                for name in PHASES
+                if name in startup.phases
+            )
+            ready = (
+                f"就绪: {round(startup.ready - self.started, 2)}s"
+                if startup.ready
+                else "未就绪"
+            )
+            error = f" | {startup.error}" if startup.error else ""
+            lines.append(f"  {startup.qq} | {phases} | {ready}{error}")
+
+        readies = [s.ready for s in self.startups if s.ready]
+        if readies:
+            lines.append(
+                f"  最早就绪: {round(min(readies) - self.started, 2)}s"
+                f" | 最晚就绪: {round(max(readies) - self.started, 2)}s"
+            )
+        if released:
+            lines.append(f"  全部开始: {round(released - self.started, 2)}s")
+        result = "\n".join(lines)
+        print(result)
+        return result
+
+
+class _DemoGame:
+    """假窗口: 连接 0.3 秒, 校准 0.2 秒"""
+
+    def __init__(self, hwnd: int):
+        self.hwnd, self.qq = hwnd, f"qq{hwnd}"
+        self.config = {}
+        self.coordDiff = (0, 0)
+
+    def cached_offset(self):
+        return None
+
+    def save_offset(self, offset):
+        pass
+
+    def connect(self):
+        time.sleep(0.3)
+        return self
+
+    def _measure_offset(self, app):
+        time.sleep(0.2)
+        return (8, 31) if self.hwnd != 1006 else None
+
+
+class _DemoOption:
+    def __init__(self, game, order_num: int):
+        self.game = game
+        self.order_num = order_num
+
+
+def _demo_task(option):
+    # 挂载耗时各不相同
+    time.sleep(0.2 + option.order_num * 0.15)
+    option.heartbeat.ready(option.gate)
+    option.heartbeat.progress("演示", 1, 1)
+
+
+def _demo():
+    """假窗口: 串行和并行校准的耗时, 有没有放行点时各账号开始时间的差距"""
+    from . import backend
+    from .supervisor import Supervisor
+
+    class FakeBackend(backend.Backend):
+        name = "win32"
+
+        def press(self, hwnd, x, y):
+            pass
+
+        def release(self, hwnd, x, y):
+            pass
+
+        def key(self, hwnd, char, down):
+            pass
+
+        def send_char(self, hwnd, char):
+            pass
+
+        def capture(self, hwnd):
+            return None
+
+        def find_windows(self, parent_title, child_title=None):
+            return [1001, 1002, 1003, 1004, 1005, 1006]
+
+        def window_pid(self, hwnd):
+            return hwnd * 10
+
+    backend._backend = FakeBackend()
+    hwnds = [1001, 1002, 1003, 1004, 1005, 1006, 1007]
+    for threads in (1, 8):
+        bringup = BringUp([_DemoGame(hwnd) for hwnd in hwnds], threads).run()
+        print(f"并行数 {threads}: 发现、连接、校准共 {round(bringup.elapsed, 2)}s")
+
+    for barrier in (False, True):
+        options = [_DemoOption(game, i) for i, game in enumerate(bringup.usable())]
+        supervisor = Supervisor(_demo_task, options, per_worker=3, barrier=barrier)
+        bringup.started = time.time()  # 就绪时间从创建进程算起
+        supervisor.start()
+        supervisor.release()
+        while supervisor.check():
+            time.sleep(0.1)
+        bringup.collect(supervisor.board, [option.game.qq for option in options])
+        bringup.report(supervisor.gate and time.time())
+        starts = [slot.started for slot in supervisor.board]
+        print(f"放行点: {barrier} | 开始时间相差: {round(max(starts) - min(starts), 2)}s")
+
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,194 @@
+"""
+广播模式: 一个线程把同一个功能同时跑在多个窗口上
+功能代码只执行一次, 每一步点击依次发给全部窗口(一起按下、一起抬起), 等待只等一次
+弹窗处理失败或界面和领头窗口不一致的窗口会被踢出, 其它窗口继续
+适合每个账号点击顺序完全一样的功能: 洗属性、生辰纲抽奖、连点器(天机秘籍) ...
+"""
+import copy
+from collections import Counter
+from typing import List
+
+from .clock import REAL
+from .recovery import RoutineAborted
+from .util import Util
+
+
+class _Heartbeats:
+    """把心跳和进度转发给每个窗口，顺便做同步检查"""
+
+    def __init__(self, broadcast: "BroadcastUtil"):
+        self.broadcast = broadcast
+
+    def _each(self, method: str, *args):
+        for util in self.broadcast.active:
+            if util.heartbeat:
+                getattr(util.heartbeat, method)(*args)
+
+    def beat(self):
+        self._each("beat")
+
+    def wait(self, seconds: float):
+        self._each("wait", seconds)
+
+    def set_urgent(self, urgent: bool):
+        self._each("set_urgent", urgent)
+
+    def error(self, message: str):
+        self._each("error", message)
+
+    def checkpoint(self):
+        self._each("checkpoint")
+
+    def done(self):
+        self._each("done")
+
+    def progress(self, routine: str, iteration: int, total: int):
+        self._each("progress", routine, iteration, total)
+        if iteration % self.broadcast.sync_every == 0:
+            self.broadcast.sync()
+
+
+class _Recoveries:
+    """逐个窗口检测弹窗, 处理不了的窗口踢出"""
+
+    def __init__(self, broadcast: "BroadcastUtil"):
+        self.broadcast = broadcast
+
+    @property
+    def counts(self) -> Counter:
+        return sum(
+            (u.recovery.counts for u in self.broadcast.utils if u.recovery),
+            Counter(),
+        )
+
+    def check(self) -> bool:
+        handled = False
+        for util in list(self.broadcast.active):
+            if util.recovery is None:
+                continue
+            try:
+                handled = util.recovery.check() or handled
+            except RoutineAborted as e:
+                self.broadcast.drop(util, str(e))
+        return handled
+
+    def summary(self) -> str:
+        return "; ".join(
+            f"{u.hwnd}: {u.recovery.summary()}"
+            for u in self.broadcast.utils
+            if u.recovery and u.recovery.counts
+        )
+
+
+class BroadcastUtil:
+    """和 Util 接口一致, 点击发给全部窗口, 截图、读数只看领头窗口(第一个还在同步的窗口)"""
+
+    idle_runtime = None  # 广播时不插入空闲短任务
+    deadline = None
+    run = None
+    clock = REAL  # 广播不支持虚拟时钟
+    journal_directory = Util.journal_directory
+
+    def __init__(self, utils: List[Util], sync_every: int = 1):
+        """
+        :param utils: 每个窗口的工具类(已挂载)
+        :param sync_every: 每多少轮检查一次界面是否一致
+        """
+        self.utils = utils
+        self.active = list(utils)
+        self.dropped = {}  # hwnd -> 原因
+        self.sync_every = max(1, sync_every)
+        self.heartbeat = _Heartbeats(self)
+        self.recovery = _Recoveries(self)
+        self.urgent = False
+
+    @property
+    def leader(self) -> Util:
+        if not self.active:
+            raise RoutineAborted("广播: 全部窗口都已掉队")
+        return self.active[0]
+
+    # 读取类属性按领头窗口
+    hwnd = property(lambda self: self.leader.hwnd)
+    offset = property(lambda self: self.leader.offset)
+    logger = property(lambda self: self.leader.logger)
+    resource_config = property(lambda self: self.leader.resource_config)
+    screens = property(lambda self: self.leader.screens)
+    printClick = property(lambda self: self.leader.printClick)
+    console = property(lambda self: self.leader.console)
+
+    def drop(self, util: Util, reason: str):
+        """踢出掉队的窗口"""
+        if util in self.active:
+            self.active.remove(util)
+            self.dropped[util.hwnd] = reason
+            util.logger.warning(f"广播: 窗口 {util.hwnd} 掉队, {reason}")
+        if not self.active:
+            raise RoutineAborted("广播: 全部窗口都已掉队")
+
+    def sync(self):
+        """界面和领头窗口不一致的窗口踢出(需要开启界面识别)"""
+        screens = self.screens
+        if screens is None or not screens.ready or len(self.active) < 2:
+            return
+        states = [(u, screens.classify(u.capture())) for u in self.active]
+        expected = states[0][1]
+        if expected is None:
+            return
+        for util, state in states[1:]:
+            if state != expected:
+                self.drop(util, f"界面: {state}, 领头窗口: {expected}")
+
+    def click(self, coord):
+        for util in self.active:
+            if util.heartbeat:
+                util.heartbeat.beat()
+            outer, util.urgent = util.urgent, self.urgent or util.urgent
+            util._throttle()
+            util.urgent = outer
+        Util.bg_click_many([u.info(coord) for u in self.active], self.printClick)
+
+    def type_content(self, coord, content):
+        for util in self.active:
+            util.type_content(coord, content)
+
+    def echo(self, text: str):
+        self.leader.echo(text)
+
+    def get_content(self, coord):
+        return self.leader.get_content(coord)
+
+    def capture(self):
+        return self.leader.capture()
+
+
+class Broadcast:
+    """广播执行器"""
+
+    def __init__(self, games: list, sync_every: int = 1):
+        """
+        :param games: 游戏实例(已挂载, 配置以第一个为准)
+        :param sync_every: 每多少轮检查一次界面是否一致
+        """
+        self.games = games
+        self.util = BroadcastUtil([game.util for game in games], sync_every)
+
+    def run(self, routine: str, *args):
+        """在全部窗口上执行功能
+
+        :param routine: 功能名称, 比如: "Other.xiShuXing100"、"click_more"
+        :param args: 功能参数
+        """
+        # 用第一个账号的副本来跑功能代码, 它的 util 换成广播的
+        view = copy.copy(self.games[0])
+        view.util = self.util
+        view.heartbeat = self.util.heartbeat
+        view.qq = f"广播({len(self.util.active)})"
+        try:
+            return view.run(routine, *args)
+        finally:
+            for hwnd, reason in self.util.dropped.items():
+                print(f"广播 | {routine} | 窗口 {hwnd} 掉队: {reason}")
+            print(
+                f"广播 | {routine} | 完成窗口: {len(self.util.active)}/{len(self.games)}"
+            )
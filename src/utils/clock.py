@@ -0,0 +1,195 @@
+"""
+时钟: 功能代码里的 sleep 和 time 都从 util.clock 取
+    RealClock: 真实时间
+    VirtualClock: 虚拟时间(离散事件), 全部账号线程都在等待时直接跳到最近的唤醒时间
+        几个小时的功能几百毫秒就能跑完, 用来验证节奏、错开时间的改动(见 utils/simulate.py)
+"""
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class RealClock:
+    """真实时间"""
+
+    virtual = False
+
+    @staticmethod
+    def time() -> float:
+        return time.time()
+
+    @staticmethod
+    def sleep(seconds: float):
+        time.sleep(seconds)
+
+    @staticmethod
+    def Lock():
+        return threading.Lock()
+
+
+REAL = RealClock()
+
+
+class ClockDeadlock(RuntimeError):
+    """虚拟时钟: 全部线程都在等锁, 没有可以唤醒的线程"""
+
+
+class VirtualLock:
+    """虚拟时钟下的锁: 等锁也算阻塞, 否则持锁线程 sleep 时时间不会前进"""
+
+    def __init__(self, clock: "VirtualClock"):
+        self.clock = clock
+        self.locked = False
+        self.waiters = []  # 等锁的线程, 先来先得
+
+    def acquire(self, blocking: bool = True) -> bool:
+        clock = self.clock
+        with clock.cond:
+            if not self.locked:
+                self.locked = True
+                return True
+            if not blocking:
+                return False
+            waiter = clock._waiter()
+            self.waiters.append(waiter)
+            clock._block(waiter)
+            return True
+
+    def release(self):
+        with self.clock.cond:
+            if not self.waiters:
+                self.locked = False
+                return
+            # 直接交给第一个等待的线程, 锁一直是占用状态
+            self.clock._wake(self.waiters.pop(0))
+
+    __enter__ = acquire
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class VirtualClock:
+    """离散事件时钟: 参与的线程全部阻塞(sleep 或等锁)时, 时间跳到最早的唤醒时间"""
+
+    virtual = True
+
+    def __init__(self, start: float = None):
+        """
+        :param start: 起始时间戳, 默认当前时间
+        """
+        self.now = time.time() if start is None else start
+        self.cond = threading.Condition()
+        self.threads = 0  # 参与的线程数
+        self.waiting = {}  # 阻塞中的线程: id -> [是否已唤醒, Condition]
+        self.timers = []  # (唤醒时间, 序号, 等待项)
+        self.error = None
+        self._seq = itertools.count()
+
+    def time(self) -> float:
+        return self.now
+
+    def _waiter(self) -> list:
+        # 每个等待项单独一个 Condition(共用一把锁), 只唤醒到点的线程
+        return [False, threading.Condition(self.cond)]
+
+    def _wake(self, waiter: list):
+        waiter[0] = True
+        self.waiting.pop(id(waiter), None)
+        waiter[1].notify()
+
+    def _advance(self):
+        """参与的线程全部阻塞时前进到最早的唤醒时间(持有 cond 时调用)"""
+        if self.threads == 0 or len(self.waiting) < self.threads:
+            return
+        if not self.timers:
+            self._fail(ClockDeadlock("虚拟时钟: 全部线程都在等锁"))
+            return
+        self.now = max(self.now, self.timers[0][0])
+        while self.timers and self.timers[0][0] <= self.now:
+            self._wake(heapq.heappop(self.timers)[2])
+
+    def _fail(self, error: BaseException):
+        """出错时唤醒全部阻塞的线程, 让它们一起退出(持有 cond 时调用)"""
+        self.error = self.error or error
+        for waiter in self.waiting.values():
+            waiter[1].notify()
+
+    def _block(self, waiter: list):
+        """阻塞当前线程直到被唤醒(持有 cond 时调用)"""
+        self.waiting[id(waiter)] = waiter
+        try:
+            self._advance()
+            while not waiter[0]:
+                if self.error:
+                    raise self.error
+                waiter[1].wait()
+        finally:
+            self.waiting.pop(id(waiter), None)
+
+    def sleep(self, seconds: float):
+        with self.cond:
+            if self.error:
+                raise self.error
+            if self.threads == 0:
+                # 没有其它线程参与时直接前进
+                self.now += max(0.0, seconds)
+                return
+            waiter = self._waiter()
+            wake = self.now + max(0.0, seconds)
+            heapq.heappush(self.timers, (wake, next(self._seq), waiter))
+            self._block(waiter)
+
+    def Lock(self) -> VirtualLock:
+        return VirtualLock(self)
+
+    def _leave(self):
+        with self.cond:
+            self.threads -= 1
+            self._advance()
+
+    @contextmanager
+    def participant(self):
+        """当前线程参与调度(时间只在全部参与线程都阻塞时前进)"""
+        with self.cond:
+            self.threads += 1
+        try:
+            yield self
+        finally:
+            self._leave()
+
+    def run(self, targets: list) -> float:
+        """每个函数一个线程, 在虚拟时间里跑完
+
+        :param targets: [(线程名称, 函数)]
+        :return: 经过的虚拟时间(秒)
+        """
+        start = self.now
+        errors = []
+
+        def worker(target):
+            try:
+                target()
+            except BaseException as e:
+                errors.append(e)
+                with self.cond:
+                    self._fail(e)
+            finally:
+                self._leave()
+
+        threads = [
+            threading.Thread(target=worker, args=(target,), name=name, daemon=True)
+            for name, target in targets
+        ]
+        # 先全部登记再启动, 避免先启动的线程在别人登记前把时间推过去
+        with self.cond:
+            self.threads += len(threads)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return self.now - start
@@ -0,0 +1,359 @@
+"""
+多机协同: coordinator 持有账号和任务计划, 各机器上的 agent 注册本机窗口后领取任务
+
+协议: TCP, 每行一个 json 消息
+    agent -> coordinator
+        {"type": "register", "host": "pc1", "capacity": 4, "windows": [{"qq": "123", "hwnd": 456}]}
+        {"type": "result", "id": 1, "ok": true, "elapsed": 12.3, "error": ""}
+        {"type": "metrics", "running": 2, "cpu": 35.0}
+    coordinator -> agent
+        {"type": "task", "id": 1, "qq": "123", "routine": "Zhanzheng.juyi", "args": [0]}
+        {"type": "bye"}
+"""
+import json
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import psutil
+
+
+def _send(sock: socket.socket, lock: threading.Lock, message: dict):
+    data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+    with lock:
+        sock.sendall(data)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    # coordinator 重启时可以马上重新监听同一个端口(只改这个子类, 不改标准库的类)
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _AgentConn:
+    """coordinator 侧记录的 agent 连接"""
+
+    def __init__(self, handler, message: dict):
+        self.handler = handler
+        self.host = message.get("host", "")
+        self.capacity = max(1, int(message.get("capacity", 1)))
+        self.windows = {str(w["qq"]): w for w in message.get("windows", [])}
+        self.running = 0
+        self.cpu = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def load(self) -> float:
+        return self.running / self.capacity
+
+    def send(self, message: dict):
+        _send(self.handler.request, self.lock, message)
+
+
+class Coordinator:
+    """任务协调者，按各机器的容量和当前负载分配任务"""
+
+    def __init__(self, tasks: List[dict], host="0.0.0.0", port=9527):
+        """
+        :param tasks: 任务计划, 比如: [{"qq": "123", "routine": "Zhanzheng.juyi", "args": [0]}]
+        :param host: 监听地址
+        :param port: 监听端口, 0 为随机端口
+        """
+        self.pending: List[dict] = []
+        for task_id, task in enumerate(tasks, 1):
+            self.pending.append({"id": task_id, "args": [], **task})
+        self.total = len(self.pending)
+
+        self.agents: Dict[str, _AgentConn] = {}
+        self.assigned: Dict[int, tuple] = {}  # 任务id -> (agent, task)
+        self.results: List[dict] = []
+        self.finished = threading.Event()
+        if not self.pending:
+            self.finished.set()
+        self.lock = threading.RLock()
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._handle(self)
+
+        self.server = _Server((host, port), Handler)
+        self.address = self.server.server_address
+
+    def _handle(self, handler):
+        agent = None
+        try:
+            for raw in handler.rfile:
+                message = json.loads(raw.decode("utf-8"))
+                kind = message.get("type")
+
+                if kind == "register":
+                    agent = _AgentConn(handler, message)
+                    with self.lock:
+                        self.agents[agent.host] = agent
+                    print(
+                        f"coordinator | {agent.host} 已注册 | 容量: {agent.capacity} | 窗口: {list(agent.windows)}"
+                    )
+                elif agent is None:
+                    continue
+                elif kind == "result":
+                    with self.lock:
+                        assigned = self.assigned.pop(message["id"], None)
+                        if assigned:
+                            agent.running -= 1
+                            self.results.append(
+                                {**assigned[1], **message, "host": agent.host}
+                            )
+                elif kind == "metrics":
+                    agent.cpu = message.get("cpu", 0.0)
+
+                self._dispatch()
+        finally:
+            if agent:
+                self._drop(agent)
+
+    def _drop(self, agent: _AgentConn):
+        """agent 断开，把未完成的任务放回队列"""
+        with self.lock:
+            if self.agents.get(agent.host) is agent:
+                del self.agents[agent.host]
+            for task_id, (owner, task) in list(self.assigned.items()):
+                if owner is agent:
+                    del self.assigned[task_id]
+                    self.pending.insert(0, task)
+        print(f"coordinator | {agent.host} 已断开")
+        self._dispatch()
+
+    def _pick(self, task: dict):
+        """在拥有该账号窗口、且未满载的机器中选负载最低的"""
+        candidates = [
+            a
+            for a in self.agents.values()
+            if task["qq"] in a.windows and a.running < a.capacity
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda a: (a.load, a.cpu))
+
+    def _dispatch(self):
+        with self.lock:
+            busy = {task["qq"] for _, task in self.assigned.values()}
+            for task in list(self.pending):
+                # 同一个账号同一时间只跑一个任务
+                if task["qq"] in busy:
+                    continue
+                agent = self._pick(task)
+                if agent is None:
+                    continue
+
+                self.pending.remove(task)
+                self.assigned[task["id"]] = (agent, task)
+                agent.running += 1
+                busy.add(task["qq"])
+                try:
+                    agent.send({"type": "task", **task})
+                except OSError:
+                    # 连接已断开: 任务放回队列, 不再分配给这个 agent(由 _drop 清理)
+                    del self.assigned[task["id"]]
+                    agent.running -= 1
+                    busy.discard(task["qq"])
+                    self.pending.insert(0, task)
+                    if self.agents.get(agent.host) is agent:
+                        del self.agents[agent.host]
+
+            if not self.pending and not self.assigned:
+                self.finished.set()
+
+    def serve(self):
+        """后台启动服务"""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"coordinator | 监听: {self.address} | 任务数: {self.total}")
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待全部任务完成
+
+        :return bool: 是否全部完成(超时返回 False)
+        """
+        return self.finished.wait(timeout)
+
+    def unowned(self) -> List[str]:
+        """还有任务、但没有任何已注册的 agent 拥有窗口的账号"""
+        with self.lock:
+            owned = {qq for agent in self.agents.values() for qq in agent.windows}
+            return sorted({t["qq"] for t in self.pending if t["qq"] not in owned})
+
+    def abandon(self, qqs: List[str]):
+        """放弃这些账号还没分配的任务(记为失败), 其它任务继续
+
+        :param qqs: 账号, 比如 unowned() 的结果
+        """
+        with self.lock:
+            for task in [t for t in self.pending if t["qq"] in qqs]:
+                self.pending.remove(task)
+                self.results.append(
+                    {**task, "ok": False, "error": "没有 agent 拥有该账号", "host": "未分配"}
+                )
+        self._dispatch()
+
+    def report(self) -> str:
+        """按机器统计任务结果"""
+        lines = [f"coordinator | 已完成: {len(self.results)}/{self.total}"]
+        hosts = {}
+        for result in self.results:
+            stat = hosts.setdefault(
+                result["host"], {"ok": 0, "fail": 0, "elapsed": 0.0}
+            )
+            stat["ok" if result.get("ok") else "fail"] += 1
+            stat["elapsed"] += result.get("elapsed", 0.0)
+        for host, stat in hosts.items():
+            lines.append(
+                f"  {host} | 成功: {stat['ok']} | 失败: {stat['fail']} | 总耗时: {round(stat['elapsed'], 2)}s"
+            )
+        result = "\n".join(lines)
+        print(result)
+        return result
+
+    def stop(self):
+        with self.lock:
+            for agent in self.agents.values():
+                try:
+                    agent.send({"type": "bye"})
+                except OSError:
+                    pass
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Agent:
+    """单台机器上的执行者，注册本机窗口并执行分配到的任务"""
+
+    def __init__(
+        self,
+        host: str,
+        windows: List[dict],
+        runner: Callable,
+        capacity: int = None,
+        metrics_interval: float = 10,
+    ):
+        """
+        :param host: 机器名
+        :param windows: 本机窗口, 比如: [{"qq": "123", "hwnd": 456}]
+        :param runner: 执行任务的函数, runner(qq, routine, args)
+        :param capacity: 同时执行的任务数, 默认cpu核心数
+        :param metrics_interval: 上报负载的间隔(秒)
+        """
+        self.host = host
+        self.windows = windows
+        self.runner = runner
+        self.capacity = capacity or psutil.cpu_count() or 1
+        self.metrics_interval = metrics_interval
+        self.running = 0
+        self.sock: socket.socket = None
+        self.lock = threading.Lock()
+        self.count_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=self.capacity)
+
+    def _send(self, message: dict):
+        _send(self.sock, self.lock, message)
+
+    def _run(self, task: dict):
+        start = time.time()
+        with self.count_lock:
+            self.running += 1
+        result = {"type": "result", "id": task["id"], "ok": True, "error": ""}
+        try:
+            self.runner(task["qq"], task["routine"], task.get("args", []))
+        except Exception as e:
+            result["ok"] = False
+            result["error"] = str(e)
+        with self.count_lock:
+            self.running -= 1
+        result["elapsed"] = round(time.time() - start, 3)
+        try:
+            self._send(result)
+        except OSError:
+            pass
+
+    def _metrics(self, stop: threading.Event):
+        while not stop.wait(self.metrics_interval):
+            try:
+                self._send(
+                    {
+                        "type": "metrics",
+                        "running": self.running,
+                        "cpu": psutil.cpu_percent(),
+                    }
+                )
+            except OSError:
+                return
+
+    def run(self, address: tuple):
+        """连接 coordinator 并执行任务，直到收到 bye 或连接断开
+
+        :param address: coordinator 地址, 比如: ("192.168.1.2", 9527)
+        """
+        self.sock = socket.create_connection(address)
+        self._send(
+            {
+                "type": "register",
+                "host": self.host,
+                "capacity": self.capacity,
+                "windows": self.windows,
+            }
+        )
+        print(f"agent | {self.host} 已连接 {address}")
+
+        stop = threading.Event()
+        threading.Thread(target=self._metrics, args=(stop,), daemon=True).start()
+        try:
+            for raw in self.sock.makefile("rb"):
+                message = json.loads(raw.decode("utf-8"))
+                if message.get("type") == "bye":
+                    break
+                if message.get("type") == "task":
+                    self.pool.submit(self._run, message)
+        except OSError:
+            pass
+        finally:
+            stop.set()
+            self.pool.shutdown(wait=True)
+            self.sock.close()
+        print(f"agent | {self.host} 已退出")
+
+
+# 本机模拟: 1个coordinator + 3个agent, 不需要游戏窗口
+if __name__ == "__main__":
+    import random
+
+    def fake_runner(qq, routine, args):
+        time.sleep(random.uniform(0.05, 0.2))
+        if random.random() < 0.1:
+            raise RuntimeError("模拟失败")
+
+    accounts = [str(10000 + i) for i in range(9)]
+    plan = [
+        {"qq": qq, "routine": routine, "args": []}
+        for qq in accounts
+        for routine in ("Zhanzheng.juyi", "Other.xiShuXing100")
+    ]
+    coordinator = Coordinator(plan, "127.0.0.1", 0)
+    coordinator.serve()
+
+    for n in range(3):
+        agent = Agent(
+            f"pc{n}",
+            [{"qq": qq, "hwnd": 0} for qq in accounts[n * 3 : n * 3 + 3]],
+            fake_runner,
+            capacity=n + 1,
+            metrics_interval=0.1,
+        )
+        threading.Thread(target=agent.run, args=(coordinator.address,)).start()
+
+    if not coordinator.wait(30):
+        print(f"coordinator | 超时, 没有 agent 的账号: {coordinator.unowned()}")
+    coordinator.report()
+    coordinator.stop()
@@ -0,0 +1,346 @@
+"""
+控制接口: 主进程里的本地 http 服务, 不重启进程(不用重新启动、校准)就能改变正在跑的内容
+    GET  /accounts                                  账号状态
+    GET  /routines                                  可执行的功能
+    POST /run     {"qq": ["123"], "routine": "Zhanzheng.juyi", "args": [0]}
+                                                    账号空闲时执行(正在跑功能时排队)
+    POST /pause   {"qq": ["123"]}                   在一轮结束时暂停
+    POST /resume  {"qq": ["123"]}                   继续
+    POST /stop    {"qq": ["123"]}                   在一轮结束时停止, 清空排队的功能(断点续跑日志保留)
+    POST /config  {"qq": ["123"], "config": {"战争": {"聚义": {"time": 10}}}}
+                                                    推送配置, 功能下次读取配置时生效, 进程重启后仍然有效
+    不传 qq 表示全部账号, 返回 json: {"ok": true, ...}, 出错时 {"ok": false, "error": "..."}
+
+暂停、停止写共享内存槽(Slot.control), 功能每轮结束时检查; 功能和配置通过每个账号的收件箱(multiprocessing.Queue)发给工作进程
+配置 "控制": {"开启": false, "地址": "127.0.0.1", "端口": 9528}, 开启后任务完成时进程不退出, 等待新的功能
+
+演示(在 src 下, 2 个假账号, 不需要游戏窗口):
+    python -m utils.control
+"""
+import importlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from .game import FEATURES, merge_config
+from .supervisor import PAUSE, RUN, STOP
+
+# Game 上可以直接执行的功能
+GAME_ROUTINES = ["click_more"]
+
+
+class ControlError(Exception):
+    """请求错误(返回 400)"""
+
+
+class _Server(ThreadingHTTPServer):
+    # 重启后马上能绑定同一个端口; 请求线程不阻止进程退出
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ControlServer:
+    """控制接口, 操作 Supervisor 的账号"""
+
+    def __init__(self, supervisor, host: str = "127.0.0.1", port: int = 9528):
+        """
+        :param supervisor: 进程监控(创建时 control=True)
+        :param host: 监听地址, 默认只允许本机访问
+        :param port: 监听端口, 0 为随机端口
+        """
+        self.supervisor = supervisor
+        self.qqs = [option.game.qq for option in supervisor.options]
+
+        control = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                control._handle(self, "GET")
+
+            def do_POST(self):
+                control._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                # 不输出访问日志(会打乱状态面板)
+                pass
+
+        self.server = _Server((host, port), Handler)
+        self.address = self.server.server_address
+
+    @classmethod
+    def from_config(cls, supervisor, config: dict):
+        """按配置里的 "控制" 创建
+
+        :param config: 比如: {"开启": true, "地址": "127.0.0.1", "端口": 9528}
+        """
+        return cls(supervisor, config.get("地址", "127.0.0.1"), config.get("端口", 9528))
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        routes = {
+            ("GET", "/accounts"): lambda body: {"accounts": self.accounts()},
+            ("GET", "/routines"): lambda body: {"routines": self.routines()},
+            ("POST", "/run"): lambda body: self.run(
+                body.get("qq"), body.get("routine", ""), body.get("args", [])
+            ),
+            ("POST", "/pause"): lambda body: self.pause(body.get("qq")),
+            ("POST", "/resume"): lambda body: self.resume(body.get("qq")),
+            ("POST", "/stop"): lambda body: self.stop(body.get("qq")),
+            ("POST", "/config"): lambda body: self.push_config(
+                body.get("qq"), body.get("config", {})
+            ),
+        }
+        route = routes.get((method, handler.path.split("?")[0]))
+        try:
+            if route is None:
+                status, result = 404, {"ok": False, "error": f"未知接口: {handler.path}"}
+            else:
+                length = int(handler.headers.get("Content-Length") or 0)
+                body = json.loads(handler.rfile.read(length) or "{}")
+                if not isinstance(body, dict):
+                    raise ControlError("请求内容必须是 json 对象")
+                status, result = 200, {"ok": True, **route(body)}
+        except (ControlError, ValueError) as e:
+            status, result = 400, {"ok": False, "error": str(e)}
+
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _select(self, qqs: List[str] = None) -> List[int]:
+        """账号下标, 不传表示全部"""
+        if qqs is not None and not isinstance(qqs, (list, str)):
+            raise ControlError("qq 必须是数组或字符串")
+        if not qqs:
+            return list(range(len(self.qqs)))
+        if isinstance(qqs, str):
+            qqs = [qqs]
+        unknown = [qq for qq in qqs if str(qq) not in self.qqs]
+        if unknown:
+            raise ControlError(f"未知账号: {unknown}")
+        return [self.qqs.index(str(qq)) for qq in qqs]
+
+    def _alive(self) -> set:
+        """有工作进程在托管的账号下标"""
+        return {
+            index
+            for worker in self.supervisor.workers.values()
+            if worker["process"].is_alive()
+            for index in worker["indexes"]
+        }
+
+    def _inbox(self, index: int):
+        inbox = self.supervisor.options[index].inbox
+        if inbox is None:
+            raise ControlError("进程监控没有开启控制接口(配置 控制.开启)")
+        return inbox
+
+    def accounts(self) -> List[dict]:
+        """账号状态"""
+        alive = self._alive()
+        states = {PAUSE: "paused", STOP: "stopping"}
+        result = []
+        for index, qq in enumerate(self.qqs):
+            slot = self.supervisor.board[index]
+            state = "idle" if slot.done else states.get(slot.control, "running")
+            result.append(
+                {
+                    "qq": qq,
+                    "worker": slot.worker if index in alive else None,
+                    "state": state,
+                    "routine": slot.routine.decode("utf-8", errors="ignore"),
+                    "iteration": slot.iteration,
+                    "total": slot.total,
+                    "eta": (
+                        round(slot.eta - time.time(), 1)
+                        if slot.eta and not slot.done
+                        else None
+                    ),
+                    "error": slot.error.decode("utf-8", errors="ignore"),
+                }
+            )
+        return result
+
+    def routines(self) -> List[str]:
+        """可执行的功能: 功能模块的公开方法和 Game 上的功能(连点器)"""
+        result = []
+        for name, (module, _) in FEATURES.items():
+            CLASS = getattr(importlib.import_module(module), name)
+            result += [
+                f"{name}.{method}"
+                for method, value in vars(CLASS).items()
+                if callable(value) and not method.startswith("_")
+            ]
+        return result + GAME_ROUTINES
+
+    def _check_routine(self, routine: str):
+        if not isinstance(routine, str):
+            raise ControlError("routine 必须是字符串")
+        parts = routine.split(".")
+        if routine in GAME_ROUTINES:
+            return
+        if len(parts) == 2 and parts[0] in FEATURES:
+            module = importlib.import_module(FEATURES[parts[0]][0])
+            if callable(getattr(getattr(module, parts[0]), parts[1], None)):
+                return
+        raise ControlError(f"未知功能: {routine}")
+
+    def run(self, qqs: List[str], routine: str, args: list = None) -> dict:
+        """账号执行功能(正在跑功能时排队)
+
+        :param qqs: 账号, 不传表示全部
+        :param routine: 功能名称, 比如: "Zhanzheng.juyi"
+        :param args: 功能参数
+        """
+        self._check_routine(routine)
+        if not isinstance(args or [], list):
+            raise ControlError("args 必须是数组")
+        alive = self._alive()
+        queued, missing = [], []
+        for index in self._select(qqs):
+            if index not in alive:
+                missing.append(self.qqs[index])
+                continue
+            message = {"type": "run", "routine": routine, "args": args or []}
+            self._inbox(index).put(message)
+            queued.append(self.qqs[index])
+        return {"queued": queued, "missing": missing}
+
+    def _control(self, qqs: List[str], value: int, only=None) -> List[str]:
+        changed = []
+        for index in self._select(qqs):
+            slot = self.supervisor.board[index]
+            if only is None or slot.control in only:
+                slot.control = value
+                changed.append(self.qqs[index])
+        return changed
+
+    def pause(self, qqs: List[str] = None) -> dict:
+        """在一轮结束时暂停"""
+        return {"paused": self._control(qqs, PAUSE, (RUN,))}
+
+    def resume(self, qqs: List[str] = None) -> dict:
+        """继续暂停的账号"""
+        return {"resumed": self._control(qqs, RUN, (PAUSE,))}
+
+    def stop(self, qqs: List[str] = None) -> dict:
+        """在一轮结束时停止当前功能, 清空排队的功能"""
+        stopped = []
+        for index in self._select(qqs):
+            self._inbox(index).put({"type": "clear"})
+            slot = self.supervisor.board[index]
+            # 空闲的账号不用停, 否则下一个功能一开始就会停
+            if not slot.done:
+                slot.control = STOP
+                stopped.append(self.qqs[index])
+        return {"stopped": stopped}
+
+    def push_config(self, qqs: List[str], patch: dict) -> dict:
+        """推送配置(合并到现有配置)
+
+        :param patch: 要修改的部分, 比如: {"战争": {"聚义": {"time": 10}}}
+        """
+        if not isinstance(patch, dict) or not patch:
+            raise ControlError("config 必须是非空对象")
+        updated = []
+        for index in self._select(qqs):
+            option = self.supervisor.options[index]
+            self._inbox(index).put({"type": "config", "config": patch})
+            # 记在任务配置上, 进程重启后重新应用
+            option.config_patch = merge_config(option.config_patch, patch)
+            updated.append(self.qqs[index])
+        return {"updated": updated}
+
+    def serve(self) -> "ControlServer":
+        """后台启动服务"""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"control | 监听: http://{self.address[0]}:{self.address[1]}")
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _DemoGame:
+    """假账号: 每轮 0.3 秒, 上报进度"""
+
+    def __init__(self, qq: str):
+        self.qq = qq
+        self.config = {"轮数": 20}
+        self.heartbeat = None
+
+    def apply_config(self, patch: dict):
+        self.config = merge_config(self.config, patch)
+
+    def run(self, routine: str, *args):
+        total = args[0] if args else self.config["轮数"]
+        for i in range(1, total + 1):
+            time.sleep(0.3)
+            self.heartbeat.progress(routine, i, total)
+            self.heartbeat.checkpoint()
+
+
+class _DemoOption:
+    def __init__(self, qq: str):
+        self.game = _DemoGame(qq)
+        self.config_patch = {}
+
+
+def _demo_task(option):
+    option.game.heartbeat = option.heartbeat
+    option.game.run("演示")
+
+
+def _demo():
+    """2 个假账号: 暂停、继续、停止、推送配置、执行新功能"""
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    from .supervisor import Supervisor
+
+    supervisor = Supervisor(
+        _demo_task, [_DemoOption("10001"), _DemoOption("10002")], control=True
+    )
+    supervisor.start()
+    server = ControlServer(supervisor, port=0).serve()
+    url = f"http://{server.address[0]}:{server.address[1]}"
+
+    def call(path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        try:
+            with urlopen(Request(url + path, data), timeout=5) as response:
+                result = json.loads(response.read())
+        except HTTPError as e:
+            result = json.loads(e.read())
+        print(f"{path} {body or ''} -> {result}")
+        return result
+
+    def iteration(qq):
+        accounts = call("/accounts")["accounts"]
+        return next(a["iteration"] for a in accounts if a["qq"] == qq)
+
+    time.sleep(2)
+    call("/pause", {"qq": ["10001"]})
+    time.sleep(1)
+    paused = iteration("10001")
+    time.sleep(1)
+    print(f"暂停 1 秒后次数不变: {paused == iteration('10001')}")
+    call("/resume", {"qq": ["10001"]})
+    call("/stop", {"qq": ["10002"]})
+    time.sleep(2)
+    call("/config", {"config": {"轮数": 2}})
+    call("/run", {"routine": "click_more"})
+    time.sleep(2)
+    call("/accounts")
+    call("/run", {"routine": "不存在"})
+    supervisor.stop()
+    server.close()
+
+
+if __name__ == "__main__":
+    _demo()
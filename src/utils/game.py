@@ -1,17 +1,58 @@
+import importlib
 import logging
 import json
 import os
-import time
+from typing import TYPE_CHECKING, Optional
 from .util import Util
+from .backend import get_backend
+from .logs import create_handler
+from .trace import tracer
 from multiprocessing.synchronize import Lock, Event
-from future import Bianqiang, Fuben, Zhanzheng, Other, Test, ZuDui
 
-logging.basicConfig(
-    filename="logs/game.log",
-    level=logging.DEBUG,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    encoding="utf-8",
-)
+if TYPE_CHECKING:
+    from future import Bianqiang, Fuben, Zhanzheng, Other, Test, ZuDui
+
+# 功能模块: 属性名 -> (模块, 配置key), 第一次用到时才导入和创建
+FEATURES = {
+    "Bianqiang": ("future.bianqiang", "变强"),
+    "Fuben": ("future.fuben", "副本"),
+    "Zhanzheng": ("future.zhanzheng", "战争"),
+    "Other": ("future.other", "其它"),
+    "Test": ("future.test", "测试"),
+    "ZuDui": ("future.zudui", "组队"),
+}
+
+# 窗口偏移值缓存(相对于运行目录)
+CACHE_FILE = "src/config/cache.json"
+
+# 已读取的配置文件, 同一进程的账号共用(只读): 路径 -> (修改时间, 内容)
+_config_cache = {}
+
+
+def _read_config(path: str) -> dict:
+    """读取 json 配置, 文件没变时直接返回缓存"""
+    mtime = os.path.getmtime(path)
+    cached = _config_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = (mtime, json.load(f))
+        _config_cache[path] = cached
+    return cached[1]
+
+
+def merge_config(config: dict, patch: dict) -> dict:
+    """合并配置(返回新的 dict, 不修改原来的, 原配置是同一进程的账号共用的)
+
+    :param config: 原配置
+    :param patch: 要修改的部分, 比如: {"战争": {"聚义": {"time": 10}}}
+    """
+    merged = dict(config)
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
 
 
 class Game:
@@ -22,15 +63,20 @@ class Game:
     logger = None
     coordDiff = (0, 0)  # 位置偏移
     config = {}
+    heartbeat = None  # 心跳(supervisor分配)
+    governor = None  # 全局点击限速(supervisor分配)
+    targets = None  # 聚义目标分配(主进程创建)
+    tab = None  # 多标签: 所在的标签(见 utils/tabs.py)
+    console = True  # 进度输出到终端(开启状态面板时主进程设为 False)
 
     # 在这里声明所有属性类型（给编辑器提示用的）
     util: Util
-    Bianqiang: Bianqiang
-    Fuben: Fuben
-    Zhanzheng: Zhanzheng
-    Other: Other
-    Test: Test
-    ZuDui: ZuDui
+    Bianqiang: "Bianqiang"
+    Fuben: "Fuben"
+    Zhanzheng: "Zhanzheng"
+    Other: "Other"
+    Test: "Test"
+    ZuDui: "ZuDui"
 
     def __init__(self, hwnd: int = None, qq="", lock: Lock = None, event: Event = None):
         """Game初始化
@@ -47,19 +93,44 @@ class Game:
         self.logger = logging.getLogger(f"Game-{self.qq or __name__}")
         self.load_config()
 
+    def __getstate__(self):
+        # 传给工作进程时不带配置和已挂载的功能，到子进程里重新挂载，配置从缓存共用
+        state = self.__dict__.copy()
+        for key in ["config", "util", *FEATURES]:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.load_config()
+
+    def __getattr__(self, name: str):
+        # 功能模块按需挂载(只在实例上没有该属性时调用)
+        if name in FEATURES and "util" in self.__dict__:
+            module, config_key = FEATURES[name]
+            CLASS = getattr(importlib.import_module(module), name)
+            instance = CLASS(
+                self.hwnd,
+                self.util,
+                self.config.get(config_key, {}),
+                self.qq,
+                self.lock,
+                self.event,
+            )
+            setattr(self, name, instance)
+            return instance
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
     def _customLogger(self):
         """自定义日志"""
         log_filename = f"logs/{self.qq}.log"
         handler_exists = any(
-            isinstance(h, logging.FileHandler) and h.baseFilename.endswith(log_filename)
-            for h in self.logger.handlers
+            getattr(h, "log_file", None) == log_filename for h in self.logger.handlers
         )
 
         if not handler_exists:
-            file_handler = logging.FileHandler(log_filename, encoding="utf-8")
-            file_handler.setLevel(logging.DEBUG)
-            formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-            file_handler.setFormatter(formatter)
+            file_handler = create_handler(log_filename, self.config.get("日志"))
+            file_handler.log_file = log_filename
             self.logger.addHandler(file_handler)
             self.logger.propagate = False  # 不向上传播到根日志器
 
@@ -71,30 +142,64 @@ class Game:
         if self.qq:
             self._customLogger()
 
-        util = Util(
-            self.hwnd, self.coordDiff, self.logger, self.config.get("printClick", False)
-        )
-        self.util = util
+        # 输入和截图的后端(每个进程第一次挂载时按配置创建)
+        get_backend(self.config.get("后端"))
+        if self.tab is not None:
+            from .tabs import TabUtil
 
-        # 挂载功能
-        modules = [
-            (Bianqiang, "变强"),
-            (Fuben, "副本"),
-            (Zhanzheng, "战争"),
-            (Other, "其它"),
-            (Test, "测试"),
-            (ZuDui, "组队"),
-        ]
-        for CLASS, config_key in modules:
-            instance = CLASS(
+            util = TabUtil(
+                self.tab,
+                self.logger,
+                self.config.get("printClick", False),
+                self.heartbeat,
+            )
+        else:
+            util = Util(
                 self.hwnd,
-                util,
-                self.config.get(config_key, {}),
-                self.qq,
-                self.lock,
-                self.event,
+                self.coordDiff,
+                self.logger,
+                self.config.get("printClick", False),
+                self.heartbeat,
             )
-            setattr(self, CLASS.__name__, instance)
+        self.util = util
+        util.governor = self.governor
+        util.targets = self.targets
+        util.console = self.console
+        util.resource_config = self.config.get("资源", {})
+
+        # 空闲时间插入短任务
+        idle = self.config.get("空闲任务", {})
+        if idle.get("开启", False):
+            from .idle import IdleRuntime
+
+            util.idle_runtime = IdleRuntime.from_config(self, idle)
+
+        # 意外弹窗检测
+        popup = self.config.get("弹窗检测", {})
+        if popup.get("开启", False):
+            from .recovery import Recovery
+            from coords.popups import 弹窗列表
+
+            util.recovery = Recovery(
+                util.capture,
+                util.click,
+                弹窗列表,
+                self.logger,
+                popup.get("相似度", 0.85),
+                popup.get("间隔", 0),
+                clock=util.clock,
+            )
+
+        # 界面识别
+        screens = self.config.get("界面识别", {})
+        if screens.get("开启", False):
+            from .screen import get_screen_classifier
+
+            util.screens = get_screen_classifier(screens)
+
+        # 功能模块在第一次用到时挂载(见 __getattr__), 重新挂载时清掉旧的
+        for name in FEATURES:
+            self.__dict__.pop(name, None)
 
     def set_hwnd(self, hwnd: int):
         """设置窗口句柄"""
@@ -103,41 +208,98 @@ class Game:
     def count_position(self, app, auto_mount=False, new_lock=None, new_event=None):
         """计算窗口偏移值(coordDiff)，比较耗时，并挂载功能
 
-        :param app: pywinauto 实例
+        :param app: pywinauto 实例, None 时需要计算位置才连接
         :param auto_mount: 自动挂载功能模块
         :param new_lock: 新的线程锁
         :return none:
         """
+        with tracer.span("count_position", "calibrate"):
+            self._count_position(app, auto_mount, new_lock, new_event)
+
+    def _count_position(self, app, auto_mount=False, new_lock=None, new_event=None):
         if new_lock:
             self.lock = new_lock
             self.event = new_event
 
-        cache_file = f"src/config/cache.json"
-
-        # 1.根据缓存来执行
-        use_cache = self.config.get("cache", False)
-        cached_json = {}
-        cached_coordDiff = False
+        # 多标签: 每个标签切换过去单独校准, 不用缓存
+        if self.tab is not None:
+            self._count_tab_position(auto_mount)
+            return
 
-        if use_cache:
-            try:
-                with open(cache_file, encoding="utf-8") as f:
-                    cached_json = json.load(f)
-                    cached_coordDiff = cached_json.get("coordDiff")
-            except:
-                print(f"{cache_file}: 未找到该文件 | 程序将自动创建该缓存文件")
-
-            if cached_coordDiff:
-                self.coordDiff = tuple(cached_coordDiff)
-                auto_mount and self._mountFuture()
-                return
-        elif self.coordDiff[0] != 0 and self.coordDiff[1] != 0:
-            # 2.自身有数据的时候不进行重复计算，因为耗时
+        # 1.自身有数据(主进程启动时已校准)的时候不进行重复计算，因为耗时
+        if self.coordDiff[0] != 0 and self.coordDiff[1] != 0:
             self._mountFuture()
             return
 
-        # 3.重新计算窗口偏移值
+        # 2.根据缓存来执行
+        cached = self.cached_offset()
+        if cached:
+            self.coordDiff = cached
+            auto_mount and self._mountFuture()
+            return
+
+        # 3.重新计算窗口偏移值(pywinauto uia, 只支持 windows)
+        if get_backend(self.config.get("后端")).name != "win32":
+            self.logger.error("当前后端无法计算窗口位置, 请在 config/cache.json 填写 coordDiff")
+            return
         print(f"{self.qq + ':' if self.qq else ''}计算窗口位置")
+        if app is None:
+            app = self.connect()
+        coordDiff = self._measure_offset(app)
+        if coordDiff is None:
+            return
+        self.coordDiff = coordDiff
+        self.save_offset(coordDiff)
+
+        # 挂载功能
+        self._mountFuture()
+
+    def cached_offset(self) -> Optional[tuple]:
+        """缓存的窗口偏移值(配置 cache 开启时), 没有返回 None"""
+        if not self.config.get("cache", False):
+            return None
+        try:
+            with open(CACHE_FILE, encoding="utf-8") as f:
+                cached = json.load(f).get("coordDiff")
+        except:
+            print(f"{CACHE_FILE}: 未找到该文件 | 程序将自动创建该缓存文件")
+            return None
+        return tuple(cached) if cached else None
+
+    def save_offset(self, coordDiff: tuple):
+        """窗口偏移值写入缓存"""
+        cached_json = {}
+        try:
+            with open(CACHE_FILE, encoding="utf-8") as f:
+                cached_json = json.load(f)
+        except (OSError, ValueError):
+            pass
+        cached_json["coordDiff"] = coordDiff
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cached_json, f, ensure_ascii=False, indent=2)
+            print(f"coordDiff: {coordDiff}, 已写入缓存文件")
+
+    def _count_tab_position(self, auto_mount=False):
+        """多标签: 切换到自己的标签后计算偏移(同一个标签只算一次)"""
+
+        def measure(hwnd):
+            self.hwnd = hwnd
+            return self._measure_offset(self.connect())
+
+        tab = self.tab
+        tab.host.calibrate(tab, measure)
+        if tab.offset is None:
+            self.logger.error(f"标签 {tab.title} 校准失败")
+            return
+        self.hwnd, self.coordDiff = tab.hwnd, tab.offset
+        auto_mount and self._mountFuture()
+
+    def _measure_offset(self, app):
+        """用 uia 计算 flash 区域相对窗口的偏移
+
+        :param app: pywinauto 连接
+        :return: (x, y), 找不到 flash 区域时返回 None
+        """
         mainWindow = app.MainWindow
         mainWindowRect = mainWindow.rectangle()
         self.logger.info(f"mainWindow窗口: {mainWindowRect}")
@@ -154,25 +316,25 @@ class Game:
         flashArea = self.getFlashDom(fightInfo)
         if not flashArea:
             self.logger.error("未找到flash区域")
-            return
+            return None
         flashAreaRect = flashArea.rectangle()
         self.logger.info(
             f"flash窗口: {flashAreaRect} | width:{flashAreaRect.right - flashAreaRect.left}、height:{flashAreaRect.bottom - flashAreaRect.top}"
         )
         # 得到偏移值
-        self.coordDiff = (
+        coordDiff = (
             flashAreaRect.left - contactAreaRect.left,
             flashAreaRect.top - contactAreaRect.top,
         )
-        self.logger.info(f"flash窗口到联系官方窗口位置偏移: {self.coordDiff}")
-        # 写入缓存
-        cached_json["coordDiff"] = self.coordDiff
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(cached_json, f, ensure_ascii=False, indent=2)
-            print(f"coordDiff: {self.coordDiff}, 已写入缓存文件")
+        self.logger.info(f"flash窗口到联系官方窗口位置偏移: {coordDiff}")
+        return coordDiff
 
-        # 挂载功能
-        self._mountFuture()
+    def connect(self):
+        """连接窗口(pywinauto uia)，只在需要计算位置时导入 pywinauto"""
+        from pywinauto import Application
+
+        with tracer.span("connect", "calibrate"):
+            return Application(backend="uia").connect(handle=self.hwnd)
 
     def getFlashDom(self, element):
         """获取falsh窗口"""
@@ -207,36 +369,114 @@ class Game:
 
         currentDir = os.path.dirname(os.path.abspath(__file__))
         baseConfigPath = os.path.join(currentDir, "..", "config", "base.json")
-        with open(baseConfigPath, "r", encoding="utf-8") as f:
-            config = json.load(f)
-            self.logger.info(f"加载配置文件: {baseConfigPath}")
+        config = _read_config(baseConfigPath)
+        self.logger.info(f"加载配置文件: {baseConfigPath}")
 
         if self.qq:
             try:
                 qqConfigPath = os.path.join(
                     currentDir, "..", "config", f"{self.qq}.json"
                 )
-                with open(qqConfigPath, "r", encoding="utf-8") as f:
-                    qqConfig = json.load(f)
-                    self.logger.info(f"加载配置文件: {qqConfigPath}")
-                    # 合并配置，覆盖 base 配置
-                    config = {**config, **qqConfig}
+                qqConfig = _read_config(qqConfigPath)
+                self.logger.info(f"加载配置文件: {qqConfigPath}")
+                # 合并配置，覆盖 base 配置(只复制第一层, 里面的内容共用)
+                config = {**config, **qqConfig}
             except FileNotFoundError:
                 self.logger.warning(f"未找到配置文件: {qqConfigPath}, 使用默认配置")
 
         self.config = config
 
-    def click_more(self, coord, times=10, interval=0.8):
+    def apply_config(self, patch: dict):
+        """运行中修改配置(控制接口推送), 已挂载的功能模块换成新配置, 功能下次读取配置时生效
+
+        :param patch: 要修改的部分, 比如: {"战争": {"聚义": {"time": 10}}}
+        """
+        self.config = merge_config(self.config, patch)
+        for name, (_, config_key) in FEATURES.items():
+            if name in self.__dict__:
+                self.__dict__[name].config = self.config.get(config_key, {})
+        if "util" in self.__dict__:
+            self.util.resource_config = self.config.get("资源", {})
+        self.logger.info(f"配置已更新: {patch}")
+
+    def run(self, routine: str, *args):
+        """按名称执行功能
+
+        :param routine: 功能名称, 比如: "Zhanzheng.juyi"、"click_more"
+        :param args: 功能参数
+        """
+        target = self
+        for name in routine.split("."):
+            target = getattr(target, name)
+
+        # 运行记录(见配置 "记录"), 空闲短任务嵌套执行时结束后恢复外层的记录
+        from .ledger import Run, get_ledger
+
+        ledger = get_ledger(self.config.get("记录"))
+        if ledger is None:
+            return target(*args)
+        from .idle import Preempted
+        from .recovery import RoutineAborted
+        from .supervisor import RoutineStopped
+
+        run = Run(self.qq, routine, list(args))
+        outer, self.util.run = self.util.run, run
+        try:
+            result = target(*args)
+            run.finish("ok")
+            return result
+        except Preempted:
+            run.finish("preempted")
+            raise
+        except RoutineStopped:
+            run.finish("stopped")
+            raise
+        except RoutineAborted as e:
+            run.finish("aborted", str(e))
+            raise
+        except Exception as e:
+            run.finish("failed", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            if run.status == "running":
+                run.finish("failed", "中断")
+            self.util.run = outer
+            ledger.add(run)
+
+    def click_more(self, coord, times=10, interval=0.8, resource: str = None):
         """连点器
 
         :param coord: 坐标, 比如: ("天机秘籍", 670, 380)
         :param times: 点击次数, 默认10次
         :param interval: 时间间隔，默认1s
+        :param resource: 消耗的资源名称(见配置 "资源"), 不足时提前结束
         """
+        from .resource import ResourceGuard
+
         printStr = self.qq + " | " if self.qq else ""
+        guard = ResourceGuard(
+            self.util,
+            self.logger,
+            self.util.resource_config,
+            [resource] if resource else [],
+            every=self.util.resource_config.get("检测间隔", 5),
+        )
         for i in range(times):
-            self.click_lt(coord)
-
-            print(f"{printStr}当前已连点: {i+1} 次 | 预计次数: {times}", end="\r")
-            time.sleep(interval)
-        print("")
+            if guard.exhausted(i):
+                guard.stop(times - i, 1)
+                break
+            # 走 util: 心跳、限速, 广播模式下同时点击多个窗口
+            self.util.click(coord)
+            if self.util.heartbeat:
+                self.util.heartbeat.progress(coord[0], i + 1, times)
+            if self.util.run:
+                self.util.run.progress(i + 1, times)
+            if self.util.heartbeat:
+                self.util.heartbeat.checkpoint()
+
+            self.util.echo(f"{printStr}当前已连点: {i+1} 次 | 预计次数: {times}")
+            # 走 util 的时钟: 模拟时不真的等待
+            with tracer.span(f"sleep {interval}s", "sleep"):
+                self.util.clock.sleep(interval)
+        self.util.console and print("")
+        guard.report(coord[0])
@@ -0,0 +1,194 @@
+"""
+全局点击限速: 所有进程的 Util 点击共用一个令牌桶(共享内存), 主进程按主机和浏览器内核进程的 cpu 自动调整速度
+多个账号同时点击时 CefSharp 渲染进程会占满 cpu, 游戏响应变慢, 固定的 sleep 就会错过, 限速后整体反而更快
+时间要求高的功能(比如集市)用 urgent 声明, 不用等令牌
+默认关闭(配置 "限速": {"开启": false}), 开启后所有点击都可能等令牌, 原来的点击节奏会变
+"""
+import ctypes
+import multiprocessing
+import time
+from multiprocessing.sharedctypes import RawValue
+
+# 需要采样 cpu 的进程(浏览器内核)
+RENDERERS = ["CefSharp.BrowserSubprocess.exe"]
+
+
+class Bucket(ctypes.Structure):
+    """共享内存中的令牌桶"""
+
+    _fields_ = [
+        ("tokens", ctypes.c_double),  # 当前令牌数(可以为负, 表示已预约)
+        ("updated", ctypes.c_double),  # 上次补充令牌的时间
+        ("rate", ctypes.c_double),  # 每秒补充的令牌数(点击速度)
+        ("burst", ctypes.c_double),  # 最多攒多少令牌
+        ("taken", ctypes.c_long),  # 累计点击次数
+        ("urgent", ctypes.c_long),  # 累计不等待的点击次数
+        ("waited", ctypes.c_double),  # 累计等待时间(秒)
+        ("load", ctypes.c_double),  # 最近一次采样的 cpu 负载
+    ]
+
+
+class Governor:
+    """跨进程令牌桶，主进程调用 tick 按 cpu 负载调整速度(加法增、乘法减)"""
+
+    def __init__(
+        self,
+        rate: float = 8,
+        burst: float = 4,
+        min_rate: float = 2,
+        max_rate: float = 30,
+        high: float = 85,
+        low: float = 60,
+        renderers: list = None,
+    ):
+        """
+        :param rate: 初始每秒点击数(全部进程合计)
+        :param burst: 最多连续点击多少次不等待
+        :param min_rate: 最低每秒点击数
+        :param max_rate: 最高每秒点击数
+        :param high: cpu 超过该值时降速
+        :param low: cpu 低于该值时提速
+        :param renderers: 需要采样 cpu 的进程名称
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.high = high
+        self.low = low
+        self.renderers = renderers or RENDERERS
+
+        self.state = RawValue(Bucket)
+        self.state.tokens = burst
+        self.state.updated = time.time()
+        self.state.rate = rate
+        self.state.burst = burst
+        self.lock = multiprocessing.Lock()
+        self._processes = {}  # pid -> psutil.Process(采样用, 只在主进程)
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """按配置里的 "限速" 创建
+
+        :param config: 比如: {"每秒点击": 8, "突发": 4, "最低": 2, "最高": 30, "高负载": 85, "低负载": 60}
+            渲染进程: 需要采样 cpu 的进程名称, 默认 CefSharp.BrowserSubprocess.exe
+        """
+        return cls(
+            config.get("每秒点击", 8),
+            config.get("突发", 4),
+            config.get("最低", 2),
+            config.get("最高", 30),
+            config.get("高负载", 85),
+            config.get("低负载", 60),
+            config.get("渲染进程"),
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_processes"] = {}
+        return state
+
+    def reserve(self, urgent: bool = False) -> float:
+        """取一个令牌
+
+        :param urgent: 不等待(仍然计入用量)
+        :return: 需要等待的秒数
+        """
+        state = self.state
+        with self.lock:
+            now = time.time()
+            state.tokens = min(
+                state.burst, state.tokens + (now - state.updated) * state.rate
+            )
+            state.updated = now
+            state.taken += 1
+            if urgent:
+                state.urgent += 1
+                state.tokens = max(state.tokens - 1, -state.burst)
+                return 0.0
+            state.tokens -= 1
+            wait = -state.tokens / state.rate if state.tokens < 0 else 0.0
+            state.waited += wait
+        return wait
+
+    def acquire(self, urgent: bool = False, sleep=time.sleep) -> float:
+        """取一个令牌，不够时等待
+
+        :param urgent: 不等待
+        :param sleep: 等待函数
+        :return: 等待的秒数
+        """
+        wait = self.reserve(urgent)
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    def adapt(self, load: float) -> float:
+        """按 cpu 负载调整速度
+
+        :param load: cpu 使用率(0~100)
+        :return: 调整后的每秒点击数
+        """
+        state = self.state
+        with self.lock:
+            state.load = load
+            if load >= self.high:
+                state.rate = max(self.min_rate, state.rate * 0.7)
+            elif load <= self.low:
+                state.rate = min(self.max_rate, state.rate + 1)
+            return state.rate
+
+    def sample(self) -> float:
+        """采样 cpu 负载: 主机整体和浏览器内核进程(折算成整机百分比)取较大值"""
+        import psutil
+
+        host = psutil.cpu_percent()
+        renderer = 0.0
+        alive = set()
+        for proc in psutil.process_iter(["name"]):
+            if proc.info["name"] not in self.renderers:
+                continue
+            alive.add(proc.pid)
+            # 第一次调用 cpu_percent 返回 0, 之后是两次调用之间的使用率
+            proc = self._processes.setdefault(proc.pid, proc)
+            try:
+                renderer += proc.cpu_percent()
+            except psutil.Error:
+                pass
+        for pid in set(self._processes) - alive:
+            del self._processes[pid]
+        return max(host, renderer / (psutil.cpu_count() or 1))
+
+    def tick(self) -> float:
+        """采样并调整速度(主进程定期调用)"""
+        return self.adapt(self.sample())
+
+    def report(self) -> str:
+        state = self.state
+        return " | ".join(
+            [
+                f"限速: {round(state.rate, 1)}次/s",
+                f"cpu: {round(state.load, 1)}%",
+                f"点击: {state.taken}",
+                f"不等待: {state.urgent}",
+                f"累计等待: {round(state.waited, 1)}s",
+            ]
+        )
+
+
+def _demo_clicker(governor: Governor, index: int):
+    for i in range(40):
+        governor.acquire(urgent=index == 0 and i % 10 == 0)
+
+
+if __name__ == "__main__":
+    # 模拟: 4 个进程各点 40 次, 速度 20次/s, 合计约 8s
+    governor = Governor(rate=20, burst=4)
+    start = time.time()
+    workers = [
+        multiprocessing.Process(target=_demo_clicker, args=(governor, i))
+        for i in range(4)
+    ]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    print(f"耗时: {round(time.time() - start, 2)}s | {governor.report()}")
@@ -160,3 +160,34 @@ class Hwnd:
         win32gui.EnumChildWindows(p_hwnd, fn, None)
 
         return targetHwnd
+
+    @classmethod
+    def find_all_hwndByTitle_p_child(self, pTitle: str, childTitle: str) -> List[int]:
+        """
+        查找全部符合条件的子窗口(多开时每个父窗口一个)
+
+        参数:
+            pTitle: 父窗口标题
+            childTitle: 子窗口标题
+
+        返回:
+            子窗口句柄列表
+        """
+        parents = []
+        result = []
+
+        def enum_parent(hwnd, _):
+            if win32gui.GetWindowText(hwnd) == pTitle:
+                parents.append(hwnd)
+            return True
+
+        def enum_child(hwnd, _):
+            if win32gui.GetWindowText(hwnd) == childTitle:
+                result.append(hwnd)
+            return True
+
+        win32gui.EnumWindows(enum_parent, None)
+        for p_hwnd in parents:
+            win32gui.EnumChildWindows(p_hwnd, enum_child, None)
+
+        return result
@@ -0,0 +1,120 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+
+class Preempted(Exception):
+    """空闲时间用完，短任务被打断"""
+
+
+@dataclass
+class ShortChore:
+    """可以插在空闲时间里的短任务"""
+
+    routine: str  # 功能名称, 比如: Other.xiShuXing1
+    args: list = field(default_factory=list)
+    duration: float = 10  # 预计耗时(秒)
+    enter: List[tuple] = field(default_factory=list)  # 进入该功能界面的点击
+    leave: List[tuple] = field(default_factory=list)  # 恢复原界面的点击
+    repeat: bool = True  # 做完后是否重新排队
+
+
+class IdleRuntime:
+    """单个窗口的空闲时间利用：长任务声明空闲时，从队列里取短任务来做，结束前恢复原界面"""
+
+    def __init__(self, game, chores: List[ShortChore], margin: float = 5):
+        """
+        :param game: 游戏实例
+        :param chores: 短任务队列
+        :param margin: 预留给恢复界面的时间(秒)
+        """
+        self.game = game
+        self.queue = deque(chores)
+        self.margin = margin
+        self.active = False
+        self.filled = 0.0  # 累计利用的空闲时间(秒)
+
+    @classmethod
+    def from_config(cls, game, config: dict):
+        """按配置里的 "空闲任务" 创建
+
+        :param game: 游戏实例
+        :param config: 比如: {"开启": true, "余量": 5, "任务": [...]}
+            任务: {"routine": ..., "args": [...], "duration": 12, "进入": [坐标], "离开": [坐标]}
+        """
+        chores = [
+            ShortChore(
+                item["routine"],
+                item.get("args", []),
+                item.get("duration", 10),
+                [tuple(c) for c in item.get("进入", [])],
+                [tuple(c) for c in item.get("离开", [])],
+                item.get("重复", True),
+            )
+            for item in config.get("任务", [])
+        ]
+        return cls(game, chores, config.get("余量", 5))
+
+    def _next(self, remaining: float):
+        """取一个放得下的短任务"""
+        for _ in range(len(self.queue)):
+            chore = self.queue.popleft()
+            if chore.duration + self.margin <= remaining:
+                return chore
+            self.queue.append(chore)
+        return None
+
+    def fill(self, seconds: float, sleep: Callable):
+        """用短任务填满一段空闲时间
+
+        :param seconds: 空闲时间(秒)
+        :param sleep: 没有短任务可做时的等待函数
+        """
+        from .recovery import RoutineAborted
+        from .supervisor import RoutineStopped
+
+        util = self.game.util
+        clock = util.clock
+        deadline = clock.time() + seconds
+        used = 0.0
+        self.active = True
+        try:
+            while True:
+                remaining = deadline - clock.time()
+                chore = self._next(remaining)
+                if chore is None:
+                    break
+
+                start = clock.time()
+                # 短任务里的等待超过 deadline 会抛出 Preempted
+                util.deadline = deadline - self.margin
+                try:
+                    for coord in chore.enter:
+                        util.click(coord)
+                    self.game.run(chore.routine, *chore.args)
+                except Preempted:
+                    self.game.logger.info(f"空闲时间用完, 打断: {chore.routine}")
+                except (RoutineAborted, RoutineStopped):
+                    # 弹窗要求中止(比如断线)或控制接口停止, 外层的长任务也要中止
+                    raise
+                except Exception as e:
+                    self.game.logger.error(f"空闲任务出错: {chore.routine}, {e}")
+                finally:
+                    util.deadline = None
+                    for coord in chore.leave:
+                        util.click(coord)
+
+                used += clock.time() - start
+                if chore.repeat:
+                    self.queue.append(chore)
+        finally:
+            self.active = False
+
+        if used:
+            self.filled += used
+            self.game.logger.info(
+                f"空闲 {round(seconds)}s, 已利用: {round(used)}s, 累计利用: {round(self.filled)}s"
+            )
+        remaining = deadline - clock.time()
+        if remaining > 0:
+            sleep(remaining)
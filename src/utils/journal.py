@@ -0,0 +1,129 @@
+import os
+import time
+from datetime import date
+
+
+class Journal:
+    """断点续跑日志：追加写入已完成次数，进程崩溃后从最后一次记录继续
+
+    文件格式(每行一条):
+        # 2026-01-01|100     运行标识(日期|预计次数)
+        1
+        2
+        done                 已全部完成
+    """
+
+    def __init__(
+        self,
+        qq: str,
+        routine: str,
+        total: int,
+        directory: str = "logs/journal",
+        sync_every: int = 10,
+        sync_interval: float = 5.0,
+        compact_size: int = 4096,
+    ):
+        """
+        :param qq: qq号
+        :param routine: 功能名称, 比如: juyi
+        :param total: 预计次数
+        :param directory: 日志目录
+        :param sync_every: 每写入多少条落盘一次
+        :param sync_interval: 最长多少秒落盘一次
+        :param compact_size: 文件超过多少字节时压缩
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{qq or 'default'}-{routine}.log")
+        self.key = f"{date.today().isoformat()}|{total}"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_size = compact_size
+
+        self.checkpoint = self._load()
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.time()
+
+    def _load(self) -> int:
+        """读取最后一次记录，运行标识不同或已完成则从头开始"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except FileNotFoundError:
+            return 0
+
+        if not lines or lines[0] != f"# {self.key}":
+            return 0
+
+        checkpoint = 0
+        # 最后一行可能只写了一半(没有换行)，忽略
+        for line in lines[1:-1]:
+            if line == "done":
+                return 0
+            if line.isdigit():
+                checkpoint = int(line)
+        return checkpoint
+
+    def resume(self) -> int:
+        """从哪一次开始(已完成次数)"""
+        return self.checkpoint
+
+    def _open(self):
+        if self._file:
+            return
+        if self.checkpoint == 0:
+            self._rewrite(0)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rewrite(self, checkpoint: int):
+        """原子地重写为: 运行标识 + 最后一次记录"""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"# {self.key}\n")
+            if checkpoint:
+                f.write(f"{checkpoint}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _sync(self, compact=True):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.time()
+
+        if compact and os.path.getsize(self.path) > self.compact_size:
+            self._file.close()
+            self._rewrite(self.checkpoint)
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def record(self, iteration: int):
+        """记录已完成次数
+
+        :param iteration: 已完成次数
+        """
+        self._open()
+        self.checkpoint = iteration
+        # 每条都写到系统缓冲(进程崩溃不丢)，批量 fsync(机器断电最多丢一批)
+        self._file.write(f"{iteration}\n")
+        self._file.flush()
+        self._pending += 1
+
+        if (
+            self._pending >= self.sync_every
+            or time.time() - self._last_sync >= self.sync_interval
+        ):
+            self._sync()
+
+    def finish(self):
+        """全部完成，下次从头开始"""
+        self._open()
+        self._file.write("done\n")
+        self._file.flush()
+        self.close(compact=False)
+
+    def close(self, compact=True):
+        """落盘并关闭(未完成时保留断点)"""
+        if self._file:
+            self._sync(compact)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,283 @@
+"""
+运行记录: 每次执行功能(账号、功能、开始/结束时间、预计/实际次数、失败原因、资源变化)写入本地 SQLite
+任务线程只把记录放进队列，后台线程批量写入，不等磁盘
+
+用法:
+    python utils/ledger.py              统计报告(每小时次数、平均每轮耗时、失败率)
+    python utils/ledger.py logs/a.db    指定数据库文件
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    qq TEXT NOT NULL,
+    routine TEXT NOT NULL,
+    args TEXT,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    planned INTEGER,
+    actual INTEGER,
+    status TEXT NOT NULL,
+    error TEXT,
+    resources TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_routine ON runs (qq, routine);
+"""
+
+COLUMNS = [
+    "qq",
+    "routine",
+    "args",
+    "started",
+    "ended",
+    "planned",
+    "actual",
+    "status",
+    "error",
+    "resources",
+]
+
+
+@dataclass
+class Run:
+    """一次功能执行"""
+
+    qq: str
+    routine: str
+    args: list = field(default_factory=list)
+    started: float = field(default_factory=time.time)
+    ended: float = 0.0
+    planned: int = 0  # 预计次数
+    actual: int = 0  # 实际次数
+    status: str = "running"  # ok、failed、aborted(弹窗中止)、preempted(空闲时间用完)、stopped(控制接口停止)
+    error: str = ""
+    resources: Dict[str, list] = field(default_factory=dict)  # 名称 -> [开始值, 结束值]
+
+    def progress(self, iteration: int, total: int):
+        """更新次数
+
+        :param iteration: 当前已执行次数
+        :param total: 预计次数
+        """
+        self.actual = iteration
+        self.planned = total
+
+    def observe(self, values: Dict[str, int]):
+        """记录读到的资源数量(第一次读到的作为开始值)"""
+        for name, value in values.items():
+            if name in self.resources:
+                self.resources[name][1] = value
+            else:
+                self.resources[name] = [value, value]
+
+    def finish(self, status: str, error: str = ""):
+        self.ended = time.time()
+        self.status = status
+        self.error = error
+
+    def row(self) -> tuple:
+        return (
+            self.qq,
+            self.routine,
+            json.dumps(self.args, ensure_ascii=False, default=str),
+            self.started,
+            self.ended,
+            self.planned,
+            self.actual,
+            self.status,
+            self.error,
+            json.dumps(self.resources, ensure_ascii=False) if self.resources else None,
+        )
+
+
+class Ledger:
+    """运行记录数据库，后台线程批量写入"""
+
+    def __init__(self, path: str = "logs/ledger.db", batch: int = 100, interval=2.0):
+        """
+        :param path: 数据库文件
+        :param batch: 每次最多写入多少条
+        :param interval: 最长多少秒写入一次
+        """
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.written = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 多个工作进程写同一个文件: WAL + 等待锁
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add(self, run: Run):
+        """添加一条记录(不阻塞)"""
+        self.queue.put(run.row())
+
+    def _writer(self):
+        conn = self._connect()
+        sql = f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while True:
+            rows = [self.queue.get()]
+            # 等一会凑够一批再写
+            deadline = time.time() + self.interval
+            while len(rows) < self.batch:
+                try:
+                    rows.append(self.queue.get(timeout=max(0, deadline - time.time())))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(sql, rows)
+                self.written += len(rows)
+            except sqlite3.Error as e:
+                print(f"运行记录写入失败({len(rows)}条): {e}")
+            # 写完(或失败)才算处理完, flush 等的是这里
+            for _ in rows:
+                self.queue.task_done()
+
+    def flush(self, timeout: float = 10):
+        """等待队列里的记录写完(进程结束前调用)"""
+        # queue.join 不能设超时, 放到线程里等
+        waiter = threading.Thread(target=self.queue.join, daemon=True)
+        waiter.start()
+        waiter.join(timeout)
+        if waiter.is_alive():
+            print(f"运行记录未写完: 剩余 {self.queue.qsize()} 条")
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger(config: dict = None) -> Optional[Ledger]:
+    """运行记录(同一进程共用)
+
+    :param config: 配置里的 "记录", 比如: {"开启": true, "文件": "logs/ledger.db"}
+    :return: 未开启时返回 None
+    """
+    global _ledger
+    config = config or {}
+    if _ledger is None and config.get("开启", False):
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = Ledger(
+                    config.get("文件", "logs/ledger.db"),
+                    config.get("批量", 100),
+                    config.get("间隔", 2.0),
+                )
+                atexit.register(_ledger.flush)
+    return _ledger
+
+
+def flush_ledger():
+    """写完当前进程的运行记录(工作进程退出时不会执行 atexit)"""
+    if _ledger is not None:
+        _ledger.flush()
+
+
+# ===== 统计查询 =====
+
+
+def _query(conn: sqlite3.Connection, sql: str, params=()) -> List[dict]:
+    cursor = conn.execute(sql, params)
+    names = [c[0] for c in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def runs_per_hour(conn: sqlite3.Connection, since: float = 0) -> List[dict]:
+    """每小时完成的次数(按功能)
+
+    :param since: 开始时间戳
+    """
+    return _query(
+        conn,
+        """
+        SELECT strftime('%Y-%m-%d %H:00', started, 'unixepoch', 'localtime') AS hour,
+               routine, COUNT(*) AS runs, SUM(actual) AS iterations
+        FROM runs WHERE started >= ?
+        GROUP BY hour, routine ORDER BY hour, routine
+        """,
+        (since,),
+    )
+
+
+def cycle_times(conn: sqlite3.Connection, since: float = 0) -> List[dict]:
+    """每个账号、功能的平均每轮耗时(秒)"""
+    return _query(
+        conn,
+        """
+        SELECT qq, routine, COUNT(*) AS runs,
+               ROUND(SUM(ended - started) / NULLIF(SUM(actual), 0), 2) AS cycle,
+               ROUND(AVG(ended - started), 1) AS duration,
+               ROUND(AVG(CAST(actual AS REAL) / NULLIF(planned, 0)), 2) AS completion
+        FROM runs WHERE started >= ?
+        GROUP BY qq, routine ORDER BY qq, routine
+        """,
+        (since,),
+    )
+
+
+def failure_rates(conn: sqlite3.Connection, since: float = 0) -> List[dict]:
+    """每个账号、功能的失败率(failed、aborted 算失败)"""
+    return _query(
+        conn,
+        """
+        SELECT qq, routine, COUNT(*) AS runs,
+               SUM(status IN ('failed', 'aborted')) AS failures,
+               ROUND(AVG(status IN ('failed', 'aborted')), 3) AS rate
+        FROM runs WHERE started >= ?
+        GROUP BY qq, routine ORDER BY rate DESC, runs DESC
+        """,
+        (since,),
+    )
+
+
+def _print_table(title: str, rows: List[dict]):
+    print(f"===== {title} =====")
+    if not rows:
+        print("(无记录)")
+        return
+    names = list(rows[0])
+    widths = [
+        max(len(str(n)), *(len(str(r[n])) for r in rows)) for n in names
+    ]
+    print(" | ".join(str(n).ljust(w) for n, w in zip(names, widths)))
+    for r in rows:
+        print(" | ".join(str(r[n]).ljust(w) for n, w in zip(names, widths)))
+
+
+def report(path: str = "logs/ledger.db", since: float = 0):
+    """打印统计报告"""
+    conn = sqlite3.connect(path)
+    try:
+        _print_table("每小时完成次数", runs_per_hour(conn, since))
+        _print_table("平均每轮耗时(秒)", cycle_times(conn, since))
+        _print_table("失败率", failure_rates(conn, since))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    report(sys.argv[1] if len(sys.argv) > 1 else "logs/ledger.db")
@@ -0,0 +1,228 @@
+"""
+日志: 按大小和时间切分并压缩, 高频点击定期汇总
+
+多进程: 只有主进程写文件(切分时不会有多个进程同时改名, 点击汇总不会因为工作进程被结束而丢失)
+    主进程: setup_logging 配置 game.log, Supervisor 用 LogWriter 接收工作进程发来的日志
+    工作进程: forward_logs 之后 create_handler 返回 ForwardHandler, 日志记录连同目标文件发给主进程
+"""
+import gzip
+import logging
+import os
+import shutil
+import time
+from logging.handlers import QueueHandler, TimedRotatingFileHandler
+
+FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+
+# 工作进程: 日志发给主进程的队列(forward_logs 设置)
+_forward = None
+# 已创建的 handler: 文件 -> handler, 同一个文件只有一个 handler 在切分
+_handlers = {}
+
+
+class RotatingLogHandler(TimedRotatingFileHandler):
+    """按时间和大小切分的日志文件，切出来的旧文件 gzip 压缩"""
+
+    def __init__(
+        self, filename: str, max_bytes: int, backup_count: int, when: str = "midnight"
+    ):
+        """
+        :param filename: 日志文件
+        :param max_bytes: 单文件最大字节数, 0 为不限
+        :param backup_count: 保留的旧文件个数
+        :param when: 按时间切分的周期, 见 TimedRotatingFileHandler
+        """
+        super().__init__(filename, when, backupCount=backup_count, encoding="utf-8")
+        self.max_bytes = max_bytes
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._gzip
+
+    @staticmethod
+    def _gzip(source: str, dest: str):
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def shouldRollover(self, record) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        # 同一时间段内多次按大小切分时，文件名加上序号避免覆盖
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = int(time.time())
+        suffix = time.strftime(self.suffix, time.localtime(now))
+        base = f"{self.baseFilename}.{suffix}"
+        index = 0
+        while os.path.exists(self.rotation_filename(f"{base}.{index}")):
+            index += 1
+        self.rotate(self.baseFilename, self.rotation_filename(f"{base}.{index}"))
+        for old in self.getFilesToDelete():
+            os.remove(old)
+
+        self.rolloverAt = self.computeRollover(now)
+        if not self.delay:
+            self.stream = self._open()
+
+    def getFilesToDelete(self) -> list:
+        directory, base = os.path.split(self.baseFilename)
+        files = sorted(
+            (
+                os.path.join(directory, name)
+                for name in os.listdir(directory)
+                if name.startswith(base + ".") and name.endswith(".gz")
+            ),
+            key=os.path.getmtime,
+        )
+        if len(files) <= self.backupCount:
+            return []
+        return files[: len(files) - self.backupCount]
+
+
+class ClickAggregateHandler(logging.Handler):
+    """合并高频点击日志：同一个按钮的点击定期汇总成一行，其它日志原样输出"""
+
+    def __init__(self, target: logging.Handler, interval: float = 60):
+        """
+        :param target: 实际写日志的 handler
+        :param interval: 汇总间隔(秒)
+        """
+        super().__init__(target.level)
+        self.target = target
+        self.interval = interval
+        self.clicks = {}  # 按钮名称 -> [次数, 第一次时间, 最后一次时间]
+        self._flushed = time.time()
+
+    def emit(self, record: logging.LogRecord):
+        click = getattr(record, "click", None)
+        if click is None or record.levelno >= logging.WARNING:
+            self.target.handle(record)
+        else:
+            stat = self.clicks.get(click)
+            if stat is None:
+                self.clicks[click] = [1, record.created, record.created]
+            else:
+                stat[0] += 1
+                stat[2] = record.created
+
+        if time.time() - self._flushed >= self.interval:
+            self.flush_clicks(record.name)
+
+    def flush_clicks(self, name: str = "click"):
+        """输出点击汇总"""
+        self._flushed = time.time()
+
+        def fmt(t):
+            return time.strftime("%H:%M:%S", time.localtime(t))
+
+        for click, (count, first, last) in self.clicks.items():
+            span = last - first
+            rate = round(count / span, 2) if span > 0 else count
+            message = " | ".join(
+                [
+                    f"点击汇总: {click}",
+                    f"次数: {count}",
+                    f"频率: {rate}次/s",
+                    f"{fmt(first)} ~ {fmt(last)}",
+                ]
+            )
+            self.target.handle(
+                logging.LogRecord(name, logging.INFO, "", 0, message, None, None)
+            )
+        self.clicks.clear()
+
+    def close(self):
+        self.flush_clicks()
+        self.target.close()
+        super().close()
+
+
+class ForwardHandler(QueueHandler):
+    """工作进程: 把日志记录连同目标文件和配置发给主进程写"""
+
+    def __init__(self, queue, filename: str, config: dict = None):
+        super().__init__(queue)
+        self.filename = filename
+        self.config = config
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 不设置 formatter: 只合并 message 和异常, 时间、级别由主进程格式化
+        record = super().prepare(record)
+        record.log_file = self.filename
+        record.log_config = self.config
+        return record
+
+
+class LogWriter(logging.Handler):
+    """主进程: 按记录里的目标文件写入工作进程发来的日志(配合 QueueListener)"""
+
+    def emit(self, record: logging.LogRecord):
+        handler = create_handler(record.log_file, record.log_config)
+        if record.levelno >= handler.level:
+            handler.handle(record)
+
+
+def forward_logs(queue):
+    """工作进程: 之后创建的日志 handler 都发给主进程(见 LogWriter)
+
+    :param queue: multiprocessing.Queue
+    """
+    global _forward
+    _forward = queue
+    # fork 出来的进程继承了主进程的文件 handler, 去掉后重新创建(发给主进程)
+    loggers = [logging.getLogger(), *logging.Logger.manager.loggerDict.values()]
+    for logger in loggers:
+        for handler in list(getattr(logger, "handlers", [])):
+            if handler in _handlers.values():
+                logger.removeHandler(handler)
+    _handlers.clear()
+
+
+def create_handler(filename: str, config: dict = None) -> logging.Handler:
+    """创建日志 handler, 同一个文件只创建一次
+
+    :param filename: 日志文件
+    :param config: 日志配置, 见 base.json 的 "日志"
+    """
+    config = config or {}
+    if filename in _handlers:
+        return _handlers[filename]
+    if _forward is not None:
+        handler = ForwardHandler(_forward, filename, config)
+        handler.setLevel(config.get("级别", "DEBUG"))
+        _handlers[filename] = handler
+        return handler
+
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    handler = RotatingLogHandler(
+        filename,
+        int(config.get("单文件大小MB", 10) * 1024 * 1024),
+        config.get("保留个数", 5),
+        config.get("切分周期", "midnight"),
+    )
+    handler.setFormatter(logging.Formatter(FORMAT))
+
+    if config.get("汇总点击", True):
+        handler = ClickAggregateHandler(handler, config.get("汇总间隔", 60))
+        handler.setFormatter(logging.Formatter(FORMAT))
+    handler.setLevel(config.get("级别", "DEBUG"))
+    _handlers[filename] = handler
+    return handler
+
+
+def setup_logging(filename: str = "logs/game.log", config: dict = None):
+    """配置根日志器(替代 logging.basicConfig), 主进程启动时和工作进程 forward_logs 之后调用"""
+    root = logging.getLogger()
+    if any(getattr(h, "log_file", None) == filename for h in root.handlers):
+        return
+    handler = create_handler(filename, config)
+    handler.log_file = filename
+    root.addHandler(handler)
+    root.setLevel((config or {}).get("级别", "DEBUG"))
@@ -0,0 +1,151 @@
+"""
+工作进程内存报告: 按模块(映射的 dll/pyd/so 和堆)拆分 RSS, 以及整个进程的 USS(独占内存)
+USS 是结束该进程能释放的内存, 账号多的时候主要看它
+
+用法:
+    python utils/memory.py          对比 精简之前(BASELINE_COMMIT) / 现在 只跑聚义的工作进程导入后的 USS
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+# 精简导入之前的提交, 从 git 导出后在它自己的代码里测量
+BASELINE_COMMIT = "5271c39"
+# 精简之前工作进程(spawn 重新导入 index.py)加载的模块: index.py 的顶层导入
+# utils 导入了 game(全部功能模块)、hwnd(win32gui、psutil、pygetwindow)、util(win32api)
+BASELINE_IMPORTS = ["utils", "pywinauto"]
+
+# 现在只跑聚义的工作进程: index.py、工作进程入口、聚义模块
+SLIM_IMPORTS = ["index", "utils.supervisor", "future.zhanzheng"]
+
+
+def _module_name(path: str) -> str:
+    """映射文件路径对应的模块名, 比如 .../site-packages/cv2/cv2.pyd -> cv2"""
+    if not path or path.startswith("["):
+        return "堆/匿名内存"
+    parts = path.replace("\\", "/").split("/")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            index = parts.index(marker) + 1
+            if index < len(parts):
+                name = parts[index]
+                # numpy.libs、opencv_python.libs 之类的依赖库归到主模块
+                return name.split(".")[0].split("-")[0]
+    return os.path.basename(path)
+
+
+def process_memory(pid: int = None, top: int = 8) -> dict:
+    """进程内存(MB), 按模块拆分 RSS
+
+    :param pid: 进程号, 默认当前进程
+    :param top: 保留占用最多的几个模块
+    :return: {"rss": 120.5, "uss": 80.1, "modules": [("cv2", 40.2), ...]}
+    """
+    import psutil
+
+    process = psutil.Process(pid)
+    full = process.memory_full_info()
+    mapped = defaultdict(float)
+    try:
+        for item in process.memory_maps(grouped=True):
+            mapped[_module_name(item.path)] += item.rss / 1024 / 1024
+    except (psutil.AccessDenied, NotImplementedError):
+        pass
+
+    # 没有对应文件的部分(python 对象、numpy 数组等)
+    heap = full.rss / 1024 / 1024 - sum(mapped.values())
+    if heap > 0:
+        mapped["堆/匿名内存"] += heap
+
+    modules = sorted(mapped.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "rss": round(full.rss / 1024 / 1024, 1),
+        "uss": round(full.uss / 1024 / 1024, 1),
+        "modules": [(name, round(size, 1)) for name, size in modules[:top]],
+    }
+
+
+def format_memory(memory: dict) -> str:
+    """一行显示, 比如: rss: 120.5MB | uss: 80.1MB | cv2 40.2, python311.dll 5.1"""
+    modules = ", ".join(f"{name} {size}" for name, size in memory["modules"])
+    return f"rss: {memory['rss']}MB | uss: {memory['uss']}MB | {modules}"
+
+
+_IMPORT_SCRIPT = """
+import importlib, json, sys, psutil
+process = psutil.Process()
+result = [("python", process.memory_full_info().uss)]
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except Exception as e:
+        print(f"{name}: {e}", file=sys.stderr)
+    result.append((name, process.memory_full_info().uss))
+print(json.dumps(result))
+"""
+
+
+def measure_imports(
+    modules: List[str], src: str = None, cwd: str = None
+) -> Dict[str, float]:
+    """在新进程里依次导入模块，测量每个模块增加的 USS(MB)
+
+    :param modules: 模块列表(按顺序导入, 后面的只计算增量)
+    :param src: 导入的根目录, 默认 src
+    :param cwd: 运行目录, 默认同 src
+    :return: {"python": 基础占用, 模块名: 增量, ..., "合计": 总占用}
+    """
+    src = src or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    completed = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT, *modules],
+        cwd=cwd or src,
+        env=dict(os.environ, PYTHONPATH=os.path.abspath(src)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # 导入失败的模块(比如不在 windows 上没有 win32api)只算到失败之前, 结果偏小
+    if completed.stderr.strip():
+        print(f"导入出错, 结果不完整:\n{completed.stderr.strip()}", file=sys.stderr)
+    samples = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    result = {"python": round(samples[0][1] / 1024 / 1024, 1)}
+    for (_, before), (name, after) in zip(samples, samples[1:]):
+        result[name] = round((after - before) / 1024 / 1024, 1)
+    result["合计"] = round(samples[-1][1] / 1024 / 1024, 1)
+    return result
+
+
+def export_commit(commit: str = BASELINE_COMMIT) -> str:
+    """导出提交的代码到临时目录
+
+    :return: 导出的仓库根目录(原来的代码在根目录运行, 日志写到 logs/)
+    """
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+    archive = subprocess.run(
+        ["git", "archive", commit], cwd=root, capture_output=True, check=True
+    ).stdout
+    directory = tempfile.mkdtemp(prefix=f"{commit}-")
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return directory
+
+
+if __name__ == "__main__":
+    baseline = export_commit()
+    full = measure_imports(BASELINE_IMPORTS, os.path.join(baseline, "src"), baseline)
+    slim = measure_imports(SLIM_IMPORTS)
+    for title, result in ((f"精简之前({BASELINE_COMMIT})", full), ("现在", slim)):
+        print(f"===== {title} =====")
+        for name, size in result.items():
+            print(f"{name:>20} | {size}MB")
+    print(
+        f"每个工作进程 USS 减少: {round(full['合计'] - slim['合计'], 1)}MB"
+        f" ({full['合计']}MB -> {slim['合计']}MB)"
+    )
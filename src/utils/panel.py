@@ -0,0 +1,223 @@
+"""
+状态面板: 主进程按固定频率读取共享内存里的账号状态槽(见 utils/supervisor.py 的 Slot), 原地刷新一张全部账号的表
+    工作进程只写槽(功能、次数、预计完成时间、最后错误), 不再往终端输出进度, 多个进程的 \\r 进度行不会互相覆盖
+    读槽不加锁, 偶尔读到写了一半的数据只影响这一帧
+
+配置 "监控": {"终端输出": true, "状态面板": {"开启": false, "刷新间隔": 1}}
+    开启状态面板时工作进程的进度输出自动关闭
+
+演示(在 src 下, 3 个假账号):
+    python -m utils.panel
+"""
+import os
+import sys
+import threading
+import time
+import unicodedata
+from typing import Callable, List
+
+from .supervisor import PAUSE
+
+# 光标回到左上角并清除到屏幕末尾, 比整屏清除闪烁少
+_HOME = "\x1b[H\x1b[J"
+
+COLUMNS = [
+    ("账号", 12),
+    ("进程", 6),
+    ("功能", 12),
+    ("进度", 11),
+    ("用时", 7),
+    ("剩余", 7),
+    ("心跳", 7),
+    ("状态", 8),
+    ("最后错误", 40),
+]
+
+
+def _width(text: str) -> int:
+    """终端显示宽度(汉字占两格)"""
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+
+def _cell(text: str, width: int) -> str:
+    """截断并补齐到显示宽度"""
+    if _width(text) > width:
+        while _width(text) > width - 1:
+            text = text[:-1]
+        text += "…"
+    return text + " " * (width - _width(text))
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class StatusPanel:
+    """全部账号的状态表(主进程里唯一输出进度的地方)"""
+
+    def __init__(
+        self,
+        board,
+        qqs: List[str],
+        interval: float = 1,
+        stream=None,
+        footer: Callable[[], List[str]] = None,
+    ):
+        """
+        :param board: 共享内存 Slot 数组(Supervisor.board)
+        :param qqs: 每个槽对应的账号
+        :param interval: 刷新间隔(秒)
+        :param stream: 输出位置, 默认标准输出
+        :param footer: 表格下面的附加行(限速状态、重启消息等)
+        """
+        self.board = board
+        self.qqs = qqs
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.footer = footer
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_supervisor(cls, supervisor, config: dict):
+        """按配置里的 "监控.状态面板" 创建
+
+        :param supervisor: 进程监控
+        :param config: 比如: {"开启": true, "刷新间隔": 1}
+        """
+
+        def footer():
+            lines = []
+            if supervisor.governor:
+                lines.append(supervisor.governor.report())
+            for at, message in supervisor.events:
+                lines.append(f"{time.strftime('%H:%M:%S', time.localtime(at))} {message}")
+            return lines
+
+        return cls(
+            supervisor.board,
+            [option.game.qq for option in supervisor.options],
+            config.get("刷新间隔", 1),
+            footer=footer,
+        )
+
+    def _state(self, slot, now: float) -> str:
+        if slot.done:
+            return "完成"
+        if slot.control == PAUSE:
+            return "已暂停"
+        if slot.urgent:
+            return "关键步骤"
+        if slot.heartbeat > now:
+            return "等待中"
+        return "运行中"
+
+    def row(self, index: int, now: float) -> List[str]:
+        """一个账号的各列"""
+        slot = self.board[index]
+        routine = slot.routine.decode("utf-8", errors="ignore")
+        error = slot.error.decode("utf-8", errors="ignore")
+        if error:
+            error = f"{_duration(now - slot.failed)}前 {error}"
+        # 完成的账号用时停在最后一次心跳
+        end = slot.heartbeat if slot.done else now
+        return [
+            self.qqs[index],
+            f"w{slot.worker}",
+            routine or "-",
+            f"{slot.iteration}/{slot.total}" if routine else "-",
+            _duration(end - slot.started) if routine else "-",
+            _duration(slot.eta - now) if slot.eta and not slot.done else "-",
+            # 长时间等待时心跳在未来, 显示还要等多久
+            f"+{_duration(slot.heartbeat - now)}"
+            if slot.heartbeat > now
+            else _duration(now - slot.heartbeat),
+            self._state(slot, now),
+            error or "-",
+        ]
+
+    def render(self, now: float = None) -> str:
+        """当前状态表"""
+        now = time.time() if now is None else now
+        rows = [[name for name, _ in COLUMNS]]
+        rows += [self.row(i, now) for i in range(len(self.qqs))]
+        lines = [
+            " ".join(_cell(text, width) for text, (_, width) in zip(row, COLUMNS))
+            for row in rows
+        ]
+        done = sum(1 for slot in self.board if slot.done)
+        lines.insert(
+            0,
+            f"状态面板 | {time.strftime('%H:%M:%S', time.localtime(now))}"
+            f" | 账号: {len(self.qqs)} | 已完成: {done}",
+        )
+        if self.footer:
+            lines += self.footer()
+        return "\n".join(line.rstrip() for line in lines)
+
+    def draw(self):
+        self.stream.write(_HOME + self.render() + "\n")
+        self.stream.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.draw()
+
+    def start(self) -> "StatusPanel":
+        """后台线程按刷新间隔重画"""
+        if os.name == "nt":
+            # 打开 windows 终端的 ansi 转义支持
+            os.system("")
+        self.draw()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止刷新并画最后一帧"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+            self.draw()
+
+
+def _demo():
+    """3 个假账号各一个线程上报进度, 面板刷新 5 秒"""
+    from multiprocessing.sharedctypes import RawArray
+
+    from .supervisor import Heartbeat, Slot
+
+    qqs = ["2548918215", "2468659059", "3305194332"]
+    board = RawArray(Slot, len(qqs))
+    panel = StatusPanel(board, qqs, 0.5)
+
+    def account(index: int, routine: str, total: int, each: float):
+        heartbeat = Heartbeat(board, index)
+        heartbeat.slot.worker = index // 2
+        for i in range(1, total + 1):
+            time.sleep(each)
+            heartbeat.progress(routine, i, total)
+            if routine == "猎魂" and i == 3:
+                heartbeat.error("RoutineAborted: 背包已满")
+        heartbeat.done()
+
+    threads = [
+        threading.Thread(target=account, args=args, daemon=True)
+        for args in [(0, "聚义", 20, 0.2), (1, "猎魂", 8, 0.5), (2, "洗属性", 50, 0.12)]
+    ]
+    panel.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    panel.stop()
+
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,237 @@
+import cProfile
+import glob
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+# line-profiler 需要关注的热点函数(模块路径, 属性路径)
+HOT_FUNCTIONS = [
+    ("utils.util", "Util.click"),
+    ("utils.util", "Util.bg_click"),
+    ("utils.util", "Util.capture"),
+    ("utils.vision", "match_template"),
+    ("utils.vision", "DigitReader.read_many"),
+    ("future.futureBase", "Base.sleep"),
+    ("future.futureBase", "Base._progress"),
+    ("future.zhanzheng", "Zhanzheng.juyi"),
+]
+
+
+@dataclass
+class ProfileOptions:
+    """性能分析选项"""
+
+    cpu: bool = False  # cProfile
+    line: bool = False  # line-profiler(热点函数逐行)
+    memory: bool = False  # tracemalloc 内存分配
+    directory: str = "logs/profile"
+    hot_functions: List[tuple] = field(default_factory=lambda: list(HOT_FUNCTIONS))
+
+    @property
+    def enabled(self) -> bool:
+        return self.cpu or self.line or self.memory
+
+
+def _resolve(module: str, attr: str):
+    import importlib
+
+    target = importlib.import_module(module)
+    for name in attr.split("."):
+        target = getattr(target, name)
+    return target
+
+
+# python3.12 起 cProfile 基于 sys.monitoring, 同一进程只能有一个, 且覆盖所有线程
+_SHARED_CPU = sys.version_info >= (3, 12)
+# tracemalloc 的快照也是整个进程的, 同样由最后一个线程写 {pid}.snapshot
+_shared = {"profiler": None, "users": 0, "memory": 0}
+_shared_lock = threading.Lock()
+
+
+class ProfiledTarget:
+    """包装任务函数: 账号线程的 cProfile / line-profiler, 进程内 tracemalloc
+    结果在账号任务结束或工作进程收到停止信号时写入 directory, 可以被 pickle 传给子进程
+    """
+
+    def __init__(self, target: Callable, options: ProfileOptions):
+        """
+        :param target: 任务函数, 参数为 option
+        :param options: 性能分析选项
+        """
+        self.target = target
+        self.options = options
+
+    def __call__(self, option):
+        options = self.options
+        os.makedirs(options.directory, exist_ok=True)
+        qq = option.game.qq or option.game.hwnd
+        path = os.path.join(options.directory, f"{qq}-{os.getpid()}")
+
+        line = self._line_profiler() if options.line else None
+        if options.memory:
+            with _shared_lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(10)
+                _shared["memory"] += 1
+
+        line and line.enable_by_count()
+        cpu = self._cpu_start() if options.cpu else None
+        owner = threading.get_ident()
+        once = threading.Lock()
+
+        def dump():
+            # 任务结束和停止信号只写一次(控制模式下任务不会结束)
+            if not once.acquire(blocking=False):
+                return
+            if options.cpu:
+                self._cpu_stop(cpu, path, threading.get_ident() == owner)
+            if line:
+                line.disable_by_count()
+                line.dump_stats(path + ".lprof")
+            if options.memory:
+                self._memory_stop()
+
+        from .supervisor import on_shutdown
+
+        on_shutdown(dump)
+        try:
+            return self.target(option)
+        finally:
+            dump()
+
+    @staticmethod
+    def _cpu_start():
+        if not _SHARED_CPU:
+            cpu = cProfile.Profile()
+            cpu.enable()
+            return cpu
+
+        # 进程内共用一个, 第一个线程开启, 最后一个线程写文件
+        with _shared_lock:
+            if _shared["profiler"] is None:
+                _shared["profiler"] = cProfile.Profile()
+                _shared["profiler"].enable()
+            _shared["users"] += 1
+        return None
+
+    def _cpu_stop(self, cpu, path: str, owner: bool = True):
+        """
+        :param owner: 是否在开启分析的线程里, 其它线程(停止信号)里 disable 无效, 直接取当前统计
+        """
+        if cpu:
+            if owner:
+                cpu.disable()
+            cpu.snapshot_stats()
+            with open(path + ".prof", "wb") as f:
+                marshal.dump(cpu.stats, f)
+            return
+
+        with _shared_lock:
+            _shared["users"] -= 1
+            if _shared["users"] > 0:
+                return
+            cpu, _shared["profiler"] = _shared["profiler"], None
+        cpu.disable()
+        cpu.dump_stats(os.path.join(self.options.directory, f"{os.getpid()}.prof"))
+
+    def _memory_stop(self):
+        with _shared_lock:
+            _shared["memory"] -= 1
+            if _shared["memory"] > 0:
+                return
+        path = os.path.join(self.options.directory, f"{os.getpid()}.snapshot")
+        tracemalloc.take_snapshot().dump(path)
+
+    def _line_profiler(self):
+        try:
+            from line_profiler import LineProfiler
+        except ImportError:
+            print("未安装 line-profiler, 跳过逐行分析")
+            return None
+
+        profiler = LineProfiler()
+        for module, attr in self.options.hot_functions:
+            try:
+                profiler.add_function(_resolve(module, attr))
+            except (ImportError, AttributeError) as e:
+                print(f"line-profiler 找不到函数: {module}.{attr} | {e}")
+        return profiler
+
+
+def merge_profiles(directory: str = "logs/profile", top: int = 30) -> str:
+    """合并所有进程的分析结果，输出汇总报告(top 函数、内存分配位置)
+
+    :param directory: 分析结果目录
+    :param top: 每项显示多少行
+    :return: 报告内容, 同时写入 directory/report.txt
+    """
+    output = io.StringIO()
+
+    # 1.cProfile
+    files = glob.glob(os.path.join(directory, "*.prof"))
+    if files:
+        stats = pstats.Stats(*files, stream=output)
+        stats.dump_stats(os.path.join(directory, "merged.pstats"))
+        output.write(f"===== cProfile: {len(files)} 个文件, 按累计耗时 =====\n")
+        stats.sort_stats("cumulative").print_stats(top)
+        output.write("===== cProfile: 按自身耗时 =====\n")
+        stats.sort_stats("tottime").print_stats(top)
+
+    # 2.line-profiler
+    files = glob.glob(os.path.join(directory, "*.lprof"))
+    if files:
+        from line_profiler import load_stats, show_text
+
+        timings = {}
+        unit = None
+        for path in files:
+            line_stats = load_stats(path)
+            unit = line_stats.unit
+            for key, lines in line_stats.timings.items():
+                merged = timings.setdefault(key, {})
+                for lineno, hits, cost in lines:
+                    old = merged.get(lineno, (0, 0))
+                    merged[lineno] = (old[0] + hits, old[1] + cost)
+        timings = {
+            key: [(lineno, hits, cost) for lineno, (hits, cost) in sorted(v.items())]
+            for key, v in timings.items()
+        }
+        output.write(f"===== line-profiler: {len(files)} 个文件 =====\n")
+        show_text(timings, unit, stream=output, stripzeros=True)
+
+    # 3.tracemalloc
+    files = glob.glob(os.path.join(directory, "*.snapshot"))
+    if files:
+        sizes = {}
+        for path in files:
+            snapshot = tracemalloc.Snapshot.load(path)
+            for stat in snapshot.statistics("lineno"):
+                frame = stat.traceback[0]
+                key = f"{frame.filename}:{frame.lineno}"
+                size, count = sizes.get(key, (0, 0))
+                sizes[key] = (size + stat.size, count + stat.count)
+        output.write(f"===== tracemalloc: {len(files)} 个文件, 分配位置 =====\n")
+        ranked = sorted(sizes.items(), key=lambda item: item[1][0], reverse=True)
+        for key, (size, count) in ranked[:top]:
+            output.write(f"{round(size / 1024, 1):>10} KiB | {count:>8} 块 | {key}\n")
+
+    report = output.getvalue()
+    if report:
+        with open(os.path.join(directory, "report.txt"), "w", encoding="utf-8") as f:
+            f.write(report)
+        print(report)
+        print(f"性能分析报告: {os.path.join(directory, 'report.txt')}")
+    return report
+
+
+def reset_profiles(directory: str = "logs/profile"):
+    """清空上一次运行的分析结果"""
+    for pattern in ("*.prof", "*.lprof", "*.snapshot"):
+        for path in glob.glob(os.path.join(directory, pattern)):
+            os.remove(path)
@@ -0,0 +1,146 @@
+"""
+意外弹窗检测与恢复, 弹窗列表见 coords/popups.py
+
+模板要从游戏截图里截(坐标和 coords 一致), 比如录制的截图里 系统公告 的标题栏在 (310, 70) 宽 250 高 44:
+    python -m utils.recovery crop 截图.png 系统公告 310 70 250 44   (在 src 下)
+    写入 assets/popups/系统公告.png, 之后重新打包资源(python utils/assets.py build)
+"""
+import os
+from collections import Counter
+from logging import Logger
+from typing import Callable, List
+
+from .clock import REAL
+
+
+class RoutineAborted(Exception):
+    """遇到无法恢复的弹窗，中止当前功能"""
+
+
+class Recovery:
+    """意外弹窗检测与恢复：在步骤之间截图比对已知弹窗，执行对应处理"""
+
+    def __init__(
+        self,
+        capture: Callable,
+        click: Callable,
+        catalogue: List[tuple],
+        logger: Logger,
+        threshold: float = 0.85,
+        interval: float = 0,
+        retries: int = 3,
+        clock=REAL,
+    ):
+        """
+        :param capture: 截图函数, 返回 BGR 图片(坐标和 coords 一致)
+        :param click: 点击函数, 参数为坐标 ("名称", x, y)
+        :param catalogue: 弹窗列表, 见 coords/popups.py
+        :param logger: 日志
+        :param threshold: 模板相似度阈值
+        :param interval: 两次检测的最小间隔(秒)
+        :param retries: 处理后弹窗仍在时的重试次数
+        :param clock: 时钟(和功能代码用同一个, 模拟时用虚拟时钟)
+        """
+        self.capture = capture
+        self.click = click
+        self.logger = logger
+        self.threshold = threshold
+        self.interval = interval
+        self.retries = retries
+        self.clock = clock
+        self.counts = Counter()
+        self._last_check = 0.0
+
+        # 图像识别(numpy)在开启弹窗检测时才导入, 功能模块只用到 RoutineAborted
+        from .vision import load_template
+
+        # 没有模板图片的弹窗不检测
+        self.catalogue = []
+        for popup in catalogue:
+            template = load_template(popup[1])
+            if template is None:
+                logger.warning(f"弹窗模板不存在, 跳过检测: {popup[1]}")
+                continue
+            self.catalogue.append((popup, template))
+
+    def detect(self, frame):
+        """识别当前截图中的弹窗
+
+        :param frame: 截图
+        :return: 弹窗配置, 没有则返回 None
+        """
+        from .vision import match_template
+
+        for popup, template in self.catalogue:
+            score, _ = match_template(frame, template, popup[2])
+            if score >= self.threshold:
+                return popup
+        return None
+
+    def check(self, frame=None) -> bool:
+        """检测并处理弹窗
+
+        :param frame: 截图, 默认实时截图
+        :return bool: 是否处理过弹窗
+        :raise RoutineAborted: 弹窗要求中止或处理后仍然存在
+        """
+        if not self.catalogue:
+            return False
+        if frame is None:
+            now = self.clock.time()
+            if now - self._last_check < self.interval:
+                return False
+            self._last_check = now
+            frame = self.capture()
+
+        popup = self.detect(frame)
+        if popup is None:
+            return False
+
+        name, _, _, action, then = popup
+        self.counts[name] += 1
+        self.logger.warning(f"检测到弹窗: {name}, 第{self.counts[name]}次")
+
+        for _ in range(self.retries):
+            self.click(action)
+            self.clock.sleep(1)
+            if self.detect(self.capture()) is not popup:
+                break
+        else:
+            raise RoutineAborted(f"弹窗无法关闭: {name}")
+
+        if then == "abort":
+            raise RoutineAborted(f"弹窗要求中止: {name}")
+        return True
+
+    def summary(self) -> str:
+        """各弹窗出现次数"""
+        return ", ".join(f"{name}: {count}次" for name, count in self.counts.items())
+
+
+def crop_template(frame_path: str, name: str, region: tuple) -> str:
+    """从录制的截图截出弹窗模板
+
+    :param frame_path: 截图
+    :param name: 弹窗名称, 模板保存为 assets/popups/名称.png
+    :param region: (x, y, 宽, 高)
+    :return: 模板路径
+    """
+    import cv2
+
+    from .assets import ASSETS_DIR
+    from .vision import crop, load_frame
+
+    path = os.path.join(ASSETS_DIR, "popups", f"{name}.png")
+    # cv2.imwrite 不支持中文路径
+    cv2.imencode(".png", crop(load_frame(frame_path), region))[1].tofile(path)
+    return path
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 8 or sys.argv[1] != "crop":
+        print("用法: python -m utils.recovery crop 截图.png 弹窗名称 x y 宽 高")
+        sys.exit(1)
+    print(crop_template(sys.argv[2], sys.argv[3], tuple(map(int, sys.argv[4:]))))
@@ -0,0 +1,107 @@
+from logging import Logger
+from typing import Dict, List
+
+
+class ResourceGuard:
+    """资源检测：定期从截图读取功能依赖的资源数量，耗尽时提前结束，不需要的步骤跳过
+
+    资源的截图区域和阈值在配置的 "资源" 里:
+        "资源": {"体力": {"区域": [x, y, 宽, 高], "最少": 5}}
+    没有配置区域或识别不到的资源不做判断(按原来的次数执行)
+    """
+
+    def __init__(
+        self,
+        util,
+        logger: Logger,
+        config: Dict[str, dict],
+        consumes: List[str],
+        preconditions: List[str] = None,
+        every: int = 5,
+    ):
+        """
+        :param util: 工具类(截图)
+        :param logger: 日志
+        :param config: 资源配置
+        :param consumes: 消耗的资源, 低于 "最少" 时结束
+        :param preconditions: 步骤的前置条件, 达到 "最少" 时才执行该步骤
+        :param every: 每执行多少次读取一次
+        """
+        self.util = util
+        self.logger = logger
+        self.consumes = consumes
+        self.preconditions = preconditions or []
+        self.every = max(1, every)
+
+        names = self.consumes + self.preconditions
+        self.config = {n: config[n] for n in names if config.get(n, {}).get("区域")}
+        self.values: Dict[str, int] = {}
+        self._read_at = None
+
+        self.saved = 0  # 节省的点击次数
+        self.stopped = ""  # 提前结束的原因
+
+    def _refresh(self, iteration: int):
+        """每 every 次读取一次全部资源(一次截图, 一次批量识别)"""
+        if not self.config:
+            return
+        if self._read_at is not None and iteration - self._read_at < self.every:
+            return
+        self._read_at = iteration
+
+        from .vision import get_digit_reader
+
+        reader = get_digit_reader()
+        if not reader.ready:
+            return
+        names = list(self.config)
+        regions = [tuple(self.config[n]["区域"]) for n in names]
+        values = reader.read_many(self.util.capture(), regions)
+        self.values = {n: v for n, v in zip(names, values) if v is not None}
+        if self.util.run:
+            self.util.run.observe(self.values)
+
+    def exhausted(self, iteration: int) -> bool:
+        """消耗的资源是否已不足
+
+        :param iteration: 当前已执行次数
+        """
+        self._refresh(iteration)
+        for name in self.consumes:
+            value = self.values.get(name)
+            if value is not None and value < self.config[name].get("最少", 1):
+                self.stopped = f"{name}不足({value})"
+                return True
+        return False
+
+    def needed(self, name: str, iteration: int) -> bool:
+        """步骤的前置条件是否满足, 读不到时按需要处理
+
+        :param name: 前置条件资源名称
+        :param iteration: 当前已执行次数
+        """
+        self._refresh(iteration)
+        value = self.values.get(name)
+        if value is None:
+            return True
+        if value >= self.config[name].get("最少", 1):
+            return True
+        self.saved += 1
+        return False
+
+    def stop(self, remaining: int, clicks: int):
+        """提前结束，记录节省的点击
+
+        :param remaining: 剩余次数
+        :param clicks: 每次的点击数
+        """
+        self.saved += remaining * clicks
+        self.logger.info(f"{self.stopped}, 提前结束, 剩余次数: {remaining}")
+
+    def report(self, routine: str):
+        """记录节省的点击次数"""
+        if self.saved:
+            self.logger.info(f"{routine} 资源检测共节省点击: {self.saved} 次")
+            print(
+                f"{routine} | {self.stopped or '跳过不需要的步骤'} | 节省点击: {self.saved} 次"
+            )
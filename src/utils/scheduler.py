@@ -0,0 +1,245 @@
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .supervisor import RoutineStopped
+
+
+@dataclass
+class Chore:
+    """日常任务"""
+
+    qq: str
+    routine: str  # 功能名称, 比如: Zhanzheng.juyi
+    args: list = field(default_factory=list)
+    priority: int = 0  # 越大越先排
+    duration: float = 60  # 预计耗时(秒)
+    # 允许开始的时间段, 比如: (":59", ":00") 每小时59分、("20:00", "21:00") 每天
+    window: Optional[Tuple[str, str]] = None
+
+
+@dataclass
+class Planned:
+    """排好的任务"""
+
+    chore: Chore
+    start: float  # 开始时间戳
+    end: float  # 预计结束时间戳
+
+
+def _parse(value: str) -> Tuple[int, int]:
+    """解析时间点
+
+    :param value: "HH:MM" 每天, ":MM" 每小时
+    :return (周期秒数, 周期内偏移秒数):
+    """
+    hour, minute = value.split(":")
+    if hour == "":
+        return 3600, int(minute) * 60
+    return 86400, int(hour) * 3600 + int(minute) * 60
+
+
+def window_start(window: Optional[Tuple[str, str]], t: float) -> float:
+    """不早于 t 且落在时间段内的最早开始时间
+
+    :param window: 时间段
+    :param t: 时间戳
+    """
+    if not window:
+        return t
+
+    period, start = _parse(window[0])
+    _, end = _parse(window[1])
+    if end <= start:
+        end += period  # 跨周期, 比如 :59 ~ :00
+
+    # 按本地时间计算周期内偏移(不考虑夏令时)
+    tz_offset = -time.timezone
+    phase = (t + tz_offset) % period
+
+    if start <= phase < end or phase < end - period:
+        return t
+    return t + (start - phase) % period
+
+
+class Scheduler:
+    """按优先级、时间段和预计耗时排任务，尽量缩短总耗时"""
+
+    def __init__(
+        self, chores: List[Chore], per_worker: int = 2, accounts: List[str] = None
+    ):
+        """
+        :param chores: 所有账号的任务
+        :param per_worker: 每个进程托管的窗口数
+        :param accounts: 全部账号(包括没有任务的), 默认只有有任务的账号
+        """
+        self.chores = chores
+        self.per_worker = max(1, per_worker)
+        self.accounts = list(accounts or [])
+        for chore in chores:
+            if chore.qq not in self.accounts:
+                self.accounts.append(chore.qq)
+        self.plan: Dict[str, List[Planned]] = {}
+        self.workers: List[List[str]] = []
+        self.begin = 0.0
+
+    @classmethod
+    def from_games(cls, games, per_worker: int = 2):
+        """从每个账号配置的 "任务" 列表生成(默认为空, 不排计划)
+
+        :param games: 游戏实例列表, 配置 "任务" 比如:
+            [{"routine": "Zhanzheng.juyi", "args": [0], "priority": 5, "duration": 400},
+             {"routine": "Other.jiShi", "priority": 9, "duration": 2, "window": [":59", ":00"]}]
+        :param per_worker: 每个进程托管的窗口数
+        """
+        chores = []
+        for game in games:
+            for item in game.config.get("任务", []):
+                window = item.get("window")
+                chores.append(
+                    Chore(
+                        game.qq,
+                        item["routine"],
+                        item.get("args", []),
+                        item.get("priority", 0),
+                        item.get("duration", 60),
+                        tuple(window) if window else None,
+                    )
+                )
+        # 没有任务的账号也分到进程里(控制接口可以给它们发功能)
+        return cls(chores, per_worker, [game.qq for game in games])
+
+    def _earliest(self, timeline: List[Planned], chore: Chore, t: float) -> float:
+        """在账号时间线上找最早能放下该任务的空档(可插到已排任务之前)"""
+        for _ in range(1000):
+            t = window_start(chore.window, t)
+            conflict = next(
+                (p for p in timeline if p.start < t + chore.duration and t < p.end),
+                None,
+            )
+            if conflict is None:
+                return t
+            t = conflict.end
+        return math.inf
+
+    def build(self, begin: float = None) -> Dict[str, List[Planned]]:
+        """排任务
+
+        :param begin: 开始时间戳, 默认当前时间
+        :return dict: qq -> 按开始时间排序的任务
+        """
+        self.begin = begin or time.time()
+        self.plan = {qq: [] for qq in self.accounts}
+
+        # 优先级高的先排, 同优先级耗时长的先排(LPT)
+        ordered = sorted(self.chores, key=lambda c: (-c.priority, -c.duration))
+        for chore in ordered:
+            timeline = self.plan[chore.qq]
+            start = self._earliest(timeline, chore, self.begin)
+            if start == math.inf:
+                print(f"scheduler | {chore.qq} | {chore.routine} 无法安排, 跳过")
+                continue
+            timeline.append(Planned(chore, start, start + chore.duration))
+            timeline.sort(key=lambda p: p.start)
+
+        self._pack_workers()
+        return self.plan
+
+    def _load(self, qq: str) -> float:
+        timeline = self.plan.get(qq)
+        return timeline[-1].end - self.begin if timeline else 0.0
+
+    def _pack_workers(self):
+        """按账号总耗时把账号分到各进程, 让各进程尽量同时结束"""
+        accounts = sorted(self.plan, key=self._load, reverse=True)
+        count = max(1, math.ceil(len(accounts) / self.per_worker))
+        self.workers = [[] for _ in range(count)]
+        for qq in accounts:
+            free = [w for w in self.workers if len(w) < self.per_worker]
+            target = min(free, key=lambda w: sum(self._load(q) for q in w))
+            target.append(qq)
+
+    @property
+    def makespan(self) -> float:
+        """总耗时(秒)"""
+        return max((self._load(qq) for qq in self.plan), default=0.0)
+
+    def dry_run(self) -> str:
+        """打印排好的任务，不执行"""
+
+        def fmt(t):
+            return datetime.fromtimestamp(t).strftime("%H:%M:%S")
+
+        lines = [
+            f"scheduler | 开始: {fmt(self.begin)} | 预计总耗时: {round(self.makespan)}s | 进程数: {len(self.workers)}"
+        ]
+        for worker_id, accounts in enumerate(self.workers):
+            lines.append(f"  worker-{worker_id}")
+            for qq in accounts:
+                timeline = self.plan[qq]
+                busy = sum(p.chore.duration for p in timeline)
+                rate = busy / self._load(qq) * 100 if self._load(qq) else 0
+                lines.append(
+                    f"    {qq} | 耗时: {round(self._load(qq))}s | 忙碌: {round(rate)}%"
+                )
+                for p in timeline:
+                    chore = p.chore
+                    lines.append(
+                        f"      {fmt(p.start)} ~ {fmt(p.end)} | {chore.routine}{tuple(chore.args)} | 优先级: {chore.priority}"
+                    )
+        result = "\n".join(lines)
+        print(result)
+        return result
+
+    def run(self, game):
+        """按计划执行一个账号的任务(在该账号的线程里调用)
+        已执行的任务记在断点续跑日志里, 进程被重启后从下一个任务继续
+
+        :param game: 游戏实例
+        """
+        from .journal import Journal
+
+        clock = game.util.clock
+        timeline = self.plan.get(game.qq, [])
+        if not timeline:
+            return
+        journal = Journal(game.qq, "plan", len(timeline), game.util.journal_directory)
+        if journal.resume():
+            game.logger.info(f"计划从断点继续: 已执行 {journal.resume()} 个任务")
+        for index, p in enumerate(timeline[journal.resume() :], journal.resume() + 1):
+            chore = p.chore
+            # 有时间段的任务要等到时间段内再开始
+            start = window_start(chore.window, max(p.start, clock.time()))
+            delay = start - clock.time()
+            if delay > 0:
+                game.logger.info(f"{chore.routine} 等待 {round(delay, 2)}s 后开始")
+                self._wait(game, start)
+            try:
+                game.run(chore.routine, *chore.args)
+            except RoutineStopped:
+                # 主进程要求停止: 后面的任务也不执行
+                journal.close()
+                raise
+            except Exception as e:
+                # 一个任务失败(比如弹窗中止)不影响后面的任务
+                game.logger.error(f"{chore.routine} 执行失败: {e}")
+                if game.heartbeat:
+                    game.heartbeat.error(f"{chore.routine}: {e}")
+            journal.record(index)
+        journal.finish()
+
+    @staticmethod
+    def _wait(game, until: float, step: float = 1):
+        """分段等待, 每段检查主进程的指令(暂停、停止)"""
+        clock = game.util.clock
+        while True:
+            left = until - clock.time()
+            if left <= 0:
+                return
+            if game.heartbeat:
+                game.heartbeat.wait(left)
+            clock.sleep(min(left, step))
+            if game.heartbeat:
+                game.heartbeat.checkpoint()
@@ -0,0 +1,237 @@
+"""
+界面识别: 每个已知界面预先选好几个有代表性的像素(探针), 识别时一次取出所有探针的像素和期望颜色比较, 几微秒
+探针都对不上时再用模板匹配(慢, 毫秒级)
+
+用法(在 src 下):
+    python -m utils.screen learn            从 assets/screens/<名称>/*.png 生成探针(assets/screens/probes.json)
+    python -m utils.screen test 截图.png     识别截图
+    python -m utils.screen bench            对比探针和模板匹配的耗时
+"""
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .assets import ASSETS_DIR
+from .vision import load_frame, load_template, match_template
+
+PROBES_PATH = os.path.join(ASSETS_DIR, "screens", "probes.json")
+
+
+def learn(
+    samples: Dict[str, List[np.ndarray]], count: int = 16, stable: int = 12, stride=4
+) -> Dict[str, list]:
+    """从录制的截图生成探针: 同一界面各截图里颜色稳定、且和其它界面差别最大的像素
+
+    :param samples: 界面名称 -> 截图列表(尺寸一致)
+    :param count: 每个界面的探针数
+    :param stable: 同一界面各截图之间允许的颜色差异
+    :param stride: 候选像素的间隔, 避免探针挤在一起
+    :return: 界面名称 -> [[x, y, b, g, r], ...]
+    """
+    stacks = {
+        name: np.stack(frames).astype(np.int16)
+        for name, frames in samples.items()
+        if frames
+    }
+    means = {name: stack.mean(0) for name, stack in stacks.items()}
+
+    probes = {}
+    for name, stack in stacks.items():
+        mean = means[name]
+        spread = (stack.max(0) - stack.min(0)).max(-1)
+        others = [
+            np.abs(mean - m).max(-1)
+            for other, m in means.items()
+            if other != name and m.shape == mean.shape
+        ]
+        distinct = np.min(others, 0) if others else np.full(spread.shape, 255.0)
+        score = np.where(spread <= stable, distinct, -1)[::stride, ::stride]
+
+        best = np.argsort(score, axis=None)[::-1][:count]
+        ys, xs = np.unravel_index(best, score.shape)
+        probes[name] = [
+            [int(x * stride), int(y * stride), *map(int, mean[y * stride, x * stride])]
+            for x, y in zip(xs, ys)
+            if score[y, x] > stable
+        ]
+    return probes
+
+
+def load_probes(path: str = PROBES_PATH) -> Dict[str, list]:
+    """读取探针文件, 不存在时返回空"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ScreenClassifier:
+    """界面识别：先比对像素探针，识别不了再用模板匹配"""
+
+    def __init__(
+        self,
+        probes: Dict[str, list],
+        catalogue: List[tuple] = None,
+        tolerance: int = 24,
+        ratio: float = 0.9,
+        threshold: float = 0.85,
+    ):
+        """
+        :param probes: 界面名称 -> [[x, y, b, g, r], ...], 见 learn
+        :param catalogue: 模板匹配用的界面列表, 见 coords/screens.py
+        :param tolerance: 探针每个颜色通道允许的差异
+        :param ratio: 对上的探针比例达到多少算是该界面
+        :param threshold: 模板相似度阈值
+        """
+        self.tolerance = tolerance
+        self.ratio = ratio
+        self.threshold = threshold
+
+        # 所有界面的探针拼在一起, 识别时只做一次取像素
+        self.names = [name for name, points in probes.items() if points]
+        points = np.array(
+            [p for name in self.names for p in probes[name]], dtype=np.int16
+        ).reshape(-1, 5)
+        self.xs = points[:, 0].astype(np.intp)
+        self.ys = points[:, 1].astype(np.intp)
+        self.expected = points[:, 2:]
+        self.sizes = np.array([len(probes[name]) for name in self.names])
+        self.starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1])).astype(np.intp)
+        # 截图至少要这么大才能取探针
+        self.min_size = (self.ys.max() + 1, self.xs.max() + 1) if self.names else (0, 0)
+
+        # 没有模板图片的界面不做模板匹配
+        self.templates = []
+        for screen in catalogue or []:
+            template = load_template(screen[1])
+            if template is not None:
+                self.templates.append((screen, template))
+
+    @property
+    def ready(self) -> bool:
+        """是否有可用的探针或模板"""
+        return bool(self.names or self.templates)
+
+    def by_probes(self, frame: np.ndarray) -> Optional[str]:
+        """用探针识别
+
+        :param frame: 截图
+        :return: 界面名称, 识别不了返回 None
+        """
+        if not self.names:
+            return None
+        if frame.shape[0] < self.min_size[0] or frame.shape[1] < self.min_size[1]:
+            return None
+
+        pixels = frame[self.ys, self.xs, :3].astype(np.int16)
+        hit = np.abs(pixels - self.expected).max(1) <= self.tolerance
+        ratios = np.add.reduceat(hit, self.starts) / self.sizes
+        best = int(ratios.argmax())
+        return self.names[best] if ratios[best] >= self.ratio else None
+
+    def by_templates(self, frame: np.ndarray) -> Optional[str]:
+        """用模板匹配识别"""
+        for screen, template in self.templates:
+            score, _ = match_template(frame, template, screen[2])
+            if score >= self.threshold:
+                return screen[0]
+        return None
+
+    def classify(self, frame: np.ndarray) -> Optional[str]:
+        """识别当前界面
+
+        :param frame: 截图
+        :return: 界面名称, 比如: 聚义、战斗结束, 识别不了返回 None
+        """
+        return self.by_probes(frame) or self.by_templates(frame)
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_screen_classifier(config: dict = None) -> ScreenClassifier:
+    """界面识别器(同一进程共用)
+
+    :param config: 配置里的 "界面识别", 比如: {"容差": 24, "比例": 0.9, "相似度": 0.85}
+    """
+    global _classifier
+    if _classifier is None:
+        from coords.screens import 界面列表
+
+        config = config or {}
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = ScreenClassifier(
+                    load_probes(),
+                    界面列表,
+                    config.get("容差", 24),
+                    config.get("比例", 0.9),
+                    config.get("相似度", 0.85),
+                )
+    return _classifier
+
+
+def _learn_from_assets(output: str = PROBES_PATH):
+    directory = os.path.dirname(output)
+    samples = {}
+    for name in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, name)
+        if os.path.isdir(folder):
+            samples[name] = [
+                load_frame(os.path.join(folder, f))
+                for f in sorted(os.listdir(folder))
+                if f.lower().endswith(".png")
+            ]
+    probes = learn(samples)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(probes, f, ensure_ascii=False, indent=2)
+    for name, points in probes.items():
+        print(f"{name} | 截图: {len(samples[name])} | 探针: {len(points)}")
+    print(f"探针已生成: {output}")
+
+
+def _bench(rounds: int = 10000):
+    """用随机生成的界面测一下耗时"""
+    rng = np.random.default_rng(0)
+    names = ["聚义", "战斗", "战斗结束", "集市", "组队副本", "奖励"]
+    screens = {n: rng.integers(0, 256, (540, 960, 3), dtype=np.uint8) for n in names}
+    samples = {}
+    for name, screen in screens.items():
+        noise = [rng.integers(-3, 4, screen.shape) for _ in range(3)]
+        samples[name] = [
+            np.clip(screen.astype(np.int16) + n, 0, 255).astype(np.uint8) for n in noise
+        ]
+    classifier = ScreenClassifier(learn(samples))
+    frame = screens["奖励"]
+    assert classifier.classify(frame) == "奖励"
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        classifier.by_probes(frame)
+    probe_cost = (time.perf_counter() - start) / rounds
+
+    template = frame[150:450, 300:700].copy()
+    start = time.perf_counter()
+    for _ in range(20):
+        match_template(frame, template[100:160, 100:260], (300, 150, 400, 300))
+    template_cost = (time.perf_counter() - start) / 20
+
+    print(
+        f"探针识别: {round(probe_cost * 1e6, 1)}µs/次 | 模板匹配(单个界面): {round(template_cost * 1e3, 2)}ms/次"
+    )
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "learn"
+    if command == "learn":
+        _learn_from_assets()
+    elif command == "test":
+        print(get_screen_classifier().classify(load_frame(sys.argv[2])))
+    elif command == "bench":
+        _bench()
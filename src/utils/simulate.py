@@ -0,0 +1,213 @@
+"""
+虚拟时间模拟: 功能代码原样运行, 点击只记录不发送, sleep 走虚拟时钟
+验证节奏改动(比如 shenKun 的 7*60+10 + loop*20, 聚义错开时间)不用再等几个小时
+
+在 src 下:
+    python -m utils.simulate                                   # 5 个账号各跑 100 次 shenKun
+    python -m utils.simulate Zhanzheng.juyi --accounts 3 --args 0 --config '{"聚义": {"position": [1, 1], "time": 20}}'
+    python -m utils.simulate ZuDui.shenKun --trace logs/simulate.json   # 时间线用 https://ui.perfetto.dev 打开
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .clock import VirtualClock
+from .trace import merge_traces, tracer
+from .util import Util
+
+
+class _Progress:
+    """代替心跳, 记录每轮完成的虚拟时间"""
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.marks = []  # (虚拟时间, 次数)
+
+    def beat(self):
+        pass
+
+    def wait(self, seconds: float):
+        pass
+
+    def set_urgent(self, urgent: bool):
+        pass
+
+    def error(self, message: str):
+        pass
+
+    def checkpoint(self):
+        pass
+
+    def done(self):
+        pass
+
+    def progress(self, routine: str, iteration: int, total: int):
+        self.marks.append((self.clock.time(), iteration))
+
+
+class SimUtil(Util):
+    """不操作窗口的 Util: 点击和输入只消耗虚拟时间(和 bg_click、flash_input_set 的等待一致)"""
+
+    def __init__(self, index: int, qq: str, clock: VirtualClock, journal_directory: str):
+        super().__init__(index, (0, 0), logging.getLogger(f"simulate-{qq}"))
+        self.clock = clock
+        self.journal_directory = journal_directory
+        self.heartbeat = _Progress(clock)
+        self.clicks = Counter()
+
+    def click(self, coord):
+        start = tracer.now()
+        self.clock.sleep(0.05)
+        tracer.complete(coord[0], "click", start)
+        self.clicks[coord[0]] += 1
+
+    def type_content(self, coord, content):
+        self.click(coord)
+        self.clock.sleep(0.2 + 0.05 * len(str(content)))
+
+    def get_content(self, coord):
+        return ""
+
+    def capture(self):
+        return np.zeros((600, 1000, 3), dtype=np.uint8)
+
+
+@dataclass
+class Simulation:
+    """模拟结果"""
+
+    routine: str
+    virtual: float  # 虚拟时间(秒)
+    wall: float  # 实际耗时(秒)
+    clicks: Dict[str, Counter] = field(default_factory=dict)  # qq -> 按钮 -> 次数
+    marks: Dict[str, list] = field(default_factory=dict)  # qq -> [(虚拟时间, 次数)]
+    events: int = 0  # 追踪事件数
+
+    def cycle_times(self, qq: str) -> List[float]:
+        """每轮耗时(虚拟秒)"""
+        times = [t for t, _ in self.marks.get(qq, [])]
+        return [b - a for a, b in zip(times, times[1:])]
+
+    def report(self) -> str:
+        hours = round(self.virtual / 3600, 2)
+        lines = [
+            f"模拟 | {self.routine} | 账号: {len(self.marks)} | 虚拟时间: {hours}h"
+            f" | 实际耗时: {round(self.wall, 3)}s | 追踪事件: {self.events}"
+        ]
+        for qq, marks in self.marks.items():
+            cycles = self.cycle_times(qq)
+            average = round(sum(cycles) / len(cycles), 1) if cycles else "-"
+            lines.append(
+                f"  {qq} | 次数: {marks[-1][1] if marks else 0}"
+                f" | 点击: {sum(self.clicks[qq].values())} | 平均每轮: {average}s"
+            )
+        return "\n".join(lines)
+
+
+def simulate(
+    routine: str,
+    configs: List[dict],
+    args=(),
+    trace: str = None,
+    quiet: bool = True,
+    mount: Callable = None,
+) -> Simulation:
+    """在虚拟时间里让多个账号同时跑一个功能
+
+    :param routine: 功能名称, 比如: "ZuDui.shenKun"
+    :param configs: 每个账号的功能配置(对应 base.json 里该功能模块的配置), 比如: [{"role": "master"}, {"role": "slave"}]
+    :param args: 功能参数, 每个账号不同时传函数: 账号序号 -> 参数
+    :param trace: 追踪文件路径, 不传则不记录时间线
+    :param quiet: 不输出功能里的 print
+    :param mount: 创建账号后调用 mount(qq, util), 用来挂载共享对象(比如聚义目标分配)
+    """
+    import future
+
+    name, method = routine.split(".")
+    CLASS = getattr(future, name)
+    clock = VirtualClock()
+    lock, event = clock.Lock(), threading.Event()
+
+    with tempfile.TemporaryDirectory() as directory:
+        accounts = {}
+        for index, config in enumerate(configs):
+            qq = f"sim{index}"
+            util = SimUtil(index + 1, qq, clock, directory)
+            mount and mount(qq, util)
+            instance = CLASS(util.hwnd, util, config, qq, lock, event)
+            accounts[qq] = (util, instance, args(index) if callable(args) else args)
+
+        if trace:
+            tracer.configure({"开启": True, "目录": directory})
+            tracer.clock = clock
+
+        def target(qq, instance, arguments):
+            def run():
+                tracer.name_thread(qq)
+                getattr(instance, method)(*arguments)
+
+            return run
+
+        output = io.StringIO() if quiet else None
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+                virtual = clock.run(
+                    [(qq, target(qq, *account[1:])) for qq, account in accounts.items()]
+                )
+        finally:
+            wall = time.perf_counter() - start
+            events = 0
+            if trace:
+                events = merge_traces(directory, trace)
+                tracer.enabled, tracer.clock = False, None
+
+    return Simulation(
+        routine,
+        virtual,
+        wall,
+        {qq: account[0].clicks for qq, account in accounts.items()},
+        {qq: account[0].heartbeat.marks for qq, account in accounts.items()},
+        events,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="虚拟时间模拟")
+    parser.add_argument("routine", nargs="?", default="ZuDui.shenKun")
+    parser.add_argument("--accounts", type=int, default=5, help="账号数")
+    parser.add_argument("--args", nargs="*", type=json.loads, help="功能参数")
+    parser.add_argument(
+        "--config",
+        type=json.loads,
+        help="功能配置, 对象: 全部账号相同, 数组: 按账号依次使用",
+    )
+    parser.add_argument("--trace", help="追踪文件路径")
+    options = parser.parse_args()
+
+    config = options.config
+    args = options.args
+    if options.routine == "ZuDui.shenKun":
+        # 默认: 第一个账号开队伍, 其它账号加入
+        config = config or [{"role": "master"}] + [{"role": "slave"}]
+        args = [2, 100] if args is None else args
+    if not isinstance(config, list):
+        config = [config or {}]
+    configs = [config[min(i, len(config) - 1)] for i in range(options.accounts)]
+
+    result = simulate(options.routine, configs, args or [], options.trace)
+    print(result.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,578 @@
+import ctypes
+import math
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from multiprocessing.sharedctypes import RawArray
+from typing import Callable, Dict, List
+
+from .ledger import flush_ledger
+from .logs import forward_logs, setup_logging
+from .trace import tracer
+
+
+class Slot(ctypes.Structure):
+    """共享内存中每个账号的状态槽"""
+
+    _fields_ = [
+        ("heartbeat", ctypes.c_double),  # 最后一次心跳时间
+        ("started", ctypes.c_double),  # 当前功能开始时间
+        ("iteration", ctypes.c_int),  # 当前已执行次数
+        ("total", ctypes.c_int),  # 预计次数
+        ("worker", ctypes.c_int),  # 所属工作进程编号
+        ("done", ctypes.c_bool),  # 任务是否已全部完成
+        ("urgent", ctypes.c_bool),  # 是否在执行时间要求高的步骤
+        ("routine", ctypes.c_char * 32),  # 当前功能名称(utf-8)
+        ("base", ctypes.c_int),  # 开始计时时的次数(断点续跑时不是 0)
+        ("eta", ctypes.c_double),  # 预计完成时间, 0 表示还不知道
+        ("failed", ctypes.c_double),  # 最后一次出错的时间
+        ("error", ctypes.c_char * 96),  # 最后一次错误(utf-8)
+        ("control", ctypes.c_int),  # 主进程的指令: RUN / PAUSE / STOP(见 utils/control.py)
+        ("spawned", ctypes.c_double),  # 工作进程创建时间(主进程写)
+        ("imported", ctypes.c_double),  # 工作进程开始运行的时间(启动、导入完成)
+        ("ready", ctypes.c_double),  # 挂载完成、可以开始的时间
+        ("crashed", ctypes.c_bool),  # 任务出错, 账号线程已退出(主进程单独重启这个账号)
+    ]
+
+
+# Slot.control: 功能在每轮结束时检查(Heartbeat.checkpoint)
+RUN, PAUSE, STOP = 0, 1, 2
+
+
+class RoutineStopped(Exception):
+    """主进程要求停止当前账号的功能(在一轮结束时)"""
+
+
+# 工作进程收到停止信号时执行的函数(写性能分析结果等), 见 on_shutdown
+_shutdown_hooks: List[Callable] = []
+
+
+def on_shutdown(hook: Callable):
+    """注册工作进程收到停止信号(Supervisor.stop)时执行的函数, 账号线程可能还在运行
+
+    :param hook: 无参数的函数
+    """
+    _shutdown_hooks.append(hook)
+
+
+def _shutdown():
+    """执行停止前的函数, 写完追踪和运行记录"""
+    for hook in _shutdown_hooks:
+        try:
+            hook()
+        except Exception as e:
+            print(f"supervisor.py | 停止前执行出错: {e}")
+    tracer.flush()
+    flush_ledger()
+
+
+def _encode(text: str, size: int) -> bytes:
+    """按字节截断(不截断半个汉字), 用于写入定长的槽"""
+    return text.encode("utf-8")[:size].decode("utf-8", errors="ignore").encode("utf-8")
+
+
+class Heartbeat:
+    """账号心跳，写入共享内存槽，供主进程巡检"""
+
+    def __init__(self, board, index: int):
+        """
+        :param board: 共享内存 Slot 数组
+        :param index: 账号在数组中的下标
+        """
+        self.board = board
+        self.index = index
+
+    @property
+    def slot(self) -> Slot:
+        return self.board[self.index]
+
+    def beat(self):
+        """心跳"""
+        self.slot.heartbeat = time.time()
+
+    def progress(self, routine: str, iteration: int, total: int):
+        """上报功能进度
+
+        :param routine: 功能名称, 比如: 聚义
+        :param iteration: 当前已执行次数
+        :param total: 预计次数
+        """
+        slot = self.slot
+        now = time.time()
+        name = _encode(routine, 32)
+        if slot.routine != name:
+            slot.routine = name
+            slot.started = now
+            slot.base = iteration
+            slot.eta = 0.0
+        elif iteration > slot.base:
+            # 按开始以来的平均每次耗时估算
+            each = (now - slot.started) / (iteration - slot.base)
+            slot.eta = now + each * max(0, total - iteration)
+        slot.iteration = iteration
+        slot.total = total
+        slot.heartbeat = now
+
+    def checkpoint(self):
+        """一轮结束时检查主进程的指令: 暂停时在这里等, 停止时抛出 RoutineStopped"""
+        slot = self.slot
+        while slot.control == PAUSE:
+            self.beat()
+            time.sleep(1)
+        if slot.control == STOP:
+            slot.control = RUN
+            raise RoutineStopped()
+
+    def wait(self, seconds: float):
+        """声明接下来会长时间等待，避免被误判为卡死
+
+        :param seconds: 预计等待时间(秒)
+        """
+        self.slot.heartbeat = time.time() + seconds
+
+    def set_urgent(self, urgent: bool):
+        """声明正在执行时间要求高的步骤(主进程据此提高窗口进程的优先级)"""
+        self.slot.urgent = urgent
+        self.beat()
+
+    def error(self, message: str):
+        """上报错误(状态面板显示最后一次)
+
+        :param message: 错误信息
+        """
+        self.slot.error = _encode(message, 96)
+        self.slot.failed = time.time()
+
+    def crash(self):
+        """任务出错, 账号线程退出, 等主进程重启"""
+        self.slot.crashed = True
+        self.beat()
+
+    def ready(self, gate=None, timeout: float = 120):
+        """挂载完成, 等主进程放行后再开始(全部账号一起开始)
+
+        :param gate: 放行事件(Supervisor.gate), 不传不等待
+        :param timeout: 最长等待秒数
+        """
+        self.slot.ready = time.time()
+        self.beat()
+        if gate is not None and not gate.is_set():
+            self.wait(timeout)
+            gate.wait(timeout)
+            self.beat()
+
+    def done(self):
+        """任务全部完成"""
+        self.slot.done = True
+        self.beat()
+
+
+def _attempt(run: Callable, option) -> bool:
+    """执行一次任务, 被主进程停止不算错误
+
+    :return bool: 是否出错
+    """
+    try:
+        run()
+    except RoutineStopped:
+        print(f"supervisor.py | {option.game.qq} | 已停止")
+    except Exception as e:
+        option.heartbeat.error(f"{type(e).__name__}: {e}")
+        print(f"supervisor.py | {option.game.qq} | 任务错误:", e)
+        return True
+    return False
+
+
+def _run_option(target: Callable, option):
+    """工作进程中的单个账号线程"""
+    try:
+        # uia 需要在每个线程里初始化 COM
+        import pythoncom
+
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+
+    try:
+        failed = _attempt(lambda: target(option), option)
+        if option.inbox is None:
+            # 出错的账号不标记完成, 由主进程单独重启(同进程的其他账号继续)
+            if failed:
+                option.heartbeat.crash()
+            else:
+                option.heartbeat.done()
+            return
+        option.heartbeat.done()
+
+        # 控制接口: 空闲时等待主进程发来的功能
+        for routine, args in iter(option.commands.get, None):
+            slot = option.heartbeat.slot
+            if slot.control == STOP:
+                slot.control = RUN
+            slot.done = False
+            _attempt(lambda: option.game.run(routine, *args), option)
+            option.heartbeat.done()
+            tracer.flush()
+            flush_ledger()
+    finally:
+        tracer.flush()
+        flush_ledger()
+
+
+def _listen(option):
+    """接收主进程的消息: 推送的配置马上生效, 功能排到账号线程空闲时执行"""
+    for message in iter(option.inbox.get, None):
+        if message["type"] == "config":
+            option.game.apply_config(message["config"])
+        elif message["type"] == "run":
+            option.commands.put((message["routine"], message.get("args", [])))
+        elif message["type"] == "clear":
+            # 停止时清空还没开始的功能
+            while not option.commands.empty():
+                option.commands.get_nowait()
+
+
+def _worker_main(target: Callable, options: list, log_queue=None, shutdown=None):
+    """工作进程入口：一个进程托管多个窗口，每个窗口一个线程
+
+    :param shutdown: 停止信号(multiprocessing.Event), 设置后写完结果再退出
+    """
+    # Ctrl+C 由主进程处理: 通知工作进程停止, 不让工作进程直接中断
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 日志发给主进程写(只有主进程切分文件)
+    if log_queue is not None:
+        forward_logs(log_queue)
+    if options:
+        setup_logging("logs/game.log", options[0].game.config.get("日志"))
+        tracer.configure(options[0].game.config.get("追踪"))
+        tracer.name_process(f"worker-{options[0].heartbeat.slot.worker}")
+
+    threads = []
+    for option in options:
+        option.heartbeat.slot.imported = time.time()
+        option.heartbeat.beat()
+        if option.inbox is not None:
+            option.commands = queue.Queue()
+            threading.Thread(target=_listen, args=(option,), daemon=True).start()
+        t = threading.Thread(target=_run_option, args=(target, option), daemon=True)
+        t.start()
+        threads.append(t)
+
+    # 等账号线程结束, 或者主进程要求停止(账号线程是守护线程, 进程退出时一起结束)
+    while any(t.is_alive() for t in threads):
+        if shutdown is None:
+            for t in threads:
+                t.join()
+        elif shutdown.wait(0.5):
+            _shutdown()
+            return
+
+
+class Supervisor:
+    """工作进程监控：按 K 个窗口一组分配进程，收集心跳，重启挂掉或卡死的进程"""
+
+    def __init__(
+        self,
+        target: Callable,
+        options: list,
+        per_worker: int = 2,
+        stall_timeout: float = 600,
+        max_restarts: int = 3,
+        governor=None,
+        affinity=None,
+        control: bool = False,
+        barrier: bool = False,
+    ):
+        """
+        :param target: 每个账号执行的任务函数, 参数为 option
+        :param options: 每个账号的任务配置(TaskOption)
+        :param per_worker: 每个进程托管的窗口数
+        :param stall_timeout: 心跳超时时间(秒)，超过则视为卡死
+        :param max_restarts: 每组账号最大重启次数
+        :param governor: 全局点击限速(utils.governor.Governor), 巡检时按 cpu 调整
+        :param affinity: cpu 亲和性(utils.affinity.AffinityManager), 巡检时按账号状态调整优先级
+        :param control: 开启控制接口: 每个账号一个收件箱, 任务完成后进程不退出, 等待新的功能
+        :param barrier: 账号挂载完成后等 release 放行, 全部账号一起开始
+        """
+        self.target = target
+        self.options = options
+        self.per_worker = max(1, per_worker)
+        self.stall_timeout = stall_timeout
+        self.max_restarts = max_restarts
+        self.governor = governor
+        self.affinity = affinity
+
+        self.board = RawArray(Slot, len(options))
+        # 放行后重启的进程不再等待
+        self.gate = multiprocessing.Event() if barrier else None
+        for index, option in enumerate(options):
+            option.heartbeat = Heartbeat(self.board, index)
+            option.governor = governor
+            option.inbox = multiprocessing.Queue() if control else None
+            option.gate = self.gate
+
+        # worker编号 -> {process, indexes, restarts}
+        self.workers: Dict[int, dict] = {}
+        self._next_worker = 0
+        self._started = 0.0
+        self.events = deque(maxlen=5)  # 最近的重启等消息(状态面板显示)
+        # 工作进程的日志, 主进程统一写文件
+        self.log_queue = multiprocessing.Queue()
+        self._log_listener = None
+        self.shutdown = multiprocessing.Event()
+
+    def _shard(self, indexes: List[int]) -> List[List[int]]:
+        """按每进程窗口数切分账号"""
+        return [
+            indexes[i : i + self.per_worker]
+            for i in range(0, len(indexes), self.per_worker)
+        ]
+
+    def _spawn(self, indexes: List[int], restarts: int = 0):
+        """创建一个工作进程"""
+        worker_id = self._next_worker
+        self._next_worker += 1
+
+        now = time.time()
+        for index in indexes:
+            slot = self.board[index]
+            slot.worker = worker_id
+            slot.heartbeat = now
+            slot.spawned = now
+            slot.crashed = False
+
+        p = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                self.target,
+                [self.options[i] for i in indexes],
+                self.log_queue,
+                self.shutdown,
+            ),
+        )
+        # 设置为守护进程，主进程结束，子进程也结束
+        p.daemon = True
+        p.start()
+
+        # psutil 只在主进程用，工作进程不加载
+        import psutil
+
+        self.workers[worker_id] = {
+            "process": p,
+            "indexes": indexes,
+            "restarts": restarts,
+            "cpu": psutil.Process(p.pid) if psutil.pid_exists(p.pid) else None,
+        }
+        if self.affinity and self._started:
+            self.affinity.place([p.pid])
+        qqs = ", ".join(self.options[i].game.qq for i in indexes)
+        self._notice(f"worker-{worker_id}(pid:{p.pid}) | 托管账号: {qqs}")
+
+    def _notice(self, message: str):
+        """输出消息并保留最近几条"""
+        self.events.append((time.time(), message))
+        print(f"supervisor | {message}")
+
+    def start(self, shards: List[List[int]] = None):
+        """按分组启动全部工作进程
+
+        :param shards: 自定义分组(账号下标), 默认按顺序每 per_worker 个一组
+        """
+        from logging.handlers import QueueListener
+
+        from .logs import LogWriter
+
+        self._log_listener = QueueListener(self.log_queue, LogWriter())
+        self._log_listener.start()
+        for indexes in shards or self._shard(list(range(len(self.options)))):
+            self._spawn(indexes)
+        self._started = time.time()
+        if self.affinity:
+            self.affinity.pin([w["process"].pid for w in self.workers.values()])
+
+    def release(self, timeout: float = 120, poll: float = 0.1) -> List[str]:
+        """等全部账号挂载完成(或超时)后放行
+
+        :param timeout: 最长等待秒数
+        :return: 超时还没准备好的账号
+        """
+        deadline = time.time() + timeout
+        while True:
+            waiting = [
+                option.game.qq
+                for index, option in enumerate(self.options)
+                if not self.board[index].ready and not self.board[index].done
+            ]
+            if not waiting or time.time() > deadline:
+                break
+            # 进程挂掉的账号不用等
+            if not any(w["process"].is_alive() for w in self.workers.values()):
+                break
+            time.sleep(poll)
+        if self.gate is not None:
+            self.gate.set()
+        return waiting
+
+    def _unfinished(self, indexes: List[int]) -> List[int]:
+        return [i for i in indexes if not self.board[i].done]
+
+    def _stalled(self, indexes: List[int]) -> List[int]:
+        now = time.time()
+        return [
+            i
+            for i in self._unfinished(indexes)
+            if now - self.board[i].heartbeat > self.stall_timeout
+        ]
+
+    def states(self) -> Dict[str, str]:
+        """各账号状态: 已完成或长时间等待为 idle, 时间要求高的步骤为 critical"""
+        now = time.time()
+        states = {}
+        for index, option in enumerate(self.options):
+            slot = self.board[index]
+            if slot.urgent:
+                states[option.game.qq] = "critical"
+            elif slot.done or slot.heartbeat > now:
+                states[option.game.qq] = "idle"
+            else:
+                states[option.game.qq] = "normal"
+        return states
+
+    def check(self) -> bool:
+        """巡检一次，重启挂掉或卡死的进程
+
+        :return bool: 是否还有进程在处理任务
+        """
+        if self.governor and self.workers:
+            self.governor.tick()
+        if self.affinity:
+            self.affinity.update(self.states())
+
+        for worker_id, worker in list(self.workers.items()):
+            p = worker["process"]
+            indexes = worker["indexes"]
+            unfinished = self._unfinished(indexes)
+
+            if not p.is_alive():
+                del self.workers[worker_id]
+                if not unfinished:
+                    continue
+                reason = f"进程已退出(exitcode:{p.exitcode})"
+            else:
+                crashed = [i for i in unfinished if self.board[i].crashed]
+                if crashed:
+                    self._respawn(worker_id, worker, crashed)
+                    indexes = worker["indexes"]
+                stalled = self._stalled(indexes)
+                if not stalled:
+                    continue
+                qqs = ", ".join(self.options[i].game.qq for i in stalled)
+                reason = f"心跳超时({qqs})"
+                unfinished = self._unfinished(indexes)
+                p.terminate()
+                p.join(5)
+                del self.workers[worker_id]
+
+            if worker["restarts"] >= self.max_restarts:
+                self._notice(f"worker-{worker_id} | {reason} | 已达最大重启次数, 放弃")
+                continue
+
+            self._notice(f"worker-{worker_id} | {reason} | 重新分配账号并重启")
+            for shard in self._shard(unfinished):
+                self._spawn(shard, worker["restarts"] + 1)
+
+        return len(self.workers) > 0
+
+    def _respawn(self, worker_id: int, worker: dict, crashed: List[int]):
+        """出错退出的账号从原进程移出, 放到新进程重启, 原进程的其他账号继续运行"""
+        worker["indexes"] = [i for i in worker["indexes"] if i not in crashed]
+        qqs = ", ".join(self.options[i].game.qq for i in crashed)
+        if worker["restarts"] >= self.max_restarts:
+            self._notice(f"worker-{worker_id} | 任务出错({qqs}) | 已达最大重启次数, 放弃")
+            return
+        self._notice(f"worker-{worker_id} | 任务出错({qqs}) | 单独重启")
+        for shard in self._shard(crashed):
+            self._spawn(shard, worker["restarts"] + 1)
+
+    def report(self, modules: bool = True) -> str:
+        """资源利用率报告，用于评估每台机器需要多少进程
+
+        :param modules: 是否按模块拆分每个进程的内存
+        """
+        import psutil
+
+        from .memory import format_memory, process_memory
+
+        now = time.time()
+        lines = [
+            f"supervisor | 运行 {round(now - self._started)}s | 进程数: {len(self.workers)}"
+        ]
+        cpu_total = 0.0
+        uss_total, accounts = 0.0, 0
+
+        for worker_id, worker in self.workers.items():
+            proc = worker["cpu"]
+            try:
+                cpu = proc.cpu_percent() if proc else 0.0
+                memory = process_memory(proc.pid) if proc else None
+            except psutil.Error:
+                cpu, memory = 0.0, None
+            cpu_total += cpu
+
+            indexes = worker["indexes"]
+            rss = memory["rss"] if memory else 0.0
+            lines.append(
+                f"  worker-{worker_id} | pid:{worker['process'].pid} | 窗口: {len(indexes)}/{self.per_worker} | cpu: {cpu}% | 内存: {rss}MB | 重启: {worker['restarts']}"
+            )
+            if memory:
+                uss_total += memory["uss"]
+                accounts += len(indexes)
+                if modules:
+                    lines.append(f"    内存 | {format_memory(memory)}")
+            for i in indexes:
+                slot = self.board[i]
+                routine = slot.routine.decode("utf-8", errors="ignore") or "-"
+                lines.append(
+                    f"    {self.options[i].game.qq} | {routine} {slot.iteration}/{slot.total} | 心跳: {round(now - slot.heartbeat, 1)}s前 | {'完成' if slot.done else '运行中'}"
+                )
+
+        if self.governor:
+            lines.append(f"  {self.governor.report()}")
+        if accounts:
+            lines.append(
+                f"  独占内存(USS)合计: {round(uss_total, 1)}MB | 每账号: {round(uss_total / accounts, 1)}MB"
+            )
+        if self.workers:
+            # cpu_percent 可以超过100%(多核)，按单核 80% 估算每进程能承载的窗口数
+            avg_cpu = cpu_total / len(self.workers)
+            if avg_cpu > 0:
+                suggest = max(1, math.floor(self.per_worker * 80 / avg_cpu))
+                lines.append(
+                    f"  平均cpu: {round(avg_cpu, 1)}% | 建议每进程窗口数: {suggest}"
+                )
+
+        result = "\n".join(lines)
+        print(result)
+        return result
+
+    def stop(self, timeout: float = 10):
+        """结束全部工作进程: 先通知它们写完追踪、运行记录、性能分析结果, 超时没退出的强制结束
+
+        :param timeout: 等待工作进程退出的秒数
+        """
+        self.shutdown.set()
+        deadline = time.time() + timeout
+        for worker in self.workers.values():
+            worker["process"].join(max(0.0, deadline - time.time()))
+        for worker_id, worker in self.workers.items():
+            if worker["process"].is_alive():
+                print(f"supervisor | worker-{worker_id} | {timeout}s 内没有退出, 强制结束")
+                worker["process"].terminate()
+        self.workers.clear()
+        # 写完已经收到的日志
+        if self._log_listener:
+            self._log_listener.stop()
+            self._log_listener = None
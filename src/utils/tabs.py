@@ -0,0 +1,333 @@
+"""
+多标签: 一个客户端窗口里开多个账号标签(btnTab, 标题一般是 qq 号), 多个账号共用一个窗口和渲染进程
+同一时间只有当前标签能点击和截图, 各账号轮流使用窗口:
+    账号点击前先占用窗口(不是当前标签时先切换), 连续操作时一直占用
+    超过 "空闲让出" 秒没有操作(长时间等待)时其它账号可以切换过去, 占用超过 "最长占用" 秒且有人在等时让出
+每个标签切换过去后单独校准 flash 偏移
+
+不需要真实窗口的演示(假窗口树 + 虚拟时钟, 在 src 下):
+    python -m utils.tabs
+"""
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .clock import REAL
+from .util import Util
+
+
+class TabTree(ABC):
+    """客户端窗口的标签栏"""
+
+    @abstractmethod
+    def titles(self) -> List[str]:
+        """全部标签标题(从左到右)"""
+
+    @abstractmethod
+    def select(self, title: str):
+        """切换到标签"""
+
+    @abstractmethod
+    def view(self) -> int:
+        """当前标签的 flash 窗口句柄"""
+
+    @abstractmethod
+    def add(self):
+        """新建标签(btnAddTab)"""
+
+
+class UiaTabTree(TabTree):
+    """用 uia 操作标签栏(Invoke, 不移动鼠标、不抢前台), 用 win32 找当前显示的 flash 窗口"""
+
+    def __init__(self, app):
+        """
+        :param app: pywinauto 连接(uia), 见 Game.connect
+        """
+        self.window = app.MainWindow
+        self.handle = self.window.handle
+
+    def _buttons(self) -> list:
+        return [
+            button
+            for button in self.window.descendants(control_type="Button")
+            if button.element_info.automation_id == "btnTab"
+        ]
+
+    def titles(self):
+        return [button.window_text() for button in self._buttons()]
+
+    def select(self, title):
+        for button in self._buttons():
+            if button.window_text() == title:
+                button.invoke()
+                return
+        raise KeyError(f"未找到标签: {title}")
+
+    def view(self):
+        from .hwnd import Hwnd
+
+        # 隐藏标签的浏览器窗口不可见, 只取可见的那个
+        for info in Hwnd.find_childHwnds(self.handle):
+            if info.title == "Chrome Legacy Window":
+                return info.hwnd
+        return None
+
+    def add(self):
+        self.window.child_window(auto_id="btnAddTab", control_type="Button").invoke()
+
+
+class FakeTabTree(TabTree):
+    """假的标签栏(测试、演示用): 每个标签一个假句柄, 记录切换次数"""
+
+    def __init__(self, titles: List[str], first_hwnd: int = 1000):
+        self.hwnds = {title: first_hwnd + i for i, title in enumerate(titles)}
+        self.active = titles[0] if titles else None
+        self.selects = 0
+
+    def titles(self):
+        return list(self.hwnds)
+
+    def select(self, title):
+        if title not in self.hwnds:
+            raise KeyError(f"未找到标签: {title}")
+        self.active = title
+        self.selects += 1
+
+    def view(self):
+        return self.hwnds.get(self.active)
+
+    def add(self):
+        title = f"新标签{len(self.hwnds)}"
+        self.hwnds[title] = max(self.hwnds.values(), default=999) + 1
+
+
+@dataclass
+class Tab:
+    """一个账号标签"""
+
+    title: str  # 标签标题(qq 号)
+    host: "TabHost"
+    hwnd: Optional[int] = None  # 该标签的 flash 窗口(切换过去后获取)
+    offset: Optional[tuple] = None  # 该标签的 flash 偏移(校准后)
+    waited: float = 0.0  # 累计等待窗口的时间(秒)
+    stats: Counter = field(default_factory=Counter)  # 切换、让出次数
+
+
+class TabHost:
+    """一个客户端窗口的标签轮流使用"""
+
+    def __init__(
+        self,
+        tree: TabTree,
+        clock=REAL,
+        switch_delay: float = 0.5,
+        hold: float = 2,
+        slice: float = 30,
+        poll: float = 0.1,
+    ):
+        """
+        :param tree: 标签栏
+        :param clock: 时钟(模拟时用虚拟时钟)
+        :param switch_delay: 切换标签后等待界面显示的秒数
+        :param hold: 超过多少秒没有操作就允许其它标签切换过来
+        :param slice: 最长连续占用秒数(有其它标签在等时)
+        :param poll: 等待窗口时的检查间隔
+        """
+        self.tree = tree
+        self.clock = clock
+        self.switch_delay = switch_delay
+        self.hold = hold
+        self.slice = slice
+        self.poll = poll
+
+        self.tabs: Dict[str, Tab] = {}
+        self.active: Optional[Tab] = None  # 当前显示的标签
+        self.owner: Optional[Tab] = None  # 当前占用窗口的标签
+        self.since = 0.0  # 本次占用开始时间
+        self.last = 0.0  # 占用者最后一次操作的时间
+        self.queue = deque()  # 等待窗口的标签, 先来先得
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, tree: TabTree, config: dict, clock=REAL):
+        """按配置里的 "多标签" 创建
+
+        :param tree: 标签栏
+        :param config: 比如: {"切换等待": 0.5, "空闲让出": 2, "最长占用": 30}
+        """
+        return cls(
+            tree,
+            clock,
+            config.get("切换等待", 0.5),
+            config.get("空闲让出", 2),
+            config.get("最长占用", 30),
+        )
+
+    def tab(self, title: str) -> Tab:
+        """账号对应的标签
+
+        :param title: 标签标题(qq 号)
+        """
+        if title not in self.tabs:
+            if title not in self.tree.titles():
+                raise KeyError(f"客户端里没有标签: {title}")
+            self.tabs[title] = Tab(title, self)
+        return self.tabs[title]
+
+    def use(self, tab: Tab):
+        """占用窗口(不是当前标签时先切换), 每次点击、截图前调用"""
+        start = None
+        while True:
+            with self.lock:
+                now = self.clock.time()
+                if self.owner is tab:
+                    if not self.queue or now - self.since < self.slice:
+                        self.last = now
+                        break
+                    # 占用太久且有标签在等: 让出, 排到队尾
+                    self.owner = None
+                    tab.stats["让出"] += 1
+                if tab not in self.queue:
+                    self.queue.append(tab)
+                free = self.owner is None or now - self.last >= self.hold
+                if free and self.queue[0] is tab:
+                    self.queue.popleft()
+                    self.owner, self.since = tab, now
+                    # 切换期间不让别的标签抢走
+                    self.last = now + self.switch_delay
+                    break
+            if start is None:
+                start = now
+            self.clock.sleep(self.poll)
+
+        if start is not None:
+            tab.waited += self.clock.time() - start
+        if self.active is not tab:
+            self._switch(tab)
+
+    def _switch(self, tab: Tab):
+        self.tree.select(tab.title)
+        self.clock.sleep(self.switch_delay)
+        self.active = tab
+        tab.hwnd = self.tree.view()
+        tab.stats["切换"] += 1
+        with self.lock:
+            self.last = self.clock.time()
+
+    def release(self, tab: Tab):
+        """功能结束, 不再占用窗口"""
+        with self.lock:
+            if self.owner is tab:
+                self.owner = None
+
+    def calibrate(self, tab: Tab, measure: Callable[[int], Optional[tuple]]):
+        """切换到标签后校准偏移(已校准的不重复)
+
+        :param tab: 标签
+        :param measure: 计算偏移, 参数是该标签的 flash 窗口句柄, 见 Game._measure_offset
+        """
+        if tab.offset is not None:
+            return
+        self.use(tab)
+        tab.offset = measure(tab.hwnd)
+
+    def report(self) -> str:
+        lines = [f"多标签 | 窗口: {getattr(self.tree, 'handle', '-')} | 标签: {len(self.tabs)}"]
+        for tab in self.tabs.values():
+            lines.append(
+                f"  {tab.title} | 句柄: {tab.hwnd} | 偏移: {tab.offset}"
+                f" | 切换: {tab.stats['切换']} | 让出: {tab.stats['让出']}"
+                f" | 等待窗口: {round(tab.waited, 1)}s"
+            )
+        return "\n".join(lines)
+
+
+class TabUtil(Util):
+    """标签里的账号: 点击、输入、截图前先占用窗口, 句柄和偏移用标签的"""
+
+    def __init__(self, tab: Tab, logger, printClick=False, heartbeat=None):
+        super().__init__(tab.hwnd, tab.offset, logger, printClick, heartbeat)
+        self.tab = tab
+
+    def _enter(self):
+        self.tab.host.use(self.tab)
+        self.hwnd, self.offset = self.tab.hwnd, self.tab.offset
+
+    def click(self, coord):
+        self._enter()
+        super().click(coord)
+
+    def type_content(self, coord, content):
+        self._enter()
+        super().type_content(coord, content)
+
+    def get_content(self, coord):
+        self._enter()
+        return super().get_content(coord)
+
+    def capture(self):
+        self._enter()
+        return super().capture()
+
+
+def _demo():
+    """3 个账号共用一个假窗口, 每轮点 2 下后等 60 秒, 检查每次点击都落在自己的标签上"""
+    import logging
+
+    from . import backend
+    from .clock import VirtualClock
+    from future.futureBase import Base
+
+    titles = ["2548918215", "2468659059", "3305194332"]
+    tree = FakeTabTree(titles)
+    clock = VirtualClock()
+    host = TabHost(tree, clock)
+    wrong = []
+
+    class FakeBackend(backend.Backend):
+        name = "fake"
+
+        def press(self, hwnd, x, y):
+            if hwnd != tree.view():
+                wrong.append(hwnd)
+
+        def release(self, hwnd, x, y):
+            pass
+
+        def key(self, hwnd, char, down):
+            pass
+
+        def send_char(self, hwnd, char):
+            pass
+
+        def capture(self, hwnd):
+            return None
+
+    backend._backend = FakeBackend()
+
+    def routine(title):
+        tab = host.tab(title)
+        host.calibrate(tab, lambda hwnd: (3, 4))
+        util = TabUtil(tab, logging.getLogger(f"tabs-{title}"))
+        util.clock = clock
+        base = Base(tab.hwnd, util, {}, title, None, None)
+
+        def run():
+            for _ in range(5):
+                util.click(("按钮1", 100, 100))
+                base.sleep(0.5)
+                util.click(("按钮2", 200, 200))
+                base.idle(60)
+            host.release(tab)
+
+        return run
+
+    virtual = clock.run([(title, routine(title)) for title in titles])
+    print(host.report())
+    print(f"虚拟时间: {round(virtual, 1)}s(单个账号约 {5 * 60.6}s) | 点错标签: {len(wrong)}")
+
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,141 @@
+"""
+时间线追踪: 记录点击、等待、校准、每轮循环的耗时, 输出 Chrome trace-event 格式
+每个进程写 logs/trace/<pid>.jsonl, 主进程结束时合并成 logs/trace.json, 用 https://ui.perfetto.dev 打开
+一个 qq 一条轨道(tid), 一个进程一组(pid)
+"""
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """单进程的追踪器，事件先放内存，批量写文件"""
+
+    def __init__(self):
+        self.enabled = False
+        self.directory = "logs/trace"
+        self.flush_every = 2000  # 缓存多少条写一次文件
+        self.flush_interval = 5.0  # 最长多少秒写一次文件
+        self.events = []
+        self.lock = threading.Lock()
+        self._flushed = time.time()
+        self._pid = os.getpid()
+        self.clock = None  # 模拟时用虚拟时钟的时间
+
+    def configure(self, config: dict = None):
+        """按配置开启
+
+        :param config: 配置里的 "追踪", 比如: {"开启": true, "目录": "logs/trace"}
+        """
+        config = config or {}
+        self.enabled = config.get("开启", False)
+        self.directory = config.get("目录", self.directory)
+        self._pid = os.getpid()
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def now(self) -> int:
+        """微秒时间戳(各进程一致)"""
+        if self.clock is not None:
+            return int(self.clock.time() * 1_000_000)
+        return time.time_ns() // 1000
+
+    def _add(self, event: dict):
+        event["pid"] = self._pid
+        event["tid"] = threading.get_ident()
+        with self.lock:
+            self.events.append(event)
+        if (
+            len(self.events) >= self.flush_every
+            or time.time() - self._flushed >= self.flush_interval
+        ):
+            self.flush()
+
+    def complete(self, name: str, cat: str, start: int, args: dict = None):
+        """记录一个已结束的区间
+
+        :param name: 名称
+        :param cat: 分类: click、sleep、wait、calibrate、iteration ...
+        :param start: 开始时间(微秒, 见 now)
+        :param args: 附加信息
+        """
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start}
+        event["dur"] = self.now() - start
+        if args:
+            event["args"] = args
+        self._add(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args):
+        """记录一段代码的耗时"""
+        if not self.enabled:
+            yield
+            return
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, cat, start, args)
+
+    def name_thread(self, name: str):
+        """当前线程的轨道名称, 比如 qq号"""
+        if self.enabled:
+            self._add({"name": "thread_name", "ph": "M", "args": {"name": name}})
+
+    def name_process(self, name: str):
+        """当前进程的名称, 比如 worker-0"""
+        if self.enabled:
+            self._add({"name": "process_name", "ph": "M", "args": {"name": name}})
+
+    def flush(self):
+        """写入 <pid>.jsonl"""
+        with self.lock:
+            events, self.events = self.events, []
+            self._flushed = time.time()
+        if not events:
+            return
+        path = os.path.join(self.directory, f"{self._pid}.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(
+                "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+            )
+
+
+tracer = Tracer()
+
+
+def reset_traces(directory: str = "logs/trace"):
+    """清空上一次运行的追踪文件(主进程启动时调用)"""
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        os.remove(path)
+
+
+def merge_traces(directory: str = "logs/trace", output: str = "logs/trace.json"):
+    """合并各进程的追踪文件
+
+    :param directory: 各进程追踪文件目录
+    :param output: 合并后的文件
+    :return: 事件数
+    """
+    tracer.flush()
+    events = []
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                # 进程被强制结束时最后一行可能不完整
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+    if not events:
+        return 0
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events}, f, ensure_ascii=False)
+    print(f"追踪文件已合并: {output} | 事件数: {len(events)}")
+    return len(events)
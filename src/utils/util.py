@@ -1,10 +1,11 @@
-import win32api
-import win32con
-import win32clipboard
 import subprocess
 import csv
 from io import StringIO
 
+from .backend import get_backend
+from .clock import REAL
+from .trace import tracer
+
 import time
 from logging import Logger
 
@@ -13,25 +14,59 @@ class Util:
     hwnd = None
     offset = (0, 0)
     logger: Logger = None
+    heartbeat = None
+    recovery = None  # 意外弹窗检测(Game挂载)
+    resource_config = {}  # 资源检测配置(Game挂载)
+    idle_runtime = None  # 空闲时间利用(Game挂载)
+    deadline = None  # 空闲短任务的截止时间, 超过则打断
+    run = None  # 当前功能的运行记录(Game.run 创建)
+    screens = None  # 界面识别(Game挂载)
+    governor = None  # 全局点击限速(Game挂载)
+    targets = None  # 聚义目标分配(Game挂载)
+    urgent = False  # 当前功能不等待限速(见 future.futureBase.urgent)
+    clock = REAL  # 功能代码的 sleep/time(模拟时换成虚拟时钟, 见 utils/simulate.py)
+    journal_directory = "logs/journal"  # 断点续跑日志目录
+    console = True  # 进度输出到终端(开启状态面板时关闭, 见 utils/panel.py)
 
-    def __init__(self, hwnd, offset, logger: Logger, printClick=False):
+    def __init__(self, hwnd, offset, logger: Logger, printClick=False, heartbeat=None):
         self.hwnd = hwnd
         self.offset = offset
         self.logger = logger
         self.printClick = printClick
+        self.heartbeat = heartbeat
+
+    def echo(self, text: str):
+        """输出进度(同一行刷新), 关闭终端输出时不输出
+
+        :param text: 进度, 比如: 当前已聚义: 3 次 | 预计次数: 5
+        """
+        if self.console:
+            print(text, end="\r")
+
+    def _throttle(self):
+        """全局限速: 令牌不够时等待"""
+        if self.governor:
+            start = tracer.now()
+            if self.governor.acquire(self.urgent) > 0:
+                tracer.complete("throttle", "throttle", start)
+
+    def info(self, coord) -> dict:
+        """bg_click 需要的参数(坐标加上窗口偏移)"""
+        return {
+            "hwnd": self.hwnd,
+            "name": coord[0],
+            "coord": (coord[1] + self.offset[0], coord[2] + self.offset[1]),
+            "logger": self.logger,
+        }
 
     def click(self, coord):
-        Util.bg_click(
-            {
-                "hwnd": self.hwnd,
-                "name": coord[0],
-                "coord": (coord[1] + self.offset[0], coord[2] + self.offset[1]),
-                "logger": self.logger,
-            },
-            self.printClick,
-        )
+        if self.heartbeat:
+            self.heartbeat.beat()
+        self._throttle()
+        Util.bg_click(self.info(coord), self.printClick)
 
     def type_content(self, coord, content):
+        self._throttle()
         Util.flash_input_set(
             {
                 "hwnd": self.hwnd,
@@ -52,6 +87,11 @@ class Util:
             }
         )
 
+    def capture(self):
+        """后台截图, 坐标和 coords 一致(已去掉窗口偏移)"""
+        frame = Util.bg_capture(self.hwnd)
+        return frame[self.offset[1] :, self.offset[0] :]
+
     def get_qq_shui_hu(self):
         temp = Util.get_pid_by_exe("CefSharp.BrowserSubprocess.exe")
         print(temp)
@@ -66,17 +106,55 @@ class Util:
         后台左键单机
         """
         x, y = info["coord"]
-        long_position = win32api.MAKELONG(x, y)
-        win32api.SendMessage(info["hwnd"], win32con.WM_LBUTTONDOWN, 0, long_position)
+        backend = get_backend()
+        start = tracer.now()
+        with tracer.span("SendMessage", "send"):
+            backend.press(info["hwnd"], x, y)
         time.sleep(0.05)
-        win32api.SendMessage(info["hwnd"], win32con.WM_LBUTTONUP, 0, long_position)
+        with tracer.span("SendMessage", "send"):
+            backend.release(info["hwnd"], x, y)
+        tracer.complete(info["name"], "click", start)
 
+        # extra.click: 日志按按钮名称汇总
         info["logger"].info(
-            f"{info['hwnd']} | 后台点击: {info['name']} {info['coord']})"
+            f"{info['hwnd']} | 后台点击: {info['name']} {info['coord']})",
+            extra={"click": info["name"]},
         )
         if printClick:
             print(f"后台点击: {info['name']} {info['coord']})")
 
+    @staticmethod
+    def bg_click_many(infos: list, printClick=False):
+        """
+        后台左键单击多个窗口: 先全部按下, 等一次, 再全部抬起(广播模式用)
+        :param infos: 每个窗口的 info, 见 bg_click
+        """
+        backend = get_backend()
+        start = tracer.now()
+        for info in infos:
+            backend.press(info["hwnd"], *info["coord"])
+        time.sleep(0.05)
+        for info in infos:
+            backend.release(info["hwnd"], *info["coord"])
+        tracer.complete(infos[0]["name"], "click", start, {"windows": len(infos)})
+
+        for info in infos:
+            info["logger"].info(
+                f"{info['hwnd']} | 后台点击: {info['name']} {info['coord']})",
+                extra={"click": info["name"]},
+            )
+        if printClick:
+            print(f"后台点击({len(infos)}个窗口): {infos[0]['name']}")
+
+    @staticmethod
+    def bg_capture(hwnd):
+        """
+        后台截图(窗口被遮挡也能截)
+        :param hwnd: 窗口句柄
+        :return: BGR 图片(numpy数组)
+        """
+        return get_backend().capture(hwnd)
+
     @classmethod
     def bg_input_number(cls, info: dict, number):
         """
@@ -93,14 +171,13 @@ class Util:
             number_str = str(number)
             print(f"{info['hwnd']} | 后台输入数字: {number_str}")
 
+            backend = get_backend()
             for char in number_str:
-                # 获取字符对应的虚拟键码
-                vk_code = win32api.VkKeyScan(char) & 0xFF  # 只取低8位（虚拟键码）
                 # 发送键盘按下消息
-                win32api.SendMessage(info["hwnd"], win32con.WM_KEYDOWN, vk_code, 0)
+                backend.key(info["hwnd"], char, True)
                 time.sleep(0.1)  # 模拟真实输入的间隔
                 # 发送键盘抬起消息
-                win32api.SendMessage(info["hwnd"], win32con.WM_KEYUP, vk_code, 0)
+                backend.key(info["hwnd"], char, False)
                 time.sleep(0.1)
 
             print(f"{info['hwnd']} | 数字输入完成: {number_str}")
@@ -123,11 +200,10 @@ class Util:
             info["logger"].info(f"{info['hwnd']} | 后台输入内容: {number_str}")
             # print(f"{info['hwnd']} | 后台输入内容: {number_str}")
 
+            backend = get_backend()
             for char in number_str:
-                # 获取字符的ASCII码（WM_CHAR使用ASCII码，而非虚拟键码）
-                char_ascii = ord(char)
                 # 发送字符输入消息（核心：WM_CHAR）
-                win32api.SendMessage(info["hwnd"], win32con.WM_CHAR, char_ascii, 0)
+                backend.send_char(info["hwnd"], char)
                 time.sleep(0.05)  # Flash响应较慢，增加间隔
 
             info["logger"].info(f"{info['hwnd']} | 后台输入内容完毕: {number_str}")
@@ -161,22 +237,7 @@ class Util:
         """获取剪切板内容
         :return None:
         """
-        text = ""
-        for _ in range(5):
-            try:
-                # 正确打开剪贴板方式（无None参数）
-                win32clipboard.OpenClipboard()
-                try:
-                    text = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
-                except:
-                    text = ""
-                win32clipboard.CloseClipboard()
-                break
-            except Exception as e:
-                time.sleep(0.1)
-
-        final_text = str(text).strip()
-        return final_text
+        return get_backend().clipboard_text()
 
     @staticmethod
     def get_pid_by_exe(exe_name: str):
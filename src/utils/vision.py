@@ -0,0 +1,192 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 模板图片目录, 坐标系和 coords 一致(从 官方网站 下面的区域开始)
+from .assets import ASSETS_DIR, get_pack
+
+_templates = {}
+
+
+def load_template(path: str) -> Optional[np.ndarray]:
+    """加载模板图片(BGR)，优先从资源包(mmap, 不解码)取(png 改过后读 png)，同一进程只加载一次
+
+    :param path: 相对 assets 目录的路径, 比如: popups/升级.png
+    :return: 图片, 文件不存在时返回 None
+    """
+    if path in _templates:
+        return _templates[path]
+    pack = get_pack()
+    full_path = os.path.join(ASSETS_DIR, path)
+    if pack and path in pack:
+        if pack.fresh(path, full_path):
+            _templates[path] = pack.get(path)
+        else:
+            print(f"资源包里的模板已过期, 读取 png(重新打包: python utils/assets.py build): {path}")
+    if path not in _templates:
+        # cv2.imread 不支持中文路径
+        if os.path.exists(full_path):
+            # cv2 占用几十MB, 只有真正解码/匹配时才导入
+            import cv2
+
+            data = np.fromfile(full_path, dtype=np.uint8)
+            _templates[path] = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        else:
+            _templates[path] = None
+    return _templates[path]
+
+
+def load_frame(path: str) -> np.ndarray:
+    """加载录制的截图(BGR)，用于离线调试
+
+    :param path: 图片路径
+    """
+    import cv2
+
+    return cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def crop(frame: np.ndarray, region: Tuple[int, int, int, int] = None) -> np.ndarray:
+    """截取区域
+
+    :param frame: 截图
+    :param region: (x, y, 宽, 高), None 表示整张图
+    """
+    if region is None:
+        return frame
+    x, y, w, h = region
+    return frame[y : y + h, x : x + w]
+
+
+def match_template(
+    frame: np.ndarray, template: np.ndarray, region: Tuple[int, int, int, int] = None
+) -> Tuple[float, Tuple[int, int]]:
+    """在区域内查找模板
+
+    :param frame: 截图
+    :param template: 模板
+    :param region: 查找区域 (x, y, 宽, 高)
+    :return (相似度, 模板中心坐标):
+    """
+    area = crop(frame, region)
+    th, tw = template.shape[:2]
+    if area.shape[0] < th or area.shape[1] < tw:
+        return 0.0, (0, 0)
+
+    import cv2
+
+    result = cv2.matchTemplate(area, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (x, y) = cv2.minMaxLoc(result)
+    ox, oy = region[:2] if region else (0, 0)
+    return float(score), (ox + x + tw // 2, oy + y + th // 2)
+
+
+class DigitReader:
+    """数字识别：所有区域的字符一起做一次矩阵运算，和 0-9 模板比最近距离"""
+
+    SIZE = (10, 14)  # 每个字符缩放后的 (宽, 高)
+
+    def __init__(
+        self, glyph_dir: str = "digits", threshold: int = 150, max_distance=0.35
+    ):
+        """
+        :param glyph_dir: 数字模板目录(相对 assets), 里面放 0.png ~ 9.png
+        :param threshold: 二值化阈值(数字是亮色)
+        :param max_distance: 平均每像素的最大差异，超过视为不是数字
+        """
+        self.threshold = threshold
+        self.max_distance = max_distance
+
+        glyphs = []
+        for digit in range(10):
+            template = load_template(f"{glyph_dir}/{digit}.png")
+            if template is None:
+                self.glyphs = None
+                return
+            import cv2
+
+            gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            glyphs.append(self._normalize(gray > threshold))
+        self.glyphs = np.stack(glyphs)  # (10, 宽*高)
+        self._glyph_norm = (self.glyphs**2).sum(1)
+
+    @property
+    def ready(self) -> bool:
+        """模板是否齐全"""
+        return self.glyphs is not None
+
+    def _normalize(self, binary: np.ndarray) -> np.ndarray:
+        """裁掉空白行后缩放到固定大小并展平"""
+        rows = np.flatnonzero(binary.any(1))
+        if len(rows):
+            binary = binary[rows[0] : rows[-1] + 1]
+        import cv2
+
+        image = cv2.resize(
+            binary.astype(np.float32), self.SIZE, interpolation=cv2.INTER_AREA
+        )
+        return image.ravel()
+
+    def _segment(self, binary: np.ndarray):
+        """按列投影切分字符"""
+        columns = np.concatenate(([0], binary.any(0).astype(np.int8), [0]))
+        edges = np.flatnonzero(np.diff(columns))
+        return [binary[:, edges[i] : edges[i + 1]] for i in range(0, len(edges), 2)]
+
+    def read_many(self, frame: np.ndarray, regions: list) -> list:
+        """一次识别多个区域的数字
+
+        :param frame: 截图
+        :param regions: 区域列表 [(x, y, 宽, 高)]
+        :return: 每个区域的数字, 识别不到为 None
+        """
+        if not self.ready:
+            return [None] * len(regions)
+
+        import cv2
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        vectors, owners = [], []
+        for index, region in enumerate(regions):
+            binary = crop(gray, region) > self.threshold
+            for glyph in self._segment(binary):
+                vectors.append(self._normalize(glyph))
+                owners.append(index)
+
+        results = [None] * len(regions)
+        if not vectors:
+            return results
+
+        # (字符数, 10) 的距离矩阵: |a|^2 - 2ab + |b|^2
+        matrix = np.stack(vectors)
+        distance = (
+            (matrix**2).sum(1)[:, None]
+            - 2 * matrix @ self.glyphs.T
+            + self._glyph_norm[None, :]
+        )
+        digits = distance.argmin(1)
+        valid = distance.min(1) / matrix.shape[1] <= self.max_distance
+
+        texts = [""] * len(regions)
+        broken = set()
+        for owner, digit, ok in zip(owners, digits, valid):
+            if not ok:
+                broken.add(owner)
+            texts[owner] += str(digit)
+
+        for index, text in enumerate(texts):
+            if text and index not in broken:
+                results[index] = int(text)
+        return results
+
+
+_digit_reader = None
+
+
+def get_digit_reader() -> DigitReader:
+    """数字识别器(同一进程共用)"""
+    global _digit_reader
+    if _digit_reader is None:
+        _digit_reader = DigitReader()
+    return _digit_reader
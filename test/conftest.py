@@ -0,0 +1,39 @@
+import os
+import sqlite3
+
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    """当前进程的运行记录换成临时数据库"""
+    from utils import ledger as module
+
+    instance = module.Ledger(str(tmp_path / "ledger.db"), interval=0.05)
+    monkeypatch.setattr(module, "_ledger", instance)
+    return instance
+
+
+def statuses(ledger) -> list:
+    """运行记录里的 (功能, 状态, 错误)"""
+    ledger.flush()
+    conn = sqlite3.connect(ledger.path)
+    try:
+        return conn.execute("SELECT routine, status, error FROM runs ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def game(tmp_path, ledger):
+    """不操作窗口的游戏实例: 点击、等待只消耗虚拟时间"""
+    from utils import Game
+    from utils.clock import VirtualClock
+    from utils.simulate import SimUtil
+
+    game = Game()
+    game.qq = "10001"
+    game.util = SimUtil(1, game.qq, VirtualClock(), str(tmp_path))
+    return game
@@ -0,0 +1,54 @@
+import psutil
+import pytest
+
+from utils import affinity
+from utils.affinity import CRITICAL, IDLE, NORMAL, AffinityManager
+
+
+class FakeProcess:
+    """没有权限的 linux 进程: nice 只能调大"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.value = 0
+
+    def nice(self, value: int = None):
+        if value is None:
+            return self.value
+        if value < self.value:
+            raise psutil.AccessDenied(self.pid)
+        self.value = value
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    processes = {100: FakeProcess(100), 200: FakeProcess(200)}
+    monkeypatch.setattr(affinity, "client_pid", lambda pid: pid)
+    monkeypatch.setattr(affinity, "PRIORITIES", {IDLE: 10, NORMAL: 0, CRITICAL: -5})
+    monkeypatch.setattr(AffinityManager, "processes", staticmethod(lambda pid: [processes[pid]]))
+    manager = AffinityManager({"10001": 100, "10002": 200})
+    manager.processes_by_pid = processes
+    return manager
+
+
+def test_critical_falls_back_to_normal(manager):
+    assert manager.update({"10001": CRITICAL}) == {100: CRITICAL, 200: NORMAL}
+    assert manager.processes_by_pid[100].value == 0
+    assert manager.denied == {}
+
+
+def test_priority_that_cannot_be_raised_is_reported(manager, capsys):
+    manager.update({"10001": IDLE, "10002": NORMAL})
+    assert manager.processes_by_pid[100].value == 10
+
+    # 升不回来: 报告一次, 不算已设置
+    assert manager.update({"10001": NORMAL}) == {}
+    assert manager.update({"10001": CRITICAL}) == {}
+    assert manager.denied == {100: NORMAL}
+    assert capsys.readouterr().out.count("没有权限设置优先级") == 1
+    assert "没有权限设置优先级: 100(normal)" in manager.report()
+
+    # 之后空闲的账号不再降低优先级
+    assert manager.lower is False
+    manager.update({"10002": IDLE})
+    assert manager.processes_by_pid[200].value == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.allocator import TargetAllocator, _collisions, _simulate
+
+
+def test_allocation_removes_collisions():
+    _, _, shared = _simulate(12, allocate=False)
+    _, targets, allocated = _simulate(12, allocate=True, capacity=30)
+
+    assert _collisions(shared, 4) > 0
+    assert _collisions(allocated, 4) == 0
+    # 打满的格子换了人, 全部账号都在打
+    assert all(allocated.values())
+    assert sum(a.moves for a in targets.accounts) > 0
+
+
+def test_accounts_on_one_cell_are_spread_over_a_cycle():
+    qqs = [f"sim{i}" for i in range(6)]
+    targets = TargetAllocator(qqs, rows=1, cols=3, cycle=12)
+
+    by_cell = {}
+    for qq in qqs:
+        by_cell.setdefault(targets.allocate(qq), []).append(targets.stagger(qq))
+    assert len(by_cell) == 3
+    for staggers in by_cell.values():
+        # 同一格子 2 个账号错开半轮
+        assert len(staggers) == 2
+        assert staggers[1] - staggers[0] == pytest.approx(12 / 2)
+    # 不同格子之间也错开
+    starts = sorted(s for staggers in by_cell.values() for s in staggers)
+    assert len(set(starts)) == len(starts)
+
+
+def test_moving_into_a_busy_cell_waits_half_a_cycle():
+    targets = TargetAllocator(["a", "b"], rows=1, cols=1, cycle=10)
+    targets.attacked("a", 100.0)
+
+    # b 在 101 秒打完上一个格子, 和 a(100 秒) 错开半轮: 105 秒
+    assert targets.realign("b", 101.0) == pytest.approx(4.0)
+
+
+@pytest.mark.parametrize(
+    "option", [{"stop": True, "position": [2, 2]}, {"position": [2]}], ids=["stop", "bad-position"]
+)
+def test_juyi_that_does_not_attack_gives_the_cell_back(game, option):
+    targets = TargetAllocator([game.qq], rows=1, cols=3, cycle=12)
+    game.util.targets = targets
+    game.apply_config({"战争": {"聚义": option}})
+    start = game.util.clock.time()
+
+    game.run("Zhanzheng.juyi")
+
+    assert sum(cell.holders for cell in targets.cells) == 0
+    assert targets.accounts[0].cell == -1
+    # 不打时也不用错开等待
+    assert game.util.clock.time() == start
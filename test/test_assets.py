@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import FIXTURES
+from utils import assets, vision
+from utils.assets import AssetPack, build, latest_pack
+
+NAME = "popups/系统公告.png"
+
+
+@pytest.fixture
+def assets_dir(tmp_path, monkeypatch):
+    """临时资源目录(一个模板), 模板加载改为从这里读"""
+    os.makedirs(tmp_path / "popups")
+    shutil.copy(os.path.join(FIXTURES, NAME), tmp_path / NAME)
+    monkeypatch.setattr(vision, "ASSETS_DIR", str(tmp_path))
+    monkeypatch.setattr(vision, "_templates", {})
+    monkeypatch.setattr(assets, "_pack", None)
+    return tmp_path
+
+
+def write_png(path, image):
+    cv2.imencode(".png", image)[1].tofile(str(path))
+
+
+def test_template_comes_from_fresh_pack(assets_dir, monkeypatch):
+    build(str(assets_dir))
+    pack = AssetPack(latest_pack(str(assets_dir)))
+    monkeypatch.setattr(vision, "get_pack", lambda: pack)
+
+    template = vision.load_template(NAME)
+    # 直接指向 mmap, 不是解码出来的数组
+    assert not template.flags.owndata and not template.flags.writeable
+
+
+def test_edited_png_wins_over_stale_pack(assets_dir, monkeypatch):
+    build(str(assets_dir))
+    pack = AssetPack(latest_pack(str(assets_dir)))
+    monkeypatch.setattr(vision, "get_pack", lambda: pack)
+
+    edited = np.full((20, 30, 3), 200, dtype=np.uint8)
+    write_png(assets_dir / NAME, edited)
+
+    assert not pack.fresh(NAME, str(assets_dir / NAME))
+    assert np.array_equal(vision.load_template(NAME), edited)
+
+
+def test_touched_png_with_same_content_is_fresh(assets_dir):
+    build(str(assets_dir))
+    pack = AssetPack(latest_pack(str(assets_dir)))
+    path = str(assets_dir / NAME)
+    os.utime(path, ns=(0, 0))
+    assert pack.fresh(NAME, path)
+    pack.close()
+
+
+def test_rebuild_while_mapped_writes_a_new_version(assets_dir):
+    build(str(assets_dir))
+    first = latest_pack(str(assets_dir))
+    pack = AssetPack(first)
+
+    build(str(assets_dir))
+    second = latest_pack(str(assets_dir))
+    assert second != first
+    assert AssetPack(second).get(NAME).shape == pack.get(NAME).shape
@@ -0,0 +1,90 @@
+import os
+import time
+
+import pytest
+
+from utils.backend import Backend, X11Backend
+
+needs_display = pytest.mark.skipif(
+    not os.environ.get("DISPLAY"), reason="需要 X 显示(比如 Xvfb :99)"
+)
+
+
+def test_backend_requires_input_and_capture():
+    class Partial(Backend):
+        def press(self, hwnd, x, y):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_optional_capabilities_default_to_none():
+    class Minimal(Backend):
+        def press(self, hwnd, x, y):
+            pass
+
+        def release(self, hwnd, x, y):
+            pass
+
+        def key(self, hwnd, char, down):
+            pass
+
+        def send_char(self, hwnd, char):
+            pass
+
+        def capture(self, hwnd):
+            return None
+
+    backend = Minimal()
+    assert backend.find_windows("MainWindow") is None
+    assert backend.window_pid(1) is None
+
+
+@pytest.fixture
+def window():
+    """当前 DISPLAY 上的测试窗口"""
+    pytest.importorskip("Xlib")
+    from Xlib import X, display
+
+    client = display.Display()
+    screen = client.screen()
+    window = screen.root.create_window(
+        0, 0, 320, 240, 0, screen.root_depth,
+        background_pixel=0x0000FF,
+        event_mask=X.ButtonPressMask | X.ButtonReleaseMask,
+    )
+    window.set_wm_name("backend-test")
+    window.map()
+    client.sync()
+    time.sleep(0.5)
+    yield client, window
+    window.destroy()
+    client.close()
+
+
+@needs_display
+def test_x11_find_click_capture(window):
+    from Xlib import X
+
+    client, expected = window
+    backend = X11Backend()
+    found = backend.find_windows("backend-test")
+    assert found == [expected.id]
+
+    frame = backend.capture(found[0])
+    assert frame.shape == (240, 320, 3)
+    assert tuple(frame[10, 10]) == (255, 0, 0)  # BGR 蓝色
+
+    backend.press(found[0], 100, 50)
+    backend.release(found[0], 100, 50)
+    clicks = []
+    deadline = time.time() + 2
+    while time.time() < deadline and len(clicks) < 2:
+        while client.pending_events():
+            e = client.next_event()
+            if e.type in (X.ButtonPress, X.ButtonRelease):
+                clicks.append((e.type, e.event_x, e.event_y))
+        time.sleep(0.05)
+    assert clicks == [(X.ButtonPress, 100, 50), (X.ButtonRelease, 100, 50)]
+    assert backend.find_windows("不存在的窗口") == []
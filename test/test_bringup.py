@@ -0,0 +1,89 @@
+import pytest
+
+from utils import backend
+from utils.bringup import BringUp
+
+
+class FakeBackend(backend.Backend):
+    """窗口 1001~1003; 1003 查进程时已经关闭"""
+
+    name = "win32"
+
+    def press(self, hwnd, x, y):
+        pass
+
+    def release(self, hwnd, x, y):
+        pass
+
+    def key(self, hwnd, char, down):
+        pass
+
+    def send_char(self, hwnd, char):
+        pass
+
+    def capture(self, hwnd):
+        return None
+
+    def find_windows(self, parent_title, child_title=None):
+        return [1001, 1002, 1003]
+
+    def window_pid(self, hwnd):
+        if hwnd == 1003:
+            raise OSError("BadWindow")
+        return hwnd * 10
+
+
+class FakeGame:
+    """1002 找不到 flash 区域, 其它校准为 (8, 31)"""
+
+    def __init__(self, hwnd: int):
+        self.hwnd, self.qq = hwnd, f"qq{hwnd}"
+        self.config = {}
+        self.coordDiff = (0, 0)
+
+    def cached_offset(self):
+        return None
+
+    def save_offset(self, offset):
+        pass
+
+    def connect(self):
+        return self
+
+    def _measure_offset(self, app):
+        return None if self.hwnd == 1002 else (8, 31)
+
+
+@pytest.fixture(autouse=True)
+def fake_backend(monkeypatch):
+    monkeypatch.setattr(backend, "_backend", FakeBackend())
+
+
+def test_missing_windows_are_not_started():
+    games = [FakeGame(hwnd) for hwnd in (1001, 1002, 1003, 1004)]
+    bringup = BringUp(games, 4).run()
+    startups = {s.qq: s for s in bringup.startups}
+
+    assert [g.qq for g in bringup.usable()] == ["qq1001", "qq1002"]
+    assert startups["qq1001"].pid == 10010
+    assert startups["qq1004"].error == "未找到窗口"
+    assert "BadWindow" in startups["qq1003"].error
+    # 窗口在但校准失败的用其它窗口的偏移, 没找到窗口的不分配
+    assert [g.coordDiff for g in games] == [(8, 31), (8, 31), (0, 0), (0, 0)]
+
+
+def test_collect_maps_slots_by_account():
+    from multiprocessing.sharedctypes import RawArray
+
+    from utils.supervisor import Slot
+
+    bringup = BringUp([FakeGame(hwnd) for hwnd in (1001, 1004, 1002)], 2).run()
+    board = RawArray(Slot, 2)
+    for index, ready in enumerate((5.0, 7.0)):
+        board[index].spawned, board[index].imported, board[index].ready = 1.0, 2.0, ready
+    bringup.collect(board, [g.qq for g in bringup.usable()])
+
+    startups = {s.qq: s for s in bringup.startups}
+    assert startups["qq1001"].ready == 5.0
+    assert startups["qq1002"].ready == 7.0
+    assert startups["qq1004"].ready == 0.0
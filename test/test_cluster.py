@@ -0,0 +1,120 @@
+import socketserver
+import threading
+from types import SimpleNamespace
+
+from utils.cluster import Agent, Coordinator, _AgentConn
+
+
+def start_agent(coordinator, host, qqs, done, capacity=2):
+    def runner(qq, routine, args):
+        done.append((host, qq, routine))
+
+    agent = Agent(
+        host,
+        [{"qq": qq, "hwnd": 0} for qq in qqs],
+        runner,
+        capacity=capacity,
+        metrics_interval=0.1,
+    )
+    thread = threading.Thread(target=agent.run, args=(coordinator.address,))
+    thread.start()
+    return thread
+
+
+def test_tasks_go_to_agents_owning_the_account():
+    plan = [
+        {"qq": qq, "routine": routine}
+        for qq in ("1", "2", "3")
+        for routine in ("Zhanzheng.juyi", "Other.xiShuXing100")
+    ]
+    coordinator = Coordinator(plan, "127.0.0.1", 0)
+    coordinator.serve()
+    done = []
+    threads = [
+        start_agent(coordinator, "pc0", ["1", "2"], done),
+        start_agent(coordinator, "pc1", ["3"], done),
+    ]
+
+    assert coordinator.wait(10)
+    coordinator.stop()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(coordinator.results) == 6
+    assert all(result["ok"] for result in coordinator.results)
+    assert sorted(qq for host, qq, _ in done if host == "pc1") == ["3", "3"]
+    assert {qq for host, qq, _ in done if host == "pc0"} == {"1", "2"}
+
+
+def test_unowned_accounts_are_reported_and_abandoned():
+    plan = [{"qq": "1", "routine": "Zhanzheng.juyi"}, {"qq": "9", "routine": "click_more"}]
+    coordinator = Coordinator(plan, "127.0.0.1", 0)
+    coordinator.serve()
+    done = []
+    thread = start_agent(coordinator, "pc0", ["1"], done)
+
+    assert not coordinator.wait(1)
+    assert coordinator.unowned() == ["9"]
+    coordinator.abandon(coordinator.unowned())
+    assert coordinator.wait(5)
+    coordinator.stop()
+    thread.join(5)
+
+    failed = [result for result in coordinator.results if not result["ok"]]
+    assert [result["qq"] for result in failed] == ["9"]
+    assert done == [("pc0", "1", "Zhanzheng.juyi")]
+
+
+def test_server_does_not_change_stdlib_class():
+    coordinator = Coordinator([], "127.0.0.1", 0)
+    coordinator.server.server_close()
+    assert coordinator.server.allow_reuse_address
+    assert not socketserver.ThreadingTCPServer.allow_reuse_address
+
+
+def test_empty_plan_is_finished():
+    coordinator = Coordinator([], "127.0.0.1", 0)
+    coordinator.server.server_close()
+    assert coordinator.wait(0)
+
+
+class Socket:
+    """记录发出的消息, broken 时发送失败"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.sent = []
+
+    def sendall(self, data):
+        if self.broken:
+            raise ConnectionResetError("连接已断开")
+        self.sent.append(data)
+
+
+def connect(coordinator, host, qqs, cpu, broken=False):
+    handler = SimpleNamespace(request=Socket(broken))
+    windows = [{"qq": qq} for qq in qqs]
+    agent = _AgentConn(handler, {"host": host, "capacity": 2, "windows": windows})
+    agent.cpu = cpu
+    coordinator.agents[host] = agent
+    return agent
+
+
+def test_failed_send_requeues_task():
+    coordinator = Coordinator([{"qq": "1", "routine": "Zhanzheng.juyi"}], "127.0.0.1", 0)
+    coordinator.server.server_close()
+    # 负载相同时先选 cpu 低的(断开的那台)
+    broken = connect(coordinator, "pc0", ["1"], 0.0, broken=True)
+    healthy = connect(coordinator, "pc1", ["1"], 50.0)
+
+    coordinator._dispatch()
+    assert broken.running == 0
+    assert coordinator.assigned == {}
+    assert [task["id"] for task in coordinator.pending] == [1]
+    assert not coordinator.finished.is_set()
+
+    # 断开的连接清理后, 任务分给其它机器
+    coordinator._drop(broken)
+    assert list(coordinator.assigned) == [1]
+    assert coordinator.assigned[1][0] is healthy
+    assert len(healthy.handler.request.sent) == 1
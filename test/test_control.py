@@ -0,0 +1,86 @@
+import json
+from multiprocessing.sharedctypes import RawArray
+from types import SimpleNamespace
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from conftest import statuses
+from utils.control import ControlServer
+from utils.supervisor import STOP, Heartbeat, RoutineStopped, Slot
+
+
+class StopAt(Heartbeat):
+    """第 stop_at 次检查时控制接口已经要求停止"""
+
+    def __init__(self, stop_at: int):
+        super().__init__(RawArray(Slot, 1), 0)
+        self.stop_at = stop_at
+        self.checks = 0
+
+    def checkpoint(self):
+        self.checks += 1
+        if self.checks == self.stop_at:
+            self.slot.control = STOP
+        super().checkpoint()
+
+
+@pytest.mark.parametrize(
+    "routine, args",
+    [("Zhanzheng.juyi", []), ("Bianqiang.liehun", [20]), ("Fuben.zhengzhan", [5])],
+)
+def test_stop_mid_loop_reaches_ledger(game, ledger, routine, args):
+    game.util.heartbeat = StopAt(2)
+
+    with pytest.raises(RoutineStopped):
+        game.run(routine, *args)
+
+    assert game.util.heartbeat.checks == 2
+    assert statuses(ledger) == [(routine, "stopped", "")]
+
+
+@pytest.fixture(scope="module")
+def server():
+    option = SimpleNamespace(game=SimpleNamespace(qq="10001"), inbox=None)
+    supervisor = SimpleNamespace(
+        options=[option], board=RawArray(Slot, 1), workers={}
+    )
+    server = ControlServer(supervisor, port=0).serve()
+    yield server
+    server.close()
+
+
+def call(server, path: str, data: bytes):
+    url = f"http://{server.address[0]}:{server.address[1]}{path}"
+    try:
+        with urlopen(Request(url, data), timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        (b"[1, 2]", "json 对象"),
+        (b'"10001"', "json 对象"),
+        (b"not json", ""),
+        (b'{"qq": 10001}', "qq 必须是数组或字符串"),
+        (b'{"qq": {"a": 1}}', "qq 必须是数组或字符串"),
+        (b'{"qq": ["20002"]}', "未知账号"),
+    ],
+)
+def test_bad_requests_get_400(server, data, error):
+    status, result = call(server, "/pause", data)
+    assert status == 400
+    assert result["ok"] is False and error in result["error"]
+
+
+def test_bad_routine_gets_400(server):
+    status, result = call(server, "/run", b'{"routine": 1}')
+    assert status == 400 and "routine" in result["error"]
+
+
+def test_valid_request(server):
+    assert call(server, "/pause", b'{"qq": "10001"}') == (200, {"ok": True, "paused": ["10001"]})
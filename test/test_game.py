@@ -0,0 +1,15 @@
+import time
+
+from conftest import statuses
+
+
+def test_click_more_waits_on_the_routine_clock(game, ledger):
+    clock = game.util.clock
+    start, real = clock.time(), time.time()
+
+    game.run("click_more", ("天机秘籍", 670, 380), 100, 30)
+
+    # 100 次间隔 30 秒只消耗虚拟时间
+    assert clock.time() - start >= 3000
+    assert time.time() - real < 2
+    assert statuses(ledger) == [("click_more", "ok", "")]
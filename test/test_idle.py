@@ -0,0 +1,16 @@
+from conftest import statuses
+from utils.idle import IdleRuntime, ShortChore
+
+
+def test_filler_chore_is_preempted_at_the_deadline(game, ledger):
+    # 猎魂 20 次要 60 多秒, 空闲只有 30 秒
+    chore = ShortChore("Bianqiang.liehun", [20], duration=5, repeat=False)
+    runtime = IdleRuntime(game, [chore], margin=2)
+    game.util.idle_runtime = runtime
+    clock = game.util.clock
+    start = clock.time()
+
+    runtime.fill(30, clock.sleep)
+
+    assert clock.time() - start == 30
+    assert statuses(ledger) == [("Bianqiang.liehun", "preempted", "")]
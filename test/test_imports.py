@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# 只跑聚义的工作进程不应该加载的模块
+HEAVY = ["numpy", "cv2", "psutil", "pywinauto", "pygetwindow", "utils.scheduler", "utils.profiling"]
+
+
+def test_worker_imports_stay_slim():
+    # 工作进程(spawn)重新导入 index.py, 再导入用到的功能模块
+    script = (
+        "import sys, index, utils.supervisor, future.zhanzheng;"
+        f"print([m for m in {HEAVY!r} if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=SRC, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
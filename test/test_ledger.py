@@ -0,0 +1,45 @@
+import sqlite3
+import threading
+import time
+
+from utils.ledger import Ledger, Run
+
+
+def count(ledger) -> int:
+    conn = sqlite3.connect(ledger.path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_flush_waits_for_every_row(tmp_path):
+    ledger = Ledger(str(tmp_path / "ledger.db"), batch=7, interval=0.05)
+
+    def add(qq):
+        for i in range(50):
+            run = Run(qq, "Zhanzheng.juyi", [i])
+            run.finish("ok")
+            ledger.add(run)
+
+    threads = [threading.Thread(target=add, args=(str(10001 + i),)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ledger.flush()
+
+    assert count(ledger) == ledger.written == 200
+
+
+def test_flush_returns_when_nothing_is_pending(tmp_path):
+    ledger = Ledger(str(tmp_path / "ledger.db"), interval=0.05)
+    run = Run("10001", "click_more", [])
+    run.finish("ok")
+    ledger.add(run)
+    ledger.flush()
+    assert count(ledger) == 1
+
+    start = time.time()
+    ledger.flush()
+    assert time.time() - start < 0.5
@@ -0,0 +1,78 @@
+import glob
+import gzip
+import logging
+import time
+
+import pytest
+
+from utils import logs
+from utils.logs import setup_logging
+from utils.supervisor import Supervisor
+
+CONFIG = {"单文件大小MB": 0.002, "保留个数": 50, "汇总点击": True, "汇总间隔": 3600}
+
+
+class Account:
+    def __init__(self, qq):
+        self.qq = qq
+        self.config = {"日志": CONFIG}
+
+
+class Option:
+    def __init__(self, qq):
+        self.game = Account(qq)
+
+
+def log_task(option):
+    from utils.logs import create_handler
+
+    logger = logging.getLogger(f"Game-{option.game.qq}")
+    logger.propagate = False
+    logger.addHandler(create_handler(f"logs/{option.game.qq}.log", CONFIG))
+    for i in range(200):
+        logger.info(f"{option.game.qq} 第 {i} 行 " + "x" * 40)
+        logger.debug("点击", extra={"click": "聚义"})
+        logging.getLogger("worker").info(f"{option.game.qq} 共用日志 {i}")
+
+
+def read(pattern: str) -> str:
+    text = ""
+    for path in glob.glob(pattern):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            text += f.read()
+    return text
+
+
+@pytest.fixture
+def root_logger(monkeypatch):
+    """测试结束后去掉添加的 handler"""
+    monkeypatch.setattr(logs, "_handlers", {})
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    yield root
+    for handler in root.handlers[len(handlers) :]:
+        root.removeHandler(handler)
+
+
+def test_worker_logs_are_written_once_by_the_parent(tmp_path, monkeypatch, root_logger):
+    monkeypatch.chdir(tmp_path)
+    setup_logging("logs/game.log", CONFIG)
+    qqs = ["10001", "10002", "10003", "10004"]
+    supervisor = Supervisor(log_task, [Option(qq) for qq in qqs], per_worker=2)
+    supervisor.start()
+    while supervisor.check():
+        time.sleep(0.1)
+    supervisor.stop()
+    for handler in logs._handlers.values():
+        handler.close()
+
+    shared = read("logs/game.log*")
+    for qq in qqs:
+        # 切分过很多次也不丢行
+        assert read(f"logs/{qq}.log*").count(f"{qq} 第 ") == 200
+        assert shared.count(f"{qq} 共用日志") == 200
+    assert len(glob.glob("logs/game.log.*.gz")) > 1
+    # 点击汇总由主进程输出(工作进程结束后)
+    for qq in qqs:
+        assert "点击汇总: 聚义 | 次数: 200" in read(f"logs/{qq}.log*")
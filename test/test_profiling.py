@@ -0,0 +1,81 @@
+import glob
+import os
+import threading
+import time
+import tracemalloc
+
+from utils.profiling import ProfileOptions, ProfiledTarget, merge_profiles
+from utils.supervisor import Supervisor
+
+
+class Account:
+    def __init__(self, qq):
+        self.qq = qq
+        self.hwnd = None
+        self.config = {}
+
+
+class Option:
+    def __init__(self, qq):
+        self.game = Account(qq)
+
+
+def busy_loop():
+    total = 0
+    for i in range(10000):
+        total += i
+    return total
+
+
+def endless_task(option):
+    # 控制模式下任务不会自己结束, 只能由 Supervisor.stop 停止
+    option.heartbeat.progress("演示", 1, 1)
+    while True:
+        busy_loop()
+        time.sleep(0.01)
+
+
+def test_stopped_fleet_writes_profiles(tmp_path):
+    directory = str(tmp_path / "profile")
+    target = ProfiledTarget(endless_task, ProfileOptions(cpu=True, directory=directory))
+    supervisor = Supervisor(target, [Option("10001"), Option("10002")], per_worker=1)
+    supervisor.start()
+    deadline = time.time() + 10
+    while not all(slot.iteration for slot in supervisor.board) and time.time() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.3)
+
+    start = time.time()
+    supervisor.stop()
+
+    # 工作进程收到停止信号后自己退出(不是等到超时被强制结束)
+    assert time.time() - start < 5
+    assert len(glob.glob(os.path.join(directory, "*.prof"))) == 2
+    assert "busy_loop" in merge_profiles(directory)
+
+
+def test_memory_snapshot_once_per_process(tmp_path):
+    directory = str(tmp_path / "profile")
+    # 两个账号线程都开始后再结束
+    started = threading.Barrier(2)
+
+    def allocate(option):
+        option.blocks = [bytearray(1024) for _ in range(100)]
+        started.wait(5)
+
+    target = ProfiledTarget(allocate, ProfileOptions(memory=True, directory=directory))
+    threads = [
+        threading.Thread(target=target, args=(Option(qq),)) for qq in ("10001", "10002")
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+    finally:
+        tracemalloc.stop()
+
+    # 快照是整个进程的, 每个账号各写一份合并时会重复计算
+    files = glob.glob(os.path.join(directory, "*.snapshot"))
+    assert [os.path.basename(path) for path in files] == [f"{os.getpid()}.snapshot"]
+    assert "1 个文件" in merge_profiles(directory)
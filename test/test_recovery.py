@@ -0,0 +1,98 @@
+import logging
+import os
+
+import pytest
+
+from conftest import FIXTURES, statuses
+from coords.popups import 系统公告
+from utils.clock import VirtualClock
+from utils.recovery import Recovery, RoutineAborted
+from utils.vision import load_frame
+
+CLEAR = load_frame(os.path.join(FIXTURES, "frames", "无弹窗.png"))
+POPUP = load_frame(os.path.join(FIXTURES, "frames", "系统公告.png"))
+# 录制的截图里的弹窗模板(绝对路径, 不用 assets 里的)
+TEMPLATE = os.path.join(FIXTURES, "popups", "系统公告.png")
+
+
+def entry(then: str = "resume") -> tuple:
+    name, _, region, action, _ = 系统公告
+    return (name, TEMPLATE, region, action, then)
+
+
+class Screen:
+    """按顺序返回录制的截图, 最后一张一直返回"""
+
+    def __init__(self, *frames):
+        self.frames = list(frames)
+        self.clicks = []
+
+    def capture(self):
+        return self.frames.pop(0) if len(self.frames) > 1 else self.frames[0]
+
+    def click(self, coord):
+        self.clicks.append(coord[0])
+
+
+def make(screen: Screen, then: str = "resume", **kwargs) -> Recovery:
+    # 处理弹窗后的等待只消耗虚拟时间
+    kwargs.setdefault("clock", VirtualClock())
+    logger = logging.getLogger("test-recovery")
+    return Recovery(screen.capture, screen.click, [entry(then)], logger, **kwargs)
+
+
+def test_no_popup_on_clear_frame():
+    screen = Screen(CLEAR)
+    checker = make(screen)
+    assert checker.detect(CLEAR) is None
+    assert checker.check(CLEAR) is False
+    assert screen.clicks == []
+
+
+def test_popup_is_dismissed_and_routine_resumes():
+    screen = Screen(CLEAR)
+    checker = make(screen)
+    assert checker.check(POPUP) is True
+    assert screen.clicks == ["系统公告_关闭"]
+    assert checker.counts["系统公告"] == 1
+
+
+def test_popup_that_stays_aborts_after_retries():
+    screen = Screen(POPUP)
+    checker = make(screen, retries=2)
+    start = checker.clock.time()
+    with pytest.raises(RoutineAborted, match="无法关闭"):
+        checker.check(POPUP)
+    assert screen.clicks == ["系统公告_关闭"] * 2
+    assert checker.clock.time() - start == 2
+
+
+def test_interval_uses_routine_clock():
+    screen = Screen(CLEAR)
+    checker = make(screen, interval=5)
+    captures = []
+    checker.capture = lambda: captures.append(checker.clock.time()) or CLEAR
+
+    start = checker.clock.time()
+    for _ in range(4):
+        checker.check()
+        checker.clock.sleep(2)
+    # 间隔内不截图
+    assert captures == [start, start + 6]
+
+
+def test_abort_popup_raises():
+    screen = Screen(CLEAR)
+    with pytest.raises(RoutineAborted, match="要求中止"):
+        make(screen, "abort").check(POPUP)
+
+
+def test_abort_reaches_ledger_through_routine(game, ledger):
+    # 第 3 次检测时出现要求中止的弹窗, 处理后恢复正常画面
+    screen = Screen(CLEAR, CLEAR, POPUP, CLEAR)
+    game.util.capture = screen.capture
+    game.util.recovery = make(screen, "abort", clock=game.util.clock)
+
+    with pytest.raises(RoutineAborted):
+        game.run("Zhanzheng.juyi")
+    assert statuses(ledger) == [("Zhanzheng.juyi", "aborted", "弹窗要求中止: 系统公告")]
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils.scheduler import Chore, Scheduler
+from utils.supervisor import RoutineStopped
+
+
+def account(qq, chores):
+    return SimpleNamespace(qq=qq, config={"任务": chores})
+
+
+def test_accounts_without_chores_still_get_a_worker():
+    games = [
+        account("1", [{"routine": "Zhanzheng.juyi", "duration": 400}]),
+        account("2", []),
+        account("3", [{"routine": "Other.xiShuXing100", "duration": 300}]),
+    ]
+    scheduler = Scheduler.from_games(games, per_worker=2)
+    scheduler.build(begin=0)
+
+    assert sorted(qq for worker in scheduler.workers for qq in worker) == ["1", "2", "3"]
+    assert scheduler.plan["2"] == []
+    assert scheduler.makespan == 400
+
+
+def test_default_config_schedules_nothing():
+    from utils import Game
+
+    scheduler = Scheduler.from_games([Game()], per_worker=2)
+    scheduler.build()
+    assert not scheduler.chores
+
+
+def test_respawned_account_skips_finished_chores(game, monkeypatch):
+    clock = game.util.clock
+    begin = clock.time()
+    scheduler = Scheduler(
+        [Chore(game.qq, "first", duration=60), Chore(game.qq, "second", duration=60)]
+    )
+    scheduler.build(begin=begin)
+    calls = []
+
+    def run(routine, *args):
+        calls.append((routine, clock.time() - begin))
+        # 第一次执行到 second 时进程被停止
+        if calls == [("first", 0), ("second", 60)]:
+            raise RoutineStopped()
+
+    monkeypatch.setattr(game, "run", run)
+    with pytest.raises(RoutineStopped):
+        scheduler.run(game)
+    # 等待用虚拟时钟
+    assert calls == [("first", 0), ("second", 60)]
+
+    # 重启后从没完成的任务继续
+    scheduler.run(game)
+    assert calls[2:] == [("second", 60)]
+
+    # 计划全部完成, 下次从头开始
+    scheduler.run(game)
+    assert [routine for routine, _ in calls[3:]] == ["first", "second"]
@@ -0,0 +1,66 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.supervisor import Supervisor
+
+
+class Process:
+    """还在运行的工作进程, 记录是否被结束"""
+
+    exitcode = None
+
+    def __init__(self):
+        self.terminated = False
+
+    def is_alive(self):
+        return not self.terminated
+
+    def terminate(self):
+        self.terminated = True
+
+    def join(self, timeout=None):
+        pass
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    options = [SimpleNamespace(game=SimpleNamespace(qq=str(10001 + i))) for i in range(3)]
+    supervisor = Supervisor(print, options, per_worker=3, max_restarts=1)
+    spawned = []
+
+    def spawn(indexes, restarts=0):
+        spawned.append((indexes, restarts))
+        for index in indexes:
+            supervisor.board[index].heartbeat = time.time()
+            supervisor.board[index].crashed = False
+        supervisor.workers[len(spawned)] = {
+            "process": Process(),
+            "indexes": indexes,
+            "restarts": restarts,
+        }
+
+    monkeypatch.setattr(supervisor, "_spawn", spawn)
+    supervisor.spawned = spawned
+    return supervisor
+
+
+def test_crashed_account_restarts_alone(supervisor):
+    supervisor._spawn([0, 1, 2])
+    first = supervisor.workers[1]
+    supervisor.options[1].heartbeat.crash()
+
+    assert supervisor.check()
+
+    # 同进程的其他账号不受影响
+    assert not first["process"].terminated
+    assert first["indexes"] == [0, 2]
+    assert supervisor.spawned[-1] == ([1], 1)
+
+    # 超过最大重启次数后不再重启
+    supervisor.options[1].heartbeat.crash()
+    supervisor.check()
+    assert len(supervisor.spawned) == 2
+    assert supervisor.workers[2]["indexes"] == []
+    assert not first["process"].terminated
@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+
+from utils import backend
+from utils.clock import VirtualClock
+from utils.tabs import FakeTabTree, TabHost, TabUtil
+
+TITLES = ["2548918215", "2468659059", "3305194332"]
+
+
+class FakeBackend(backend.Backend):
+    """记录点在不是当前标签上的点击"""
+
+    name = "fake"
+
+    def __init__(self, tree: FakeTabTree):
+        self.tree = tree
+        self.clicks = 0
+        self.wrong = []
+
+    def press(self, hwnd, x, y):
+        self.clicks += 1
+        if hwnd != self.tree.view():
+            self.wrong.append(hwnd)
+
+    def release(self, hwnd, x, y):
+        pass
+
+    def key(self, hwnd, char, down):
+        pass
+
+    def send_char(self, hwnd, char):
+        pass
+
+    def capture(self, hwnd):
+        return None
+
+
+@pytest.fixture
+def host(monkeypatch):
+    tree = FakeTabTree(TITLES)
+    monkeypatch.setattr(backend, "_backend", FakeBackend(tree))
+    return TabHost(tree, VirtualClock())
+
+
+def account(host: TabHost, title: str):
+    """标签里的账号(已校准)"""
+    from future.futureBase import Base
+
+    tab = host.tab(title)
+    host.calibrate(tab, lambda hwnd: (3, 4))
+    host.release(tab)
+    util = TabUtil(tab, logging.getLogger(f"tabs-{title}"))
+    util.clock = host.clock
+    return tab, util, Base(tab.hwnd, util, {}, title, None, None)
+
+
+def test_accounts_take_turns_without_wrong_tab_clicks(host):
+    def routine(title):
+        tab, util, base = account(host, title)
+
+        def run():
+            for _ in range(5):
+                util.click(("按钮1", 100, 100))
+                base.sleep(0.5)
+                util.click(("按钮2", 200, 200))
+                base.idle(60)
+            host.release(tab)
+
+        return run
+
+    virtual = host.clock.run([(title, routine(title)) for title in TITLES])
+
+    fake = backend._backend
+    assert fake.clicks == 2 * 5 * len(TITLES)
+    assert fake.wrong == []
+    # 每轮都要切换回自己的标签
+    assert all(tab.stats["切换"] >= 5 for tab in host.tabs.values())
+    # 等待期间窗口给其它账号用, 总时间接近单个账号
+    assert virtual < 5 * 60.6 + 30
+
+
+def test_busy_tab_yields_after_slice(host):
+    host.slice = 5
+    busy_tab, busy, busy_base = account(host, TITLES[0])
+    _, other, _ = account(host, TITLES[1])
+    clicked = []
+
+    def hog():
+        # 一直在点, 从不空闲
+        for _ in range(30):
+            busy.click(("按钮1", 100, 100))
+            busy_base.sleep(0.5)
+        host.release(busy_tab)
+
+    def wait_then_click():
+        host.clock.sleep(1)
+        other.click(("按钮2", 200, 200))
+        clicked.append(host.clock.time())
+
+    start = host.clock.time()
+    host.clock.run([("hog", hog), ("other", wait_then_click)])
+
+    assert busy_tab.stats["让出"] >= 1
+    assert clicked and clicked[0] - start <= host.slice + 2
+    assert backend._backend.wrong == []
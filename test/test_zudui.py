@@ -0,0 +1,26 @@
+import multiprocessing
+
+import pytest
+
+from conftest import statuses
+
+
+class Failure(Exception):
+    pass
+
+
+def test_join_lock_is_released_when_the_step_fails(game, ledger):
+    game.lock = multiprocessing.Lock()
+    game.apply_config({"组队": {"role": "slave"}})
+
+    def broken(coord, content):
+        raise Failure("输入框不见了")
+
+    game.util.type_content = broken
+
+    with pytest.raises(Failure):
+        game.run("ZuDui.shenKun", 2, 1)
+
+    # 锁已释放, 其它账号可以继续加入队伍
+    assert game.lock.acquire(block=False)
+    assert statuses(ledger) == [("ZuDui.shenKun", "failed", "Failure: 输入框不见了")]